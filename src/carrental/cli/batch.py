@@ -0,0 +1,149 @@
+# ==============================================================================
+# Non-interactive batch mode: run service calls from a command file.
+# Every step tells you plainly what it does.
+#   - DESIGN PATTERN: Command (each line of the file is one command object)
+# ==============================================================================
+
+"""Batch runner: JSONL/YAML command files mapped onto the services."""  # Nightly jobs without typing into prompts.
+
+from __future__ import annotations
+import json, threading, time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, TextIO
+from carrental.storage.db import Database
+from carrental.services.auth_service import AuthService
+from carrental.services.inventory_service import InventoryService
+from carrental.services.rental_service import RentalService
+
+READ_OPS = {  # Calls that never write; consecutive ones run in parallel.
+    "auth.list_admins",
+    "inventory.list_cars", "inventory.get",
+    "rental.quote", "rental.pending_bookings", "rental.pending_bookings_table", "rental.my_bookings_table",
+    "rental.booking_history", "rental.booking_totals", "rental.booking_history_table", "rental.available_cars_table", "rental.alternatives", "rental.fleet_heatmap_table",
+}
+WRITE_OPS = {  # Calls that change data; consecutive ones share grouped transactions.
+    "auth.register", "auth.add_admin", "auth.delete_admin_by_email", "auth.delete_admin_by_id",
+    "auth.change_admin_password", "auth.change_admin_email", "auth.change_admin_name",
+    "inventory.add_car", "inventory.update_car", "inventory.delete_car", "inventory.toggle_availability", "inventory.set_availability",
+    "rental.make_booking", "rental.set_booking_status",
+}
+
+@dataclass
+class BatchOp:  # One line of the command file.
+    line: int  # 1-based position in the file.
+    op: str  # "service.method", e.g. "inventory.update_car".
+    args: Dict[str, Any] = field(default_factory=dict)  # Keyword arguments.
+    ref: Optional[str] = None  # Optional caller id echoed back in the result log.
+
+def load_ops(path: str) -> List[BatchOp]:
+    """Read a .jsonl file (one JSON object per line) or a .yaml/.yml list of objects."""
+    if path.endswith((".yaml", ".yml")):
+        try:
+            import yaml  # Optional dependency: only needed for YAML command files.
+        except ImportError as ex:
+            raise RuntimeError("YAML command files need PyYAML (pip install pyyaml); use JSONL otherwise.") from ex
+        with open(path, encoding="utf-8") as fh:
+            items = yaml.safe_load(fh) or []
+        entries = list(enumerate(items, start=1))
+    else:
+        entries = []
+        with open(path, encoding="utf-8") as fh:
+            for n, raw in enumerate(fh, start=1):
+                raw = raw.strip()
+                if raw and not raw.startswith("#"):
+                    entries.append((n, json.loads(raw)))
+    return [BatchOp(n, str(item["op"]), dict(item.get("args") or {}), item.get("id")) for n, item in entries]
+
+class _Services:  # The three services bound to one Database (one per worker thread).
+    def __init__(self, db: Database) -> None:
+        self.by_name = {"auth": AuthService(db), "inventory": InventoryService(db), "rental": RentalService(db)}
+    def call(self, op: str, args: Dict[str, Any]) -> Any:
+        service, _, method = op.partition(".")
+        return getattr(self.by_name[service], method)(**args)
+
+class BatchRunner:
+    """Runs ops in order: write runs in grouped transactions, read runs fanned out over threads."""
+    def __init__(self, db: Database, *, group_size: int = 200, read_workers: int = 4) -> None:
+        self.db = db
+        self.group_size = group_size  # Max write ops per transaction.
+        self.read_workers = read_workers  # Threads for read phases.
+        self._services = _Services(db)
+        self._local = threading.local()  # Each read worker gets its own connection.
+        self._readers: List[Database] = []  # So we can close them afterwards.
+
+    def _reader(self) -> _Services:
+        svc = getattr(self._local, "svc", None)
+        if svc is None:
+            db = Database(self.db.path)
+            self._readers.append(db)
+            svc = self._local.svc = _Services(db)
+        return svc
+
+    def run(self, ops: Iterable[BatchOp], log: Optional[TextIO] = None) -> Dict[str, Any]:
+        ops = list(ops)
+        results: List[Dict[str, Any]] = []
+        start = time.perf_counter()
+        i = 0
+        with ThreadPoolExecutor(max_workers=self.read_workers) as pool:
+            while i < len(ops):
+                kind = self._kind(ops[i].op)
+                j = i
+                while j < len(ops) and self._kind(ops[j].op) == kind and (kind != "write" or j - i < self.group_size):
+                    j += 1  # Extend the phase while the op kind stays the same.
+                phase = ops[i:j]
+                if kind == "read":
+                    results += list(pool.map(lambda op: self._run_one(self._reader(), op), phase))
+                elif kind == "write":
+                    results += self._run_group(phase)
+                else:
+                    results += [self._result(op, False, error=f"unknown op '{op.op}'", secs=0.0) for op in phase]
+                i = j
+        for db in self._readers:  # Read connections are per run.
+            if db._conn is not None:
+                db._conn.close()
+        self._readers.clear()
+        self._local = threading.local()
+        elapsed = time.perf_counter() - start
+        if log is not None:
+            for r in results:
+                log.write(json.dumps(r, default=str) + "\n")
+        ok = sum(1 for r in results if r["ok"])
+        return {"ops": len(results), "ok": ok, "failed": len(results) - ok, "seconds": round(elapsed, 4),
+                "ops_per_sec": round(len(results) / elapsed, 1) if elapsed else None, "results": results}
+
+    def _kind(self, op: str) -> str:
+        return "read" if op in READ_OPS else "write" if op in WRITE_OPS else "unknown"
+
+    def _run_group(self, phase: List[BatchOp]) -> List[Dict[str, Any]]:  # One transaction; a savepoint per op.
+        out = []
+        with self.db.transaction():
+            for op in phase:
+                try:
+                    with self.db.savepoint("op"):
+                        out.append(self._run_one(self._services, op, reraise=True))
+                except Exception as ex:
+                    out.append(self._result(op, False, error=str(ex), secs=0.0))
+        return out
+
+    def _run_one(self, svc: _Services, op: BatchOp, reraise: bool = False) -> Dict[str, Any]:
+        t = time.perf_counter()
+        try:
+            value = svc.call(op.op, op.args)
+        except Exception as ex:
+            if reraise:
+                raise  # Let the savepoint undo this op.
+            return self._result(op, False, error=str(ex), secs=time.perf_counter() - t)
+        ok = not (value is False or (isinstance(value, tuple) and len(value) == 2 and value[0] is False))  # Services signal failure with False / (False, msg).
+        return self._result(op, ok, result=value, secs=time.perf_counter() - t)
+
+    @staticmethod
+    def _result(op: BatchOp, ok: bool, *, result: Any = None, error: str = "", secs: float) -> Dict[str, Any]:
+        row: Dict[str, Any] = {"line": op.line, "op": op.op, "ok": ok, "ms": round(secs * 1000, 3)}
+        if op.ref is not None:
+            row["id"] = op.ref
+        if error:
+            row["error"] = error
+        elif result is not None:
+            row["result"] = result
+        return row
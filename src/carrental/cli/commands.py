@@ -7,10 +7,14 @@
 """Command objects for each menu action (Command pattern)."""  # These classes perform actions when the user selects a menu item.
 
 from __future__ import annotations  # Use modern type hints on Python 3.10.
+from datetime import date  # Parses optional date filters.
 from typing import Protocol  # A Protocol describes the shape of an object (like an interface).
-from tabulate import tabulate  # Pretty table printing for lists of cars and bookings.
+from tabulate import tabulate as _tabulate  # Pretty table printing for lists of cars and bookings.
+from carrental.utils.profiling import timed  # Counts table rendering as "render" time under --profile.
 from carrental.utils.ui import box_text, boxed, prompt_center, prompt_center_hidden  # Helpers to draw message boxes and content boxes.
 
+tabulate = timed("render")(_tabulate)  # Same function, timed when profiling.
+
 def _prompt_int(label: str, min_value: int = None, max_value: int = None) -> int:
     while True:
         s = prompt_center(label).strip()
@@ -39,8 +43,49 @@ def _prompt_float(label: str, min_value: float = None, max_value: float = None)
 from carrental.utils.validators import prompt_date  # Helper to safely read dates from the keyboard.
 from carrental.services.inventory_service import InventoryService  # Car store service.
 from carrental.services.rental_service import RentalService  # Booking service.
+from carrental.storage.archive import BookingArchiver  # Moves old bookings to the archive table.
+from carrental.storage.bulk import CarFilter, FieldChange, FIELDS, NUMERIC  # Bulk car update specs.
+from carrental.storage.audit import AuditLog  # Who changed what.
+from carrental.storage.repositories import ConflictError  # Someone else saved first.
 
 # --- Helper: render large tables with simple paging ---
+def _render_paged_query(fetch, total: int, headers, title, page_size: int = 10, intro=None):
+    """Like _render_paged_table, but fetch(offset, limit) loads one page at a time from the database."""
+    if total == 0:
+        print(boxed((intro or []) + ["(no data)"], title=title))
+        return
+    pages = (total + page_size - 1) // page_size  # ceil
+    page = 0
+    while True:
+        view = fetch(page * page_size, page_size)  # Only this page's rows leave SQLite.
+        page_title = f"{title} (page {page+1}/{pages})" if pages > 1 else title
+        print(boxed((intro or []) + [tabulate(view, headers=headers, tablefmt="github")], title=page_title))
+        if pages == 1:
+            break
+        cmd = prompt_center("Press N-next, P-prev, or Enter to continue: ").strip().lower()
+        if cmd in ("n", "next"):
+            if page + 1 < pages:
+                page += 1
+            else:
+                break
+        elif cmd in ("p", "prev"):
+            if page > 0:
+                page -= 1
+        else:
+            break
+
+def _prompt_date_range():  # Optional from/to filter; blank = open-ended.
+    def ask(label):
+        while True:
+            s = prompt_center(label).strip()
+            if not s:
+                return None
+            try:
+                return date.fromisoformat(s).isoformat()
+            except ValueError:
+                print(box_text("Use YYYY-MM-DD or leave blank."))
+    return ask("From date YYYY-MM-DD (blank = any): "), ask("To date YYYY-MM-DD (blank = any): ")
+
 def _render_paged_table(rows, headers, title, page_size: int = 10):
     """Render rows in pages. Controls: [N]ext, [P]rev, [Q]uit/Enter."""
     total = len(rows)
@@ -336,7 +381,15 @@ class UpdateCarCommand:
         if avail_str in ("y","yes"): available = True
         elif avail_str in ("n","no"): available = False
         else: available = None
-        ok = self.inv.update_car(cid, make=make, model=model, year=year, mileage=mileage, daily_rate=daily_rate, min_days=min_days, max_days=max_days, available=available)
+        try:  # Only saves if nobody changed the car while we were typing.
+            ok = self.inv.update_car(cid, make=make, model=model, year=year, mileage=mileage, daily_rate=daily_rate, min_days=min_days, max_days=max_days, available=available,
+                                     expected_version=car.get("version"))
+        except ConflictError as ex:
+            now = ex.current
+            print(box_text(f"Another admin changed this car while you were editing. Nothing was saved.\n"
+                           f"Now: {now['make']} {now['model']} ({now['year']}), {now['mileage']} km, ${now['daily_rate']:.2f}/day, "
+                           f"{'available' if now['available'] else 'unavailable'}. Please try again."))
+            prompt_center("Press Enter…"); return True
         print(box_text("Car updated." if ok else "Nothing changed or car not found.")); prompt_center("Press Enter…"); return True
 
 class DeleteCarCommand:  # Removes a car.
@@ -367,7 +420,7 @@ class DeleteCarCommand:  # Removes a car.
             prompt_center("Press Enter…")
             return True
         ok = self.inv.delete_car(cid)
-        print(box_text("Car deleted." if ok else "Car not found."))
+        print(box_text("Car deleted." if ok else "This car has bookings and cannot be deleted. Mark it unavailable instead."))  # It existed a moment ago.
         prompt_center("Press Enter…")
         return True
 
@@ -397,6 +450,16 @@ class MakeBookingCommand:  # Lets a customer book a car.
             total, details = self.rent.quote(car_id, start, end)
         except Exception as ex:
             print(box_text(f"Cannot quote: {ex}"))
+            alts = self.rent.alternatives(car_id, start, end) if "not available" in str(ex) else []  # Offer similar free cars.
+            if alts:
+                rows = [[c["id"], c["make"], c["model"], c["year"], c["vehicle_type"], f'{c["daily_rate"]:.2f}'] for c in alts]
+                print(boxed([tabulate(rows, headers=["ID","Make","Model","Year","Type","Daily Rate"], tablefmt="github")], title="Similar cars free for these dates"))
+            prompt_center("Press Enter…")
+            return True
+        try:  # Keep the car and dates for us while the customer reads the summary.
+            token = self.rent.hold(car_id, start, end)
+        except ValueError as ex:
+            print(box_text(f"Cannot book: {ex}"))
             prompt_center("Press Enter…")
             return True
         # Lookup car for a nicer title
@@ -413,16 +476,18 @@ class MakeBookingCommand:  # Lets a customer book a car.
             f"Total days: {days_total} (weekdays: {weekdays}, weekends: {weekends})",
             f"Daily rate: ${daily_rate:.2f} | Weekend x{weekend_mult}",
             f"Estimated total: ${total:.2f}",
+            f"Held for you for {int(self.rent.hold_ttl // 60)} minutes.",
             "",
             "Confirm booking? Type yes or no"
         ]
         print(boxed(summary_lines, title=f"Booking Summary – {car_title}"))
         confirm = prompt_center("yes / no: ").strip().lower()
         if confirm not in ("y", "yes"):
+            self.rent.release_hold(token)  # Let the next customer have it straight away.
             print(box_text("Booking cancelled."))
             prompt_center("Press Enter…")
             return True
-        ok, message = self.rent.make_booking(car_id=car_id, start_date=start, end_date=end)  # Uses current user id set in service
+        ok, message = self.rent.make_booking(car_id=car_id, start_date=start, end_date=end, hold_token=token)  # Uses current user id set in service
         print(box_text(message))
         prompt_center("Press Enter…")
         return True
@@ -432,8 +497,11 @@ class MyBookingsCommand:  # Shows bookings of the current user.
     def __init__(self, rent: RentalService):  # Needs rental service.
         self.rent = rent  # Save it.
     def execute(self) -> bool:  # When chosen...
-        rows, headers = self.rent.my_bookings_table()  # Ask the service for rows+headers to print.
-        print(boxed([tabulate(rows, headers=headers, tablefmt="github")], title="My Bookings"))  # Show the table.
+        totals = self.rent.my_booking_totals(include_archive=True)  # Summed by the database; same rows as the pages below.
+        intro = [f"Bookings: {totals['bookings']} | Spent to date: ${totals['spent']:.2f} | Upcoming: {totals['upcoming']}", ""]
+        headers = self.rent.my_bookings_table(limit=0)[1]
+        _render_paged_query(lambda off, lim: self.rent.my_bookings_table(limit=lim, offset=off, include_archive=True)[0],
+                            totals["bookings"], headers, "My Bookings", intro=intro)  # Car names come from the same query.
         prompt_center("Press Enter…")  # Pause.
         return True  # Keep menu.
 
@@ -457,11 +525,140 @@ class ApproveBookingsCommand:  # Admin action to approve or reject.
             return True  # Keep menu.
         decision = prompt_center("Approve (a) or Reject (r)? ").strip().lower()  # Ask decision.
         status = "APPROVED" if decision.startswith("a") else "REJECTED"  # Turn letter into the full word.
-        self.rent.set_booking_status(bid, status)  # Tell the service to update the booking.
+        shown = next((b for b in pend if b["id"] == bid), None)  # The version we looked at (None = not in the list).
+        try:
+            self.rent.set_booking_status(bid, status, expected_version=shown and shown.get("version"))  # Tell the service to update the booking.
+        except ConflictError as ex:  # Another admin (or the expiry job) got there first.
+            print(box_text(f"Booking {bid} was changed meanwhile (now {ex.current['status']}). Nothing was saved."))
+            prompt_center("Press Enter…")
+            return True
         print(box_text(f"Booking {bid} set to {status}."))  # Confirm.
         prompt_center("Press Enter…")  # Pause.
         return True  # Keep menu.
 
+class BookingHistoryCommand:  # Admin view of every booking, including archived ones.
+    label = "Booking History"  # Menu label.
+    def __init__(self, rent: RentalService):  # Needs rental service.
+        self.rent = rent  # Save it.
+    def execute(self) -> bool:  # When chosen...
+        date_from, date_to = _prompt_date_range()  # Optional date filter.
+        totals = self.rent.booking_totals(date_from=date_from, date_to=date_to)  # Live + archive, counted in SQL.
+        headers = self.rent.booking_history_table(limit=0)[1]
+        intro = [f"Bookings: {totals['bookings']} | Revenue to date: ${totals['spent']:.2f} | Upcoming: {totals['upcoming']}", ""]
+        _render_paged_query(lambda off, lim: self.rent.booking_history_table(limit=lim, offset=off, date_from=date_from, date_to=date_to)[0],
+                            totals["bookings"], headers, "Booking History", intro=intro)  # One joined query per page.
+        prompt_center("Press Enter…")  # Pause.
+        return True  # Keep menu.
+
+class FleetHeatmapCommand:  # Admin view of fleet occupancy over the coming days.
+    label = "Fleet Occupancy"  # Menu label.
+    def __init__(self, rent: RentalService):  # Needs rental service.
+        self.rent = rent  # Save it.
+    def execute(self) -> bool:  # When chosen...
+        ds = prompt_center("Days to show (blank = 90): ").strip()  # How far ahead to look.
+        try:
+            days = int(ds) if ds else 90
+        except ValueError:
+            days = 90
+        days = max(1, min(days, 366))  # Keep it sensible.
+        rows, headers = self.rent.fleet_heatmap_table(days=days)  # One query for all bookings.
+        _render_paged_table(rows, headers=headers, title="Fleet Occupancy (░ some ▒ half ▓ most █ full)")  # Show it.
+        prompt_center("Press Enter…")  # Pause.
+        return True  # Keep menu.
+
+class ArchiveBookingsCommand:  # Admin action that moves old bookings to the archive table.
+    label = "Archive Old Bookings"  # Menu label.
+    def __init__(self, archiver: BookingArchiver):  # Needs the archiver job.
+        self.archiver = archiver  # Save it.
+    def execute(self) -> bool:  # When chosen...
+        months = _prompt_int("Archive bookings that ended more than N months ago, N = ", 1)  # Ask for the age.
+        count = self.archiver.pending_count(months)  # Dry run first.
+        if not count:  # Nothing to do.
+            print(box_text("No bookings old enough to archive."))
+            prompt_center("Press Enter…")
+            return True
+        confirm = prompt_center(f"Archive {count} booking(s)? yes / no: ").strip().lower()  # Make sure.
+        if confirm not in ("y", "yes"):
+            print(box_text("Archive cancelled."))
+            prompt_center("Press Enter…")
+            return True
+        moved = self.archiver.run(months)  # Runs in small batches.
+        print(box_text(f"Archived {moved} booking(s)."))  # Report.
+        prompt_center("Press Enter…")  # Pause.
+        return True  # Keep menu.
+
+def _prompt_optional(label: str, cast):  # Blank = None; bad input asks again.
+    while True:
+        s = prompt_center(label).strip()
+        if not s:
+            return None
+        try:
+            return cast(s)
+        except ValueError:
+            print(box_text("Invalid value, try again (blank = any)."))
+
+class BulkUpdateCarsCommand:  # Admin action: change many cars with one statement.
+    label = "Bulk Update Cars"  # Menu label.
+    def __init__(self, inv: InventoryService):  # Needs inventory service.
+        self.inv = inv  # Save it.
+    def execute(self) -> bool:  # When chosen...
+        print(box_text("Choose which cars to change (blank = any)."))
+        flt = CarFilter(
+            make=_prompt_optional("Make: ", str),
+            vehicle_type=_prompt_optional("Vehicle type: ", str),
+            year_min=_prompt_optional("Year from: ", int),
+            year_max=_prompt_optional("Year to: ", int),
+            rate_min=_prompt_optional("Daily rate from: ", float),
+            rate_max=_prompt_optional("Daily rate to: ", float),
+        )
+        field = prompt_center(f"Field to change ({', '.join(FIELDS)}): ").strip().lower()
+        if field not in FIELDS:
+            print(box_text("Unknown field.")); prompt_center("Press Enter…"); return True
+        op = "set"
+        if field in NUMERIC:  # Numbers can also be scaled or shifted.
+            op = prompt_center("Operation: mul (e.g. 1.05 = +5%), add, set: ").strip().lower()
+        raw = prompt_center("Value: ").strip()
+        try:
+            if field == "available":
+                value = raw.lower() in ("1", "y", "yes", "true")
+            elif field in NUMERIC:
+                value = float(raw) if op == "mul" or field == "daily_rate" else int(raw)
+            else:
+                value = raw
+            change = FieldChange(field, op, value)  # Validates the op.
+        except ValueError as ex:
+            print(box_text(f"Invalid change: {ex}")); prompt_center("Press Enter…"); return True
+        count = self.inv.bulk_update(flt, [change], dry_run=True)  # Preview first.
+        if not count:
+            print(box_text("No cars match those filters.")); prompt_center("Press Enter…"); return True
+        confirm = prompt_center(f"Apply '{field} {op} {value}' to {count} car(s)? yes / no: ").strip().lower()  # Make sure.
+        if confirm not in ("y", "yes"):
+            print(box_text("Bulk update cancelled.")); prompt_center("Press Enter…"); return True
+        changed = self.inv.bulk_update(flt, [change])  # One UPDATE for all of them.
+        print(box_text(f"Updated {changed} car(s)."))  # Report.
+        prompt_center("Press Enter…")  # Pause.
+        return True  # Keep menu.
+
+class AuditLogCommand:  # Admin view of recent admin changes.
+    label = "Audit Log"  # Menu label.
+    def __init__(self, audit: AuditLog):  # Needs the audit log.
+        self.audit = audit  # Save it.
+    def execute(self) -> bool:  # When chosen...
+        entity = _prompt_optional("Entity (car / booking / user, blank = all): ", str)
+        actor = _prompt_optional("Changed by (email, blank = anyone): ", str)
+        rows = self.audit.query(entity=entity, actor=actor, limit=200)  # Newest first.
+        table = [[r["ts"], r["actor"] or "-", r["action"], f"{r['entity']} {r['entity_id'] or ''}".strip(),
+                  _brief(r["before"]), _brief(r["after"])] for r in rows]
+        _render_paged_table(table, headers=["When (UTC)", "Who", "Action", "What", "Before", "After"], title="Audit Log")
+        prompt_center("Press Enter…")  # Pause.
+        return True  # Keep menu.
+
+def _brief(values, width: int = 40) -> str:  # {"status": "APPROVED"} -> "status=APPROVED", cut to width.
+    if not values:
+        return ""
+    text = ", ".join(f"{k}={v}" for k, v in values.items()) if isinstance(values, dict) else str(values)
+    return text if len(text) <= width else text[:width - 1] + "…"
+
 
 
 class ManageAdminsCommand:
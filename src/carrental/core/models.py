@@ -40,4 +40,4 @@ class Booking(Entity):  # Inherits id too.
     start_date: str = ""  # The first day of the booking (YYYY-MM-DD).
     end_date: str = ""  # The last day of the booking (YYYY-MM-DD).
     total_price: float = 0.0  # How much the whole booking costs.
-    status: str = "PENDING"  # Can be PENDING, APPROVED, or REJECTED.
+    status: str = "PENDING"  # PENDING, APPROVED, REJECTED, EXPIRED (never reviewed) or COMPLETED (trip over).
@@ -0,0 +1,218 @@
+# ==============================================================================
+# Rule-based pricing engine backed by a precomputed rate calendar.
+# Every step tells you plainly what it does.
+#   - DESIGN PATTERN: Strategy (plugs into PricingStrategy used by RentalService)
+# ==============================================================================
+
+"""Dynamic pricing: season, holiday, demand and weekday rules compiled into a day calendar."""  # Quotes become two array lookups.
+
+from __future__ import annotations  # Modern type hints.
+import threading  # A lock so a recompile never races with a quote.
+from array import array  # Compact arrays of numbers (one slot per day).
+from collections import OrderedDict  # LRU order for memoized quotes.
+from dataclasses import dataclass  # Small immutable rule objects.
+from datetime import date, datetime, timedelta  # For date math.
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Protocol, Tuple  # Type names.
+
+class PricingRule(Protocol):  # Every rule can paint its multiplier onto a calendar.
+    def paint(self, mults: array, first: date) -> None: ...  # Multiply the days it covers (mults[0] is "first").
+
+def _ordinal(value: str | date) -> int:  # Turn "YYYY-MM-DD" (or a date) into a day number.
+    if isinstance(value, date):  # Already a date...
+        return value.toordinal()  # ...use it directly.
+    return datetime.fromisoformat(value).date().toordinal()  # Parse text first.
+
+def _paint_range(mults: array, first: date, start_ord: int, end_ord: int, multiplier: float) -> None:  # Multiply an inclusive day range.
+    base = first.toordinal()  # Day number stored in slot 0.
+    lo = max(start_ord - base, 0)  # Clip to the calendar window.
+    hi = min(end_ord - base, len(mults) - 1)  # Inclusive end, clipped too.
+    for i in range(lo, hi + 1):  # Walk only the days this rule touches.
+        mults[i] *= multiplier  # Rules stack by multiplying.
+
+@dataclass(frozen=True)  # Weekday based surcharge, e.g. weekends cost 20% more.
+class WeekdayRule:
+    weekdays: Tuple[int, ...] = (5, 6)  # 0 = Monday ... 5 = Saturday, 6 = Sunday.
+    multiplier: float = 1.2  # Factor applied on those weekdays.
+    def paint(self, mults: array, first: date) -> None:
+        offset = first.weekday()  # Weekday of slot 0.
+        for wd in self.weekdays:  # For each weekday we care about...
+            for i in range((wd - offset) % 7, len(mults), 7):  # ...jump straight to every matching day.
+                mults[i] *= self.multiplier
+
+@dataclass(frozen=True)  # A season that repeats every year, e.g. summer from 12-01 to 02-28.
+class SeasonRule:
+    start_md: Tuple[int, int]  # (month, day) the season starts.
+    end_md: Tuple[int, int]  # (month, day) the season ends (inclusive); may wrap over New Year.
+    multiplier: float = 1.0  # Factor applied during the season.
+    def paint(self, mults: array, first: date) -> None:
+        last = first + timedelta(days=len(mults) - 1)  # Last day of the calendar.
+        for year in range(first.year - 1, last.year + 1):  # Each season instance that can touch the window.
+            start = _safe_date(year, *self.start_md)
+            end_year = year + 1 if self.end_md < self.start_md else year  # Wraps into next year?
+            end = _safe_date(end_year, *self.end_md)
+            _paint_range(mults, first, start.toordinal(), end.toordinal(), self.multiplier)
+
+@dataclass(frozen=True)  # One-off holidays like "2025-12-25".
+class HolidayRule:
+    days: Tuple[str, ...]  # ISO dates.
+    multiplier: float = 1.5  # Factor applied on each holiday.
+    def paint(self, mults: array, first: date) -> None:
+        for d in self.days:
+            o = _ordinal(d)
+            _paint_range(mults, first, o, o, self.multiplier)
+
+@dataclass(frozen=True)  # Demand-based factor for a date range (events, promotions, low season discounts).
+class DemandRule:
+    start: str  # First day (YYYY-MM-DD).
+    end: str  # Last day (YYYY-MM-DD), inclusive.
+    multiplier: float = 1.0  # > 1 for high demand, < 1 for discounts.
+    def paint(self, mults: array, first: date) -> None:
+        _paint_range(mults, first, _ordinal(self.start), _ordinal(self.end), self.multiplier)
+
+def _safe_date(year: int, month: int, day: int) -> date:  # date() that turns Feb 29 into Feb 28 on non-leap years.
+    try:
+        return date(year, month, day)
+    except ValueError:
+        return date(year, month, day - 1)
+
+class RateCalendarStrategy:  # A PricingStrategy that answers quotes with prefix sums.
+    """Compiles rules into a per-day multiplier calendar; each quote is O(1)."""  # Human description.
+    def __init__(self, rules: Optional[Iterable[PricingRule]] = None, *, first_day: Optional[str] = None, horizon_days: int = 3 * 366,
+                 max_horizon_days: int = 10 * 366) -> None:
+        self._lock = threading.Lock()  # Guards the compiled arrays.
+        self._rules: List[PricingRule] = list(rules) if rules is not None else [WeekdayRule()]  # Default = weekend surcharge.
+        start = datetime.fromisoformat(first_day).date() if first_day else date.today() - timedelta(days=366)  # Window start.
+        self._first = start  # Date stored in slot 0.
+        self._days = horizon_days  # How many days the calendar covers.
+        self._max_days = max(horizon_days, max_horizon_days)  # The window never grows past this; farther quotes are priced on the fly.
+        self._version = 0  # Bumped on every rule change (memoization key).
+        self._compile()  # Build the calendar now so the first quote is fast.
+
+    # --- rule management (each change recompiles once) ---
+    @property
+    def rules(self) -> Tuple[PricingRule, ...]:  # Read-only view of the rules.
+        return tuple(self._rules)
+    def set_rules(self, rules: Iterable[PricingRule]) -> None:  # Replace every rule.
+        with self._lock:
+            self._rules = list(rules)
+            self._compile_locked()
+            self._version += 1
+    def add_rule(self, rule: PricingRule) -> None:  # Add one rule on top.
+        with self._lock:
+            self._rules.append(rule)
+            self._compile_locked()
+            self._version += 1
+    def params(self) -> tuple:  # Prices only change with the rules (growing the window does not).
+        return ("rate-calendar", self._version)
+
+    def _compile(self) -> None:
+        with self._lock:
+            self._compile_locked()
+    def _compile_locked(self) -> None:
+        self._calendar = self._build(self._first, self._days)  # Swap in the new calendar in one go.
+    def _build(self, first: date, n: int) -> tuple:  # Multipliers plus prefix sums for n days from first.
+        mults = array("d", [1.0]) * n  # Every day starts at x1.0.
+        for rule in self._rules:  # Let every rule paint its days.
+            rule.paint(mults, first)
+        prefix = array("d", [0.0]) * (n + 1)  # prefix[i] = sum of mults[0:i].
+        weekends = array("l", [0]) * (n + 1)  # weekends[i] = weekend days in [0:i].
+        offset = first.weekday()
+        run, wk = 0.0, 0
+        for i in range(n):
+            run += mults[i]
+            if (offset + i) % 7 >= 5:
+                wk += 1
+            prefix[i + 1] = run
+            weekends[i + 1] = wk
+        weekend_multiplier = 1.0  # Summary value the CLI shows ("Weekend x1.2").
+        for rule in self._rules:
+            if isinstance(rule, WeekdayRule) and set(rule.weekdays) >= {5, 6}:
+                weekend_multiplier *= rule.multiplier
+        return (first.toordinal(), mults, prefix, weekends, weekend_multiplier)
+
+    def _covering(self, s: int, e: int) -> tuple:  # Return a calendar that covers [s, e], growing the window up to _max_days.
+        cal = self._calendar  # Snapshot; a recompile swaps in a new tuple, never edits this one.
+        if s >= cal[0] and e < cal[0] + len(cal[1]):  # Already inside; nothing to do.
+            return cal
+        with self._lock:
+            base = self._first.toordinal()
+            new_base = min(base, s)
+            new_end = max(base + self._days, e + 1)
+            if new_end - new_base > self._max_days:  # E.g. a quote for year 9999: price it from a throwaway calendar.
+                return self._build(date.fromordinal(s), e - s + 1)
+            if new_base != base or new_end != base + self._days:
+                self._first = date.fromordinal(new_base)
+                self._days = new_end - new_base
+                self._compile_locked()
+            return self._calendar
+
+    def multiplier_for(self, day: str) -> float:  # Handy for admin screens and tests.
+        o = _ordinal(day)
+        base, mults, _, _, _ = self._covering(o, o)
+        return mults[o - base]
+
+    def quote(self, daily_rate: float, start: str, end: str) -> tuple[float, Dict[str, float]]:  # Same shape as WeekendMultiplierStrategy.
+        s = _ordinal(start)  # Start day number.
+        e = _ordinal(end)  # End day number.
+        if e < s:  # Same rule as the weekend strategy.
+            raise ValueError("End date must be on or after start date")
+        base, _, prefix, weekends, weekend_multiplier = self._covering(s, e)  # Read one consistent calendar.
+        lo, hi = s - base, e - base + 1  # Half-open slice [lo, hi).
+        factor = prefix[hi] - prefix[lo]  # Sum of multipliers across the rental.
+        days = e - s + 1  # Inclusive day count.
+        weekend_days = weekends[hi] - weekends[lo]
+        details = {  # Same keys as the weekend strategy so the CLI keeps working.
+            "weekday_days": float(days - weekend_days),
+            "weekend_days": float(weekend_days),
+            "daily_rate": float(daily_rate),
+            "weekend_multiplier": float(weekend_multiplier),
+            "average_multiplier": round(factor / days, 4),
+        }
+        return round(daily_rate * factor, 2), details  # Total rounded to cents.
+
+class MemoizingPricingStrategy:  # Wraps any PricingStrategy with a bounded LRU of recent quotes.
+    """Remembers (daily_rate, start, end, strategy params) -> quote; a reconfigured strategy starts a fresh cache."""  # Human description.
+    def __init__(self, inner: Any, *, max_entries: int = 4096) -> None:
+        self.inner = inner  # The strategy doing the real work.
+        self.max_entries = max_entries
+        self._cache: "OrderedDict[Tuple, Tuple[float, Dict[str, float]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._generation = 0  # Key part for strategies without params(); bumped by invalidate().
+        self._last_params: Hashable = None
+        self.hits = 0
+        self.misses = 0
+
+    def _params(self) -> Hashable:  # What the inner strategy's prices depend on right now.
+        params = getattr(self.inner, "params", None)
+        return params() if params is not None else self._generation
+
+    def invalidate(self) -> None:  # Call after changing a strategy that has no params().
+        with self._lock:
+            self._cache.clear()
+            self._generation += 1
+
+    def quote(self, daily_rate: float, start: str, end: str) -> tuple[float, Dict[str, float]]:
+        params = self._params()
+        key = (daily_rate, start, end, params)
+        with self._lock:
+            if params != self._last_params:  # Strategy was reconfigured: old prices are useless.
+                self._cache.clear()
+                self._last_params = params
+            hit = self._cache.get(key)
+            if hit is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return hit[0], dict(hit[1])  # Copy: callers add keys to details.
+            self.misses += 1
+        total, details = self.inner.quote(daily_rate, start, end)  # Errors (end < start) are not cached.
+        with self._lock:
+            self._cache[key] = (total, dict(details))
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)  # Least recently used goes first.
+        return total, details
+
+    def stats(self) -> Dict[str, float]:  # For --profile reports and tuning max_entries.
+        with self._lock:
+            calls = self.hits + self.misses
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._cache),
+                    "hit_rate": round(self.hits / calls, 4) if calls else 0.0}
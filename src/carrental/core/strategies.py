@@ -17,6 +17,8 @@ class WeekendMultiplierStrategy:  # A concrete pricing strategy.
     """Applies a higher multiplier on Saturday and Sunday."""  # Human description.
     def __init__(self, weekend_multiplier: float = 1.2) -> None:  # Set up with a default multiplier.
         self.weekend_multiplier = weekend_multiplier  # Save the multiplier.
+    def params(self) -> tuple:  # Everything that changes the price (memoization key; see MemoizingPricingStrategy).
+        return (self.weekend_multiplier,)
     def quote(self, daily_rate: float, start: str, end: str) -> tuple[float, Dict[str, float]]:  # Work out the total price.
         s = datetime.fromisoformat(start)  # Turn start text into a real date.
         e = datetime.fromisoformat(end)  # Turn end text into a real date.
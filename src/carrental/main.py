@@ -7,6 +7,8 @@
 """Command-Line Interface (CLI) for the Car Rental System."""  # This file wires together menus and services so a user can use the app.
 
 from __future__ import annotations  # Allows modern type hint syntax on Python 3.10.
+import argparse  # Command-line flags.
+from contextlib import ExitStack  # Stops everything main() started when it returns.
 import getpass  # Lets us type passwords without showing them on screen.
 from typing import Dict  # "Dict" is a type so we can describe menu shapes like Dict[str, Command].
 
@@ -20,12 +22,19 @@ from carrental.cli.commands import (  # Menu command objects live here.
     ShowCarsCommand,  # Shows a list of cars.
     AddCarCommand, UpdateCarCommand, DeleteCarCommand,  # Admin actions for car records.
     MakeBookingCommand, MyBookingsCommand, ApproveBookingsCommand  # Booking things.
-, CreateCarCommand)
+, CreateCarCommand, BookingHistoryCommand, ArchiveBookingsCommand, FleetHeatmapCommand, BulkUpdateCarsCommand, AuditLogCommand)
 # Import services that hold the brains/data of the app.
 from carrental.services.auth_service import AuthService
 from carrental.storage.db import Database  # Handles login and who you are.
 from carrental.services.inventory_service import InventoryService  # Handles the cars we can rent.
 from carrental.services.rental_service import RentalService  # Handles bookings and prices.
+from carrental.storage.archive import BookingArchiver  # Moves old bookings out of the live table.
+from carrental.storage.audit import AuditLog  # Background-written trail of admin changes.
+from carrental.storage.snapshot import SnapshotDatabase, SnapshotRefresher  # Read-only copy for reports.
+from carrental.services.scheduler import Scheduler, schedule_booking_maintenance, schedule_hold_sweeper  # Background housekeeping.
+from carrental.utils.profiling import PROFILER, profile_service  # Optional --profile timers.
+from carrental.utils.metrics import METRICS  # Counters/latency in Prometheus text format.
+from carrental.utils.session import SessionRecorder  # --record-session for replayable load tests.
 
 def run_menu(title: str, menu: Dict[str, Command], prompt_text: str = "Select an option") -> bool:  # Shows a menu and runs the chosen action.
     clear()  # Clean the screen so the menu looks fresh.
@@ -38,14 +47,72 @@ def run_menu(title: str, menu: Dict[str, Command], prompt_text: str = "Select an
         print(box_text("That is not on the menu. Try again."))  # Tell them nicely in a box.
         input("Press Enter...")  # Wait so they can read the message.
         return True  # Return True to keep the menu loop going.
-    return action.execute()  # If we have a valid command, do it and return its True/False (keep/leave).
+    with PROFILER.command(action.label):  # Times the command when --profile is on.
+        return action.execute()  # If we have a valid command, do it and return its True/False (keep/leave).
 
-def main() -> None:  # This starts the whole application.
+def _parse_args(argv=None) -> argparse.Namespace:  # Optional flags; the app runs fine without any.
+    ap = argparse.ArgumentParser(prog="carrental", description="Fred's Car Rental (CLI)")
+    ap.add_argument("--profile", action="store_true", help="Time every command and service call; write a report at exit.")
+    ap.add_argument("--profile-stacks", action="store_true", help="Also capture cProfile stacks per command (implies --profile).")
+    ap.add_argument("--profile-out", default="carrental_profile.txt", help="Where to write the profile report.")
+    ap.add_argument("--report-snapshot", type=float, default=None, metavar="SECONDS",
+                    help="Serve admin reports from a read-only snapshot refreshed every SECONDS.")
+    ap.add_argument("--pending-hold", type=float, default=48.0, metavar="HOURS",
+                    help="Expire PENDING bookings no admin reviewed within HOURS.")
+    ap.add_argument("--maintenance-interval", type=float, default=60.0, metavar="SECONDS",
+                    help="How often to expire/complete bookings in the background (0 = never).")
+    ap.add_argument("--metrics-file", default=None, metavar="PATH",
+                    help="Write Prometheus-format metrics to PATH every 15 seconds and at exit.")
+    ap.add_argument("--metrics-port", type=int, default=None, metavar="PORT",
+                    help="Serve Prometheus-format metrics on http://127.0.0.1:PORT/metrics.")
+    ap.add_argument("--db", default=None, metavar="PATH", help="Database file (default: carrental.db next to the code).")
+    ap.add_argument("--record-session", default=None, metavar="PATH",
+                    help="Record every answer (with think time) to PATH for tools/session_replay.py.")
+    ap.add_argument("--record-secrets", action="store_true", help="Also record passwords (otherwise they are written as null).")
+    args, _ = ap.parse_known_args(argv)
+    return args
+
+def main(argv=None) -> None:  # This starts the whole application.
+    args = _parse_args(argv)  # Read optional flags like --profile.
+    with ExitStack() as stack:  # Background threads, servers and reports end with main(), also after Exit (SystemExit) or a crash,
+        _run(args, stack)       # so a replayed session (utils/session.py) leaves nothing running behind it.
+
+def _run(args: argparse.Namespace, stack: ExitStack) -> None:  # Wire the services, then run the menus; stack.callback() = "undo at the end".
     # Create the services that hold our data and logic.
-    db = Database.instance()  # Get (or create) database
-    auth = AuthService(db)
-    inventory = InventoryService(db)
-    rent = RentalService(db)
+    db = Database(args.db) if args.db else Database.instance()  # Get (or create) database
+    if args.record_session:  # Capture this operator's workload.
+        stack.callback(SessionRecorder(args.record_session, keep_secrets=args.record_secrets).start().stop)
+    audit = AuditLog(db, register_atexit=False)  # Closed (flushed) when main() ends, so no entry is lost on a normal quit.
+    stack.callback(audit.close)  # Registered early, so it runs after the scheduler and refresher stop (last-in, first-out).
+    auth = AuthService(db, audit=audit)
+    inventory = InventoryService(db, audit=audit)
+    rent = RentalService(db, audit=audit)
+    if args.profile or args.profile_stacks:  # Profiling mode: time commands + service calls, report at exit.
+        PROFILER.enable(stacks=args.profile_stacks)
+        for svc in (auth, inventory, rent):
+            profile_service(svc)
+        stack.callback(PROFILER.write_report, args.profile_out)
+    archiver = BookingArchiver(db)  # Admin-triggered archival job.
+    scheduler = Scheduler()
+    schedule_hold_sweeper(scheduler, db)  # Drop expired booking holds.
+    if args.maintenance_interval > 0:  # Expire forgotten requests and close finished trips while the app runs.
+        schedule_booking_maintenance(scheduler, db, hold_hours=args.pending_hold, interval=args.maintenance_interval)
+    if args.metrics_file:  # Textfile export (e.g. node_exporter's textfile collector).
+        scheduler.every(15.0, lambda: METRICS.write(args.metrics_file), name="metrics-file")
+        stack.callback(METRICS.write, args.metrics_file)  # Runs after scheduler.stop (last-in, first-out).
+    if args.metrics_port:  # Live scrape endpoint.
+        server = METRICS.serve(args.metrics_port)
+        stack.callback(server.server_close)
+        stack.callback(server.shutdown)  # Stop serving first, then release the port.
+    scheduler.start()
+    stack.callback(scheduler.stop)
+    reports = rent  # History/heatmap read the live DB by default...
+    if args.report_snapshot:  # ...or a snapshot, so long scans never hold up bookings.
+        snapshot = SnapshotDatabase(db)
+        reports = RentalService(snapshot)
+        refresher = SnapshotRefresher(snapshot, args.report_snapshot).start()
+        stack.callback(snapshot.close)
+        stack.callback(refresher.stop)  # Runs first (last-in, first-out).
   # Booking logic that also talks to cars.
 
     # Build the top-level (home) menu that appears first.
@@ -68,13 +135,16 @@ def main() -> None:  # This starts the whole application.
             pwd = prompt_center_hidden("Password: ").strip()
             while not pwd:
                 pwd = prompt_center_hidden("Password (cannot be blank): ").strip()
-            if not auth.login(email=email, password=pwd):  # Try to log in; if it fails...
+            with PROFILER.command("Login"):  # Home-screen actions are timed like menu commands.
+                ok = auth.login(email=email, password=pwd)
+            if not ok:  # Try to log in; if it fails...
                 print(box_text("Login failed. Please try again."))  # Say it didn't work.
                 input("Press Enter...")  # Pause so they can read the message.
                 continue  # Go back to the start of the loop to try again.
             # If login worked, choose which role menu to show.
             role = auth.current_user_role()
             rent.set_current_user_id(auth.current_user_id())  # tell rental who is logged in  # Find out if user is 'admin' or 'customer'.
+            audit.set_actor(email)  # Audit entries from this session name this user.
             # Build role-specific menus.
             if role == "admin":  # For admins we give car management and approvals.
                 from carrental.cli.commands import AddCarCommand as _ACC, UpdateCarCommand as _UCC
@@ -86,6 +156,11 @@ def main() -> None:  # This starts the whole application.
                     "3": UpdateCarCommand(inventory),  # Edit a car's details.
                     "4": DeleteCarCommand(inventory),  # Remove a car from stock.
                     "5": ApproveBookingsCommand(rent),  # Approve or reject booking requests.
+                    "6": BookingHistoryCommand(reports),  # Every booking, archived ones included.
+                    "7": ArchiveBookingsCommand(archiver),  # Move old bookings to the archive.
+                    "8": FleetHeatmapCommand(reports),  # Occupancy heatmap for every car.
+                    "9": BulkUpdateCarsCommand(inventory),  # Change many cars in one go.
+                    "10": AuditLogCommand(audit),  # Who changed what, and when.
                     "0": LogoutCommand(),  # Leave admin area and go back to login screen.
                 }  # End of admin menu.
                 # Keep showing the admin menu until the user logs out.
@@ -105,6 +180,7 @@ def main() -> None:  # This starts the whole application.
             # When we get here the user chose Logout; end the session.
             auth.logout()  # Forget who is logged in.
             rent.set_current_user_id(None)  # clear
+            audit.set_actor(None)
             print(box_text("You have been logged out."))  # Tell them what happened.
             input("Press Enter...")  # Pause so they can read the message.
         elif sel == "2":  # If they picked Register...
@@ -117,7 +193,8 @@ def main() -> None:  # This starts the whole application.
             pwd = prompt_center_hidden("Password: ").strip()
             while not pwd:
                 pwd = prompt_center_hidden("Password (cannot be blank): ").strip()  # Ask for a password (not shown).
-            ok = auth.register(email=email, password=pwd, name=name, role="customer")  # Try to create the account.
+            with PROFILER.command("Register"):
+                ok = auth.register(email=email, password=pwd, name=name, role="customer")  # Try to create the account.
             msg = "Registration successful." if ok else "Registration failed (email already exists)."  # Pick a friendly message.
             print(box_text(msg))  # Show the message in a box.
             input("Press Enter...")  # Pause so they can read.
@@ -0,0 +1,123 @@
+# ==============================================================================
+# "Similar cars" index used when the requested car is taken.
+# Every step tells you plainly what it does.
+#   - DESIGN PATTERN: Observer (the index listens to car add/update/delete)
+# ==============================================================================
+
+"""Car similarity index: nearest free alternatives by make/model/type/year/rate."""  # Suggestions in milliseconds.
+
+from __future__ import annotations  # Modern hints.
+import heapq, threading  # Top-N selection and a lock for the shared index.
+from bisect import insort  # Keep neighbour lists sorted.
+from datetime import date  # For rental length.
+from typing import Dict, Iterable, List, Optional, Set, Tuple  # Type names.
+
+Features = Tuple[str, str, str, int, float]  # (make, model, vehicle_type, year, daily_rate).
+
+def car_features(car: Dict) -> Features:  # The fields similarity looks at.
+    return (str(car["make"]).lower(), str(car["model"]).lower(), str(car["vehicle_type"]).lower(), int(car["year"]), float(car["daily_rate"]))
+
+def distance(a: Features, b: Features) -> float:  # Smaller = more alike.
+    d = 0.0
+    d += 0.0 if a[2] == b[2] else 1.5  # Different vehicle type matters most.
+    d += 0.0 if a[0] == b[0] else 1.0  # Then the brand...
+    d += 0.0 if a[1] == b[1] else 0.5  # ...then the exact model.
+    d += abs(a[3] - b[3]) / 5.0  # Five years apart costs as much as a different brand.
+    d += abs(a[4] - b[4]) / max(a[4], 1.0)  # Relative price gap.
+    return d
+
+class SimilarityIndex:  # Keeps each car's nearest neighbours, built on demand and patched on every change.
+    """Per-car neighbour lists kept fresh through CarRepository change events."""  # Human description.
+    def __init__(self, cars, *, neighbours: int = 32) -> None:
+        self.cars = cars  # Car repository (SQLite or in-memory).
+        self.size = neighbours  # How many neighbours each list keeps.
+        self._lock = threading.RLock()
+        self._features: Dict[int, Features] = {}  # car id -> features.
+        self._cars: Dict[int, Dict] = {}  # car id -> latest row (for availability and min/max days).
+        self._lists: Dict[int, List[Tuple[float, int]]] = {}  # car id -> sorted (distance, other id); built lazily.
+        self._partial: Set[int] = set()  # Lists that lost entries: still the true nearest, but the next ones are unknown.
+        self.refresh()  # One full read at start-up.
+        cars.subscribe(self._on_change)  # Then stay current incrementally.
+
+    def refresh(self) -> None:  # Reload every car (cheap: no pairwise work until someone asks).
+        rows = self.cars.list(only_available=False)
+        with self._lock:
+            self._cars = {r["id"]: r for r in rows}
+            self._features = {cid: car_features(r) for cid, r in self._cars.items()}
+            self._lists.clear()
+            self._partial.clear()
+
+    # --- incremental maintenance ---
+    def _on_change(self, event: str, car_id: Optional[int]) -> None:
+        if car_id is None:  # Bulk change without ids: start over.
+            self.refresh()
+            return
+        row = None if event == "delete" else self.cars.get(car_id)
+        with self._lock:
+            if row is None:
+                self._remove(car_id)
+                return
+            old = self._features.get(car_id)
+            self._cars[car_id] = row
+            new = car_features(row)
+            if old == new:  # Only availability/mileage/min-max changed: neighbours stay the same.
+                return
+            if old is not None:
+                self._remove(car_id)
+            self._cars[car_id] = row
+            self._features[car_id] = new
+            for other, lst in self._lists.items():  # Offer the car to every built list.
+                d = distance(self._features[other], new)
+                if (lst and d < lst[-1][0]) or (len(lst) < self.size and other not in self._partial):  # Short lists only take any car while they hold the whole fleet.
+                    insort(lst, (d, car_id))
+                    del lst[self.size:]
+
+    def _remove(self, car_id: int) -> None:  # Forget a car everywhere.
+        self._features.pop(car_id, None)
+        self._cars.pop(car_id, None)
+        self._lists.pop(car_id, None)
+        self._partial.discard(car_id)
+        for other in list(self._lists):
+            lst = self._lists[other]
+            kept = [p for p in lst if p[1] != car_id]
+            if len(kept) != len(lst):
+                if len(kept) < self.size // 2:  # Too thin now; rebuild next time it is asked for.
+                    del self._lists[other]
+                    self._partial.discard(other)
+                else:
+                    self._lists[other] = kept
+                    if len(lst) == self.size:  # A full list may have had cars beyond its end; a short one held everything.
+                        self._partial.add(other)
+
+    # --- queries ---
+    def _scan(self, car_id: int, feats: Features, limit: Optional[int]) -> List[Tuple[float, int]]:  # Full pass over the fleet.
+        pairs = ((distance(feats, f), cid) for cid, f in self._features.items() if cid != car_id)
+        return sorted(pairs) if limit is None else heapq.nsmallest(limit, pairs)
+
+    def neighbours(self, car_id: int) -> List[Tuple[float, int]]:  # Nearest cars first.
+        with self._lock:
+            lst = self._lists.get(car_id)
+            if lst is None or car_id in self._partial:  # Missing, or its tail is unknown since a removal: rescan.
+                self._partial.discard(car_id)
+                feats = self._features.get(car_id)
+                if feats is None:
+                    return []
+                lst = self._lists[car_id] = self._scan(car_id, feats, self.size)
+            return list(lst)
+
+    def similar_free(self, car_id: int, start: str, end: str, busy: Iterable[int], k: int = 3) -> List[Dict]:
+        """Top-k cars like car_id that are available and not busy in [start, end]."""
+        days = (date.fromisoformat(end) - date.fromisoformat(start)).days + 1
+        busy_ids: Set[int] = set(busy)
+        def usable(cid: int) -> bool:
+            car = self._cars.get(cid)
+            return (car is not None and car.get("available") and cid not in busy_ids
+                    and int(car.get("min_days", 1)) <= days <= int(car.get("max_days", 30)))
+        picks = [(d, cid) for d, cid in self.neighbours(car_id) if usable(cid)][:k]
+        if len(picks) < k:  # Neighbour list exhausted: fall back to a full scan.
+            with self._lock:
+                feats = self._features.get(car_id)
+                if feats is not None:
+                    picks = [(d, cid) for d, cid in self._scan(car_id, feats, None) if usable(cid)][:k]
+        with self._lock:
+            return [dict(self._cars[cid], distance=round(d, 3)) for d, cid in picks if cid in self._cars]
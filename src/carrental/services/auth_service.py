@@ -7,19 +7,28 @@
 """Authentication service: register, login, and session info."""  # The UI talks to this class instead of touching the database directly.
 
 from __future__ import annotations  # Modern type hints.
-from typing import Optional, Dict  # We will return dictionaries of user info.
+from typing import Optional, Dict, Union  # We will return dictionaries of user info.
 from carrental.storage.db import Database  # The database connection (Singleton).
-from carrental.storage.repositories import UserRepository  # CRUD for users.
+from carrental.storage.backends import StorageBackend, as_backend  # SQLite or in-memory storage.
+from carrental.utils.metrics import METRICS  # Login/registration counters.
+from carrental.storage.audit import AuditLog  # Optional admin audit trail.
+
+_LOGINS = METRICS.counter("carrental_logins_total", "Login attempts.", ("result",))
+_REGISTRATIONS = METRICS.counter("carrental_registrations_total", "Account registrations.", ("result",))
 
 class AuthService:  # Handles who is logged in and how to check passwords.
-    def __init__(self, db: Database) -> None:  # Build the service.
-        self.users = UserRepository(db)  # Keep a user repository handy.
+    def __init__(self, db: Union[Database, StorageBackend], audit: Optional[AuditLog] = None) -> None:  # Build the service.
+        self.users = as_backend(db).users  # Keep a user repository handy.
+        self.audit = audit  # Records admin-account changes when given.
         self._current_user: Optional[Dict] = None  # Store the logged-in user dictionary or None when no one is logged in.
     def register(self, email: str, password: str, name: str, role: str = "customer") -> bool:  # Create a new account.
-        return self.users.create(email=email, password=password, name=name, role=role)  # Ask the repo to insert the user.
+        ok = self.users.create(email=email, password=password, name=name, role=role)  # Ask the repo to insert the user.
+        _REGISTRATIONS.inc(result="ok" if ok else "failed")
+        return ok
     def login(self, email: str, password: str) -> bool:  # Try to log in with email+password.
         user = self.users.verify(email=email, password=password)  # Repo returns user dict if the password matches.
         self._current_user = user  # Remember who is logged in (or None if failed).
+        _LOGINS.inc(result="ok" if user else "failed")
         return bool(user)  # True if we have a user, False if not.
     def logout(self) -> None:  # Forget the session.
         self._current_user = None  # Nobody is logged in now.
@@ -32,23 +41,31 @@ class AuthService:  # Handles who is logged in and how to check passwords.
 
 
     # --- Admin management convenience wrappers ---
+    def _audited(self, ok: bool, action: str, key, before=None, after=None) -> bool:  # Record successful changes only.
+        if ok and self.audit:
+            self.audit.record(action, "user", key, before=before, after=after)
+        return ok
+
     def list_admins(self):
         return self.users.list_admins()
 
     def add_admin(self, email: str, password: str, name: str) -> bool:
-        return self.users.create(email=email, password=password, name=name, role="admin")
+        ok = self.users.create(email=email, password=password, name=name, role="admin")
+        return self._audited(ok, "admin.add", email, after={"email": email, "name": name, "role": "admin"})
 
     def delete_admin_by_email(self, email: str) -> bool:
-        return self.users.delete_by_email(email)
+        return self._audited(self.users.delete_by_email(email), "admin.delete", email)
 
     def delete_admin_by_id(self, user_id: int) -> bool:
-        return self.users.delete_by_id(user_id)
+        return self._audited(self.users.delete_by_id(user_id), "admin.delete", user_id)
 
     def change_admin_password(self, email: str, new_password: str) -> bool:
-        return self.users.set_password(email, new_password)
+        return self._audited(self.users.set_password(email, new_password), "admin.password", email)  # Never log the password itself.
 
     def change_admin_email(self, old_email: str, new_email: str) -> bool:
-        return self.users.set_email(old_email, new_email)
+        return self._audited(self.users.set_email(old_email, new_email), "admin.email", old_email, {"email": old_email}, {"email": new_email})
 
     def change_admin_name(self, email: str, new_name: str) -> bool:
-        return self.users.set_name(email, new_name)
+        before = self.users.get_by_email(email) if self.audit else None
+        ok = self.users.set_name(email, new_name)
+        return self._audited(ok, "admin.name", email, {"name": before and before["name"]}, {"name": new_name})
@@ -7,27 +7,61 @@
 """Inventory service for cars."""  # Keeps car logic tidy and away from SQL details.
 
 from __future__ import annotations  # Modern hints.
-from typing import List, Dict, Optional  # Type names.
+from dataclasses import asdict  # Filter/changes as plain dicts for the audit entry.
+from typing import Iterable, List, Dict, Optional, Union  # Type names.
 from carrental.storage.db import Database  # DB singleton.
-from carrental.storage.repositories import CarRepository  # Where SQL lives.
+from carrental.storage.backends import StorageBackend, as_backend  # Where SQL (or the in-memory engine) lives.
+from carrental.storage.bulk import CarFilter, FieldChange, parse_changes  # Bulk update specs.
 from carrental.core.factories import CarFactory  # Builds clean Car objects.
+from carrental.storage.audit import AuditLog  # Optional admin audit trail.
+from carrental.utils.metrics import METRICS  # Car change counters.
+
+_CAR_CHANGES = METRICS.counter("carrental_car_changes_total", "Successful car writes by operation.", ("op",))
+
+def _counted(op: str, ok: bool) -> bool:  # Count successful writes, pass the result through.
+    if ok:
+        _CAR_CHANGES.inc(op=op)
+    return ok
 
 class InventoryService:  # High-level API for car operations.
-    def __init__(self, db: Database) -> None:  # Build the service.
-        self.car_repo = CarRepository(db)  # Keep a repo for DB operations.
+    def __init__(self, db: Union[Database, StorageBackend], audit: Optional[AuditLog] = None) -> None:  # Build the service.
+        self.car_repo = as_backend(db).cars  # Keep a repo for DB operations.
         self.factory = CarFactory()  # Build car objects consistently.
+        self.audit = audit  # Records admin changes when given.
     def list_cars(self, only_available: bool = True) -> List[Dict]:  # Read all cars.
         return self.car_repo.list(only_available=only_available)  # Ask the repo.
     def add_car(self, make: str, model: str, year: int, mileage: int, daily_rate: float, min_days: int, max_days: int) -> bool:  # Create a car.
         car = self.factory.create(make, model, year, mileage, daily_rate, min_days, max_days)  # Build a Car object.
-        return self.car_repo.add(car.make, car.model, car.year, car.mileage, car.daily_rate, car.available, car.min_days, car.max_days, car.vehicle_type)  # Save it.
-    def update_car(self, car_id: int, *, available: Optional[bool] = None,  make: Optional[str] = None, model: Optional[str] = None, year: Optional[int] = None, mileage: Optional[int] = None, daily_rate: Optional[float] = None, min_days: Optional[int] = None, max_days: Optional[int] = None) -> bool:  # Edit a car.
-        return self.car_repo.update(car_id, available=available,  make=make, model=model, year=year, mileage=mileage, daily_rate=daily_rate, min_days=min_days, max_days=max_days)  # Ask repo to update changed fields.
+        ok = _counted("add", self.car_repo.add(car.make, car.model, car.year, car.mileage, car.daily_rate, car.available, car.min_days, car.max_days, car.vehicle_type))  # Save it.
+        if ok and self.audit:
+            self.audit.record("car.add", "car", after={"make": car.make, "model": car.model, "year": car.year, "mileage": car.mileage,
+                                                      "daily_rate": car.daily_rate, "min_days": car.min_days, "max_days": car.max_days})
+        return ok
+    def update_car(self, car_id: int, *, available: Optional[bool] = None,  make: Optional[str] = None, model: Optional[str] = None, year: Optional[int] = None, mileage: Optional[int] = None, daily_rate: Optional[float] = None, min_days: Optional[int] = None, max_days: Optional[int] = None,
+                   expected_version: Optional[int] = None) -> bool:  # Edit a car; expected_version = the "version" you read (ConflictError if it moved on).
+        before = self.car_repo.get(car_id) if self.audit else None  # Snapshot for the audit trail.
+        ok = _counted("update", self.car_repo.update(car_id, available=available,  make=make, model=model, year=year, mileage=mileage, daily_rate=daily_rate, min_days=min_days, max_days=max_days,
+                                                     expected_version=expected_version))  # Ask repo to update changed fields.
+        if ok and self.audit:
+            self.audit.record("car.update", "car", car_id, before=before, after=self.car_repo.get(car_id))
+        return ok
     def delete_car(self, car_id: int) -> bool:  # Remove a car.
-        return self.car_repo.delete(car_id)  # Ask repo.
+        before = self.car_repo.get(car_id) if self.audit else None
+        ok = _counted("delete", self.car_repo.delete(car_id))  # Ask repo.
+        if ok and self.audit:
+            self.audit.record("car.delete", "car", car_id, before=before)
+        return ok
     def toggle_availability(self, car_id: int) -> None:  # Flip availability.
         self.car_repo.toggle_availability(car_id)  # Ask repo.
     def set_availability(self, car_id: int, available: bool) -> None:  # Force availability.
         self.car_repo.set_availability(car_id, available)  # Ask repo.
     def get(self, car_id: int) -> Optional[Dict]:  # Read a single car.
         return self.car_repo.get(car_id)  # Ask repo.
+    def bulk_update(self, flt: CarFilter, changes: Iterable[Union[FieldChange, tuple]], *, dry_run: bool = False) -> int:  # Change many cars at once.
+        changes = parse_changes(changes)  # FieldChange list (validated once, reusable for the audit entry).
+        n = self.car_repo.bulk_update(flt, changes, dry_run=dry_run)  # How many cars match (dry run) or changed.
+        if not dry_run:
+            _CAR_CHANGES.inc(n, op="bulk")
+            if self.audit:  # One entry for the whole statement: filter, changes and how many cars it hit.
+                self.audit.record("car.bulk_update", "car", after={"filter": asdict(flt), "changes": [asdict(c) for c in changes], "cars": n})
+        return n
@@ -0,0 +1,118 @@
+# ==============================================================================
+# Async payment pipeline: non-blocking charges with limits, timeouts and retries.
+# Every step tells you plainly what it does.
+#   - DESIGN PATTERN: Strategy (any AsyncPaymentGateway can be plugged in)
+# ==============================================================================
+
+"""Asyncio payment pipeline plus a local fake gateway for tests and load runs."""  # Slow gateways no longer hold up the booking path.
+
+from __future__ import annotations  # Modern hints.
+import asyncio  # Event loop, semaphores, timeouts.
+import json  # The gateway speaks one JSON object per line.
+import random  # Jitter for backoff and fake failures.
+from dataclasses import dataclass  # Small result object.
+from typing import Dict, Optional, Protocol  # Type names.
+
+class AsyncPaymentGateway(Protocol):  # Anything that can charge money without blocking the loop.
+    async def charge(self, amount: float, idempotency_key: str) -> bool: ...  # True if the money was taken.
+
+@dataclass
+class PaymentResult:  # What the pipeline reports back for one payment.
+    ok: bool  # Did the charge succeed?
+    idempotency_key: str  # Key used for every attempt.
+    attempts: int  # How many tries it took.
+    error: str = ""  # Last error text when ok is False.
+
+class PaymentPipeline:  # Wraps a gateway with a concurrency limit, per-call timeout and retry with backoff.
+    """Bounded, retrying, idempotent payment calls."""  # Human description.
+    def __init__(self, gateway: AsyncPaymentGateway, *, concurrency: int = 8, timeout: float = 2.0, retries: int = 3, backoff: float = 0.1) -> None:
+        self.gateway = gateway  # Who actually charges.
+        self.concurrency = concurrency  # Max calls in flight at once.
+        self.timeout = timeout  # Seconds allowed per attempt.
+        self.retries = retries  # Extra attempts after the first one.
+        self.backoff = backoff  # First wait between attempts (doubles each time).
+        self._sem: Optional[asyncio.Semaphore] = None  # Made lazily inside the running loop.
+
+    def _semaphore(self) -> asyncio.Semaphore:
+        if self._sem is None:
+            self._sem = asyncio.Semaphore(self.concurrency)
+        return self._sem
+
+    async def pay(self, amount: float, idempotency_key: str) -> PaymentResult:  # Charge once, retrying safely with the same key.
+        error = ""
+        for attempt in range(1, self.retries + 2):  # First try + retries.
+            try:
+                async with self._semaphore():  # Wait for a free slot.
+                    ok = await asyncio.wait_for(self.gateway.charge(amount, idempotency_key), self.timeout)
+                return PaymentResult(ok, idempotency_key, attempt, "" if ok else "declined")  # A decline is final.
+            except asyncio.TimeoutError:
+                error = "timeout"
+            except (ConnectionError, OSError) as ex:
+                error = f"connection error: {ex}"
+            if attempt <= self.retries:  # Sleep before the next try (outside the semaphore).
+                delay = self.backoff * (2 ** (attempt - 1))
+                await asyncio.sleep(delay + random.uniform(0, delay / 2))  # Jitter spreads out retries.
+        return PaymentResult(False, idempotency_key, self.retries + 1, error)
+
+class JsonLineGatewayClient:  # Talks to a gateway over TCP, one JSON request/response per connection.
+    """AsyncPaymentGateway client for the fake gateway (and anything speaking the same protocol)."""  # Human description.
+    def __init__(self, host: str, port: int) -> None:
+        self.host = host
+        self.port = port
+    async def charge(self, amount: float, idempotency_key: str) -> bool:
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            writer.write((json.dumps({"amount": amount, "key": idempotency_key}) + "\n").encode("utf-8"))
+            await writer.drain()
+            line = await reader.readline()
+            if not line:
+                raise ConnectionError("gateway closed the connection")
+            return bool(json.loads(line).get("ok"))
+        finally:
+            writer.close()
+
+class FakeGatewayServer:  # A local gateway that adds latency and can fail on purpose.
+    """Asyncio TCP server that remembers idempotency keys so retries never double-charge."""  # Human description.
+    def __init__(self, *, latency: float = 0.05, jitter: float = 0.0, decline_rate: float = 0.0, seed: Optional[int] = None) -> None:
+        self.latency = latency  # Seconds added to every request.
+        self.jitter = jitter  # Extra random delay (0..jitter).
+        self.decline_rate = decline_rate  # Share of new charges that are declined.
+        self.results: Dict[str, bool] = {}  # idempotency key -> first answer given.
+        self.charges = 0  # Real (non-repeated) charges taken.
+        self.in_flight = 0  # Requests being handled right now.
+        self.peak_in_flight = 0  # Highest in_flight seen (checks the concurrency limit).
+        self._rnd = random.Random(seed)
+        self._server: Optional[asyncio.AbstractServer] = None
+        self.host, self.port = "127.0.0.1", 0
+
+    async def start(self) -> "FakeGatewayServer":  # Listen on a free local port.
+        self._server = await asyncio.start_server(self._handle, self.host, 0)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    def client(self) -> JsonLineGatewayClient:  # Ready-made client pointing at this server.
+        return JsonLineGatewayClient(self.host, self.port)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            req = json.loads(await reader.readline())
+            await asyncio.sleep(self.latency + self._rnd.uniform(0, self.jitter))  # Pretend the bank is slow.
+            key = req["key"]
+            if key not in self.results:  # New payment: decide once and remember.
+                ok = self._rnd.random() >= self.decline_rate
+                self.results[key] = ok
+                self.charges += 1 if ok else 0
+            writer.write((json.dumps({"ok": self.results[key]}) + "\n").encode("utf-8"))
+            await writer.drain()
+        except (ConnectionError, json.JSONDecodeError):
+            pass  # Client went away or sent junk; nothing to answer.
+        finally:
+            self.in_flight -= 1
+            writer.close()
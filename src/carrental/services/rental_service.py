@@ -7,26 +7,63 @@
 """Rental service: quotes, bookings, and approvals."""
 
 from __future__ import annotations
-from typing import Dict, List, Optional, Tuple
+import asyncio, sqlite3, uuid
+from datetime import date, datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple, Union
 from carrental.storage.db import Database
-from carrental.storage.repositories import BookingRepository, CarRepository
-from carrental.core.strategies import WeekendMultiplierStrategy, PaymentStrategy, CashPayment
+from carrental.storage.backends import StorageBackend, as_backend
+from carrental.core.availability import AvailabilityMatrix, build_matrix, heat_line, PENDING, BOOKED
+from carrental.core.strategies import WeekendMultiplierStrategy, PricingStrategy, PaymentStrategy, CashPayment
+from carrental.core.pricing import MemoizingPricingStrategy
+from carrental.services.payment_pipeline import PaymentPipeline
+from carrental.services.alternatives import SimilarityIndex
+from carrental.storage.group_commit import GroupCommitWriter
+from carrental.utils.metrics import METRICS
+from carrental.storage.audit import AuditLog
+
+_QUOTES = METRICS.counter("carrental_quotes_total", "Quotes by result.", ("result",))
+_BOOKINGS = METRICS.counter("carrental_bookings_total", "Booking attempts by result.", ("result",))
+_HOLDS = METRICS.counter("carrental_holds_total", "Hold attempts by result.", ("result",))
+_DECISIONS = METRICS.counter("carrental_booking_decisions_total", "Booking status changes made by admins.", ("status",))
 
 class RentalService:
-    def __init__(self, db: Database, pricing: Optional[WeekendMultiplierStrategy] = None) -> None:
-        self.bookings = BookingRepository(db)  # bookings repo
-        self.cars = CarRepository(db)          # cars repo
-        self.pricing = pricing or WeekendMultiplierStrategy()
+    def __init__(self, db: Union[Database, StorageBackend], pricing: Optional[PricingStrategy] = None, booking_writer: Optional[GroupCommitWriter] = None,
+                 hold_ttl: float = 600.0, audit: Optional[AuditLog] = None) -> None:
+        store = as_backend(db)                 # SQLite (Database) or e.g. MemoryBackend
+        self.bookings = store.bookings         # bookings repo
+        self.cars = store.cars                 # cars repo
+        self.holds = store.holds               # short-lived reservations while a customer confirms
+        self.hold_ttl = hold_ttl               # seconds a hold lasts
+        self.audit = audit                     # records admin decisions when given
+        self.booking_writer = booking_writer   # optional group-commit writer for burst load
+        self._similar: Optional[SimilarityIndex] = None  # built on first alternatives() call
+        self.pricing = pricing or MemoizingPricingStrategy(WeekendMultiplierStrategy())  # Any PricingStrategy works (e.g. RateCalendarStrategy).
         self._current_user_id: Optional[int] = None  # set by UI after login
 
     # Allow UI to set/clear the current user id (used by commands)
     def set_current_user_id(self, user_id: Optional[int]) -> None:
         self._current_user_id = user_id
 
-    def quote(self, car_id: int, start: str, end: str) -> Tuple[float, Dict[str, float]]:  # Calculate cost for a date range.
+    @staticmethod
+    def _now(offset: float = 0.0) -> str:  # UTC stamp in the same text format as created_at/expires_at.
+        return (datetime.now(timezone.utc) + timedelta(seconds=offset)).isoformat(timespec="seconds")
+
+    def quote(self, car_id: int, start: str, end: str, *, user_id: Optional[int] = None) -> Tuple[float, Dict[str, float]]:  # Calculate cost for a date range.
+        try:
+            result = self._quote(car_id, start, end, user_id)
+        except ValueError:
+            _QUOTES.inc(result="rejected")
+            raise
+        _QUOTES.inc(result="ok")
+        return result
+
+    def _quote(self, car_id: int, start: str, end: str, user_id: Optional[int]) -> Tuple[float, Dict[str, float]]:
         car = self.cars.get(car_id)  # Read the car from DB.
         if not car or not car.get("available", 0):  # If no car or not available...
             raise ValueError("Car is not available")  # Tell the caller.
+        uid = user_id if user_id is not None else self._current_user_id  # Our own hold never blocks us.
+        if self.holds.live(start, end, self._now(), car_id=car_id, exclude_user=uid):  # Someone else is confirming these dates.
+            raise ValueError("Car is not available for these dates (another customer is booking it)")
         total, details = self.pricing.quote(car["daily_rate"], start, end)  # Use the pricing strategy.
         # Enforce car-specific min/max rental days.
         days_total = int(details.get("weekday_days", 0) + details.get("weekend_days", 0))
@@ -39,42 +76,165 @@ class RentalService:
         details["days_total"] = float(days_total)  # add for summaries
         return total, details
 
-    def make_booking(self, *, user_id: Optional[int] = None, car_id: int, start_date: str, end_date: str, payment: Optional[PaymentStrategy] = None) -> tuple[bool, str]:
+    def alternatives(self, car_id: int, start: str, end: str, k: int = 3) -> List[Dict]:
+        """Up to k free cars most like car_id for the same dates (nearest first)."""
+        if self._similar is None:
+            self._similar = SimilarityIndex(self.cars)
+        busy = {b["car_id"] for b in self.bookings.overlapping(start, end)}  # One query for every clash.
+        busy.update(h["car_id"] for h in self.holds.live(start, end, self._now(), exclude_user=self._current_user_id))  # Held by others.
+        return self._similar.similar_free(car_id, start, end, busy, k)
+
+    def hold(self, car_id: int, start: str, end: str, *, user_id: Optional[int] = None) -> str:
+        """Reserve car + dates for hold_ttl seconds; returns the token make_booking(hold_token=...) consumes."""
+        uid = user_id if user_id is not None else self._current_user_id
+        if uid is None:
+            raise ValueError("No logged-in user.")
+        self.quote(car_id, start, end, user_id=uid)  # Same checks as a quote (availability, min/max days).
+        token = uuid.uuid4().hex
+        if not self.holds.place(token, uid, car_id, start, end, self._now(self.hold_ttl), self._now()):
+            _HOLDS.inc(result="conflict")
+            raise ValueError("Car is not available for these dates")  # Booked or held by someone else.
+        _HOLDS.inc(result="ok")
+        return token
+
+    def release_hold(self, token: str) -> None:  # Customer changed their mind: free the dates now.
+        self.holds.release(token)
+
+    def sweep_holds(self, *, batch_size: int = 500) -> int:  # Delete expired holds (they are already ignored).
+        return self.holds.sweep(self._now(), batch_size=batch_size)
+
+    def make_booking(self, *, user_id: Optional[int] = None, car_id: int, start_date: str, end_date: str, payment: Optional[PaymentStrategy] = None,
+                     hold_token: Optional[str] = None) -> tuple[bool, str]:
+        ok, message = self._make_booking(user_id, car_id, start_date, end_date, payment, hold_token)
+        _BOOKINGS.inc(result="placed" if ok else "failed")
+        return ok, message
+
+    def _make_booking(self, user_id: Optional[int], car_id: int, start_date: str, end_date: str, payment: Optional[PaymentStrategy],
+                      hold_token: Optional[str]) -> tuple[bool, str]:
         uid = user_id if user_id is not None else self._current_user_id
         if uid is None:
             return False, "No logged-in user."
+        if hold_token is not None:  # The hold must be ours, for this car and these dates, and still live.
+            held = self.holds.get(hold_token)
+            if not held or (held["user_id"], held["car_id"], held["start_date"], held["end_date"]) != (uid, car_id, start_date, end_date):
+                return False, "Cannot book: the hold does not match this booking."
+            if held["expires_at"] <= self._now():
+                self.holds.release(hold_token)
+                return False, "Cannot book: your hold expired. Please try again."
         try:
-            price, _ = self.quote(car_id, start_date, end_date)
+            price, _ = self.quote(car_id, start_date, end_date, user_id=uid)
         except Exception as ex:
             return False, f"Cannot book: {ex}"
         strategy = payment or CashPayment()
         if not strategy.pay(price):
             return False, "Payment failed."
-        ok = self.bookings.create(uid, car_id, start_date, end_date, price)
+        writer = self.booking_writer or self.bookings
+        ok = writer.create(uid, car_id, start_date, end_date, price)
+        if ok and hold_token is not None:
+            self.holds.release(hold_token)  # The booking itself now blocks the dates.
         return (True, "Booking placed. Awaiting approval.") if ok else (False, "Could not save booking.")
 
-    def my_bookings_table(self, user_id: Optional[int] = None) -> tuple[List[List[str]], List[str]]:
+    async def make_booking_async(self, *, user_id: Optional[int] = None, car_id: int, start_date: str, end_date: str, pipeline: PaymentPipeline, idempotency_key: Optional[str] = None) -> tuple[bool, str]:
+        """Like make_booking, but the payment is awaited through the async pipeline.
+
+        Passing the same idempotency_key again (e.g. a client retry) never charges
+        twice and never creates a second booking.
+        """
+        ok, message = await self._make_booking_async(user_id, car_id, start_date, end_date, pipeline, idempotency_key)
+        _BOOKINGS.inc(result="placed" if ok else "failed")  # Every outcome counted, as in make_booking.
+        return ok, message
+
+    async def _make_booking_async(self, user_id: Optional[int], car_id: int, start_date: str, end_date: str, pipeline: PaymentPipeline,
+                                  idempotency_key: Optional[str]) -> tuple[bool, str]:
         uid = user_id if user_id is not None else self._current_user_id
-        items = self.bookings.list(user_id=uid)
+        if uid is None:
+            return False, "No logged-in user."
+        key = idempotency_key or uuid.uuid4().hex
+        if await asyncio.to_thread(self.bookings.get_by_payment_key, key):  # This payment already produced a booking.
+            return True, "Booking placed. Awaiting approval."
+        try:  # SQLite calls run off the loop so other bookings keep moving.
+            price, _ = await asyncio.to_thread(self.quote, car_id, start_date, end_date, user_id=uid)
+        except Exception as ex:
+            return False, f"Cannot book: {ex}"
+        token = uuid.uuid4().hex  # Reserve the dates before taking money, so the insert cannot lose them to someone else.
+        if not await asyncio.to_thread(self.holds.place, token, uid, car_id, start_date, end_date, self._now(self.hold_ttl), self._now()):
+            if await asyncio.to_thread(self.bookings.get_by_payment_key, key):  # A concurrent retry with the same key got there first.
+                return True, "Booking placed. Awaiting approval."
+            return False, "Cannot book: Car is not available for these dates"
+        try:
+            result = await pipeline.pay(price, key)
+            if not result.ok:
+                return False, f"Payment failed ({result.error})."
+            if self.booking_writer is not None:  # Await the batch without blocking the loop, so concurrent bookings share a commit.
+                try:
+                    await asyncio.wrap_future(self.booking_writer.submit(uid, car_id, start_date, end_date, price, payment_key=key))
+                    ok = True
+                except sqlite3.IntegrityError:
+                    ok = False
+            else:
+                ok = await asyncio.to_thread(self.bookings.create, uid, car_id, start_date, end_date, price, payment_key=key)
+            if not ok and await asyncio.to_thread(self.bookings.get_by_payment_key, key):  # A concurrent retry with the same key won the insert.
+                ok = True
+        finally:
+            await asyncio.to_thread(self.holds.release, token)  # The booking (or nothing) blocks the dates from here on.
+        return (True, "Booking placed. Awaiting approval.") if ok else (False, "Could not save booking.")
+
+    def booking_history(self, user_id: Optional[int] = None, *, status: Optional[str] = None, date_from: Optional[str] = None, date_to: Optional[str] = None,
+                        limit: Optional[int] = None, offset: int = 0, include_archive: bool = False) -> List[Dict]:
+        """Bookings joined with car and customer fields in one query (newest start first)."""
+        return self.bookings.history(user_id=user_id, status=status, date_from=date_from, date_to=date_to,
+                                     limit=limit, offset=offset, include_archive=include_archive)
+
+    def booking_totals(self, user_id: Optional[int] = None, *, date_from: Optional[str] = None, date_to: Optional[str] = None,
+                       today: Optional[str] = None, include_archive: bool = True) -> Dict:
+        """{"bookings": n, "spent": approved money for trips already started, "upcoming": future pending/approved}."""
+        return self.bookings.totals(user_id=user_id, date_from=date_from, date_to=date_to, today=today, include_archive=include_archive)
+
+    def my_booking_totals(self, user_id: Optional[int] = None, *, include_archive: bool = True) -> Dict:  # Totals for the logged-in customer.
+        uid = user_id if user_id is not None else self._current_user_id
+        return self.booking_totals(uid if uid is not None else -1, include_archive=include_archive)  # No user: nothing to count.
+
+    @staticmethod
+    def _car_label(b: Dict) -> str:  # "Toyota Yaris" or a marker for a car that was deleted.
+        return f'{b["make"]} {b["model"]}' if b.get("make") else f'(removed #{b["car_id"]})'
+
+    def my_bookings_table(self, user_id: Optional[int] = None, *, limit: Optional[int] = None, offset: int = 0,
+                          date_from: Optional[str] = None, date_to: Optional[str] = None, include_archive: bool = True) -> tuple[List[List[str]], List[str]]:
+        """Rows+headers for the customer's own bookings; include_archive must match my_booking_totals() when paging."""
+        uid = user_id if user_id is not None else self._current_user_id
+        items = self.booking_history(uid, date_from=date_from, date_to=date_to, limit=limit, offset=offset, include_archive=include_archive)
         headers = ["ID","Car","Start","End","Total","Status"]
-        rows = [[b["id"], b["car_id"], b["start_date"], b["end_date"], f'{b["total_price"]:.2f}', b["status"]] for b in items]
+        rows = [[b["id"], self._car_label(b), b["start_date"], b["end_date"], f'{b["total_price"]:.2f}', b["status"]] for b in items]
         return rows, headers
 
     def pending_bookings(self) -> List[Dict]:
         return self.bookings.list(status="PENDING")
 
     def pending_bookings_table(self) -> tuple[List[List[str]], List[str]]:
-        items = self.pending_bookings()
-        headers = ["ID","User","Car","Start","End","Total"]
-        rows = [[b["id"], b["user_id"], b["car_id"], b["start_date"], b["end_date"], f'{b["total_price"]:.2f}'] for b in items]
+        items = self.booking_history(status="PENDING")
+        headers = ["ID","Customer","Car","Start","End","Total"]
+        rows = [[b["id"], b["user_name"] or f'#{b["user_id"]}', self._car_label(b), b["start_date"], b["end_date"], f'{b["total_price"]:.2f}'] for b in items]
+        return rows, headers
+
+    def booking_history_table(self, user_id: Optional[int] = None, *, limit: Optional[int] = None, offset: int = 0,
+                              date_from: Optional[str] = None, date_to: Optional[str] = None) -> tuple[List[List[str]], List[str]]:
+        """Rows+headers for live and archived bookings (admin history view)."""
+        items = self.booking_history(user_id, date_from=date_from, date_to=date_to, limit=limit, offset=offset, include_archive=True)
+        headers = ["ID","Customer","Car","Start","End","Total","Status"]
+        rows = [[b["id"], b["user_name"] or f'#{b["user_id"]}', self._car_label(b), b["start_date"], b["end_date"], f'{b["total_price"]:.2f}', b["status"]] for b in items]
         return rows, headers
 
-    def set_booking_status(self, booking_id: int, status: str) -> None:
-        self.bookings.set_status(booking_id, status)
+    def set_booking_status(self, booking_id: int, status: str, *, expected_version: Optional[int] = None) -> None:
+        """expected_version: the booking's "version" when it was shown; raises ConflictError if someone decided first."""
+        before = self.bookings.get(booking_id) if self.audit else None
+        self.bookings.set_status(booking_id, status, expected_version=expected_version)
+        _DECISIONS.inc(status=status)
+        if self.audit:
+            self.audit.record("booking.status", "booking", booking_id, before={"status": before and before["status"]}, after={"status": status})
         if status == "APPROVED":
             bk = self.bookings.get(booking_id)
-            if bk:
-                self.cars.set_availability(bk["car_id"], False)
+            if bk:  # The trip's end only gives the car back if nobody has changed it since this.
+                self.bookings.set_car_version(booking_id, self.cars.set_availability(bk["car_id"], False))
 
     def available_cars_table(self) -> tuple[list[list[str]], list[str]]:
         """Return rows+headers for currently available cars."""
@@ -82,3 +242,20 @@ class RentalService:
         headers = ["ID","Make","Model","Year","Mileage","Daily Rate"]
         rows = [[c["id"], c["make"], c["model"], c["year"], c["mileage"], f'{c["daily_rate"]:.2f}'] for c in items]
         return rows, headers
+
+    def availability_matrix(self, start: Optional[str] = None, days: int = 90, cars: Optional[List[Dict]] = None) -> AvailabilityMatrix:
+        """Cars x days occupancy grid built from a single bookings query."""
+        first = date.fromisoformat(start) if start else date.today()
+        last = first + timedelta(days=days - 1)
+        car_ids = [c["id"] for c in (cars if cars is not None else self.cars.list(only_available=False))]
+        items = self.bookings.overlapping(first.isoformat(), last.isoformat())
+        intervals = ((b["car_id"], b["start_date"], b["end_date"], BOOKED if b["status"] == "APPROVED" else PENDING) for b in items)
+        return build_matrix(car_ids, intervals, first, days)
+
+    def fleet_heatmap_table(self, days: int = 90, width: int = 45) -> tuple[List[List[str]], List[str]]:
+        """Rows+headers with one compact heat strip per car (darker = more booked)."""
+        cars = self.cars.list(only_available=False)
+        matrix = self.availability_matrix(days=days, cars=cars)
+        headers = ["ID","Car","Busy",f"Next {days} days"]
+        rows = [[c["id"], f'{c["make"]} {c["model"]}', f"{matrix.busy_days(i)}/{days}", heat_line(matrix.row(i), width)] for i, c in enumerate(cars)]
+        return rows, headers
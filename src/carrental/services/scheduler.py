@@ -0,0 +1,123 @@
+# ==============================================================================
+# Tiny in-process job scheduler (one background thread, jobs kept in a heap).
+# Every step tells you plainly what it does.
+
+# ==============================================================================
+
+"""Heap-based scheduler for periodic housekeeping jobs, plus the booking maintenance and hold-sweeper jobs."""  # Work happens without an admin.
+
+from __future__ import annotations  # Modern hints.
+import heapq, itertools, threading, time  # Due-time heap, tie breaker, background thread, clock.
+from dataclasses import dataclass, field  # Job records.
+from typing import Callable, Dict, List, Optional, Tuple  # Type names.
+from carrental.storage.db import Database  # Maintenance runs on its own connection.
+from carrental.storage.expiry import BookingExpirer  # The actual booking jobs.
+from carrental.storage.repositories import HoldRepository, _utc_stamp  # Expired reservation holds.
+
+@dataclass(eq=False)
+class Job:  # One scheduled callable.
+    name: str
+    fn: Callable[[], object]
+    interval: Optional[float]  # Seconds between runs; None = run once.
+    runs: int = 0
+    errors: int = 0
+    last_error: Optional[BaseException] = None
+    last_result: object = None
+    cancelled: bool = field(default=False, repr=False)
+
+class Scheduler:  # Earliest job on top of a heap; the thread sleeps until it is due.
+    """Run jobs at fixed intervals on one daemon thread (or by hand with run_pending())."""  # Human description.
+    def __init__(self, clock: Callable[[], float] = time.monotonic) -> None:
+        self.clock = clock  # Injectable so tests can move time.
+        self._heap: List[Tuple[float, int, Job]] = []  # (due time, sequence, job).
+        self._seq = itertools.count()  # Equal due times run in the order they were added.
+        self._cond = threading.Condition()  # Wakes the thread early when a sooner job arrives.
+        self._stopped = False
+        self._thread: Optional[threading.Thread] = None
+
+    def every(self, interval: float, fn: Callable[[], object], *, name: str = "", first: float = 0.0) -> Job:  # Repeat every interval seconds.
+        if interval <= 0:
+            raise ValueError("interval must be positive")
+        return self._push(Job(name or fn.__name__, fn, interval), first)
+
+    def call_later(self, delay: float, fn: Callable[[], object], *, name: str = "") -> Job:  # Run once after delay seconds.
+        return self._push(Job(name or fn.__name__, fn, None), delay)
+
+    def cancel(self, job: Job) -> None:  # Lazy removal: the heap entry is skipped when it comes up.
+        job.cancelled = True
+
+    def _push(self, job: Job, delay: float) -> Job:
+        with self._cond:
+            heapq.heappush(self._heap, (self.clock() + delay, next(self._seq), job))
+            self._cond.notify()
+        return job
+
+    def _pop_due(self, now: float) -> Optional[Job]:  # Next due job, or None.
+        with self._cond:
+            while self._heap and self._heap[0][2].cancelled:
+                heapq.heappop(self._heap)
+            if not self._heap or self._heap[0][0] > now:
+                return None
+            due, _, job = heapq.heappop(self._heap)
+            if job.interval is not None:  # Next slot counts from the planned time, so runs do not drift.
+                heapq.heappush(self._heap, (max(due + job.interval, now), next(self._seq), job))
+            return job
+
+    def run_pending(self, now: Optional[float] = None) -> int:  # Run every job that is due; returns how many ran.
+        now = self.clock() if now is None else now
+        ran = 0
+        while (job := self._pop_due(now)) is not None:
+            self._run(job)
+            ran += 1
+        return ran
+
+    @staticmethod
+    def _run(job: Job) -> None:  # A failing job is counted, never allowed to kill the thread.
+        try:
+            job.last_result = job.fn()
+        except Exception as ex:
+            job.errors += 1
+            job.last_error = ex
+        job.runs += 1
+
+    def start(self) -> "Scheduler":  # Run jobs on a background thread.
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._loop, name="scheduler", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:  # Finish the running job (if any), then stop.
+        with self._cond:
+            self._stopped = True
+            self._cond.notify()
+        if self._thread is not None and self._thread.is_alive():
+            self._thread.join()
+
+    def _loop(self) -> None:
+        while True:
+            with self._cond:
+                if self._stopped:
+                    return
+                wait = self._heap[0][0] - self.clock() if self._heap else None  # None = sleep until a job is added.
+                if wait is None or wait > 0:
+                    self._cond.wait(wait)
+                    continue  # Re-check: stopped, new job, or time is up.
+            self.run_pending()
+
+def schedule_booking_maintenance(scheduler: Scheduler, db: Database, *, hold_hours: float = 48.0, interval: float = 60.0,
+                                 batch_size: int = 200, max_batches: int = 10) -> Job:
+    """Expire/complete bookings every interval seconds on a connection of its own; app caches hear about freed cars."""
+    expirer = BookingExpirer(Database(db.path), hold_hours=hold_hours, batch_size=batch_size)
+    def maintain() -> Dict[str, int]:
+        result = expirer.run(max_batches=max_batches)  # Bounded: leftovers wait for the next tick.
+        if result["completed"]:
+            db.notify("cars", "bulk", None)  # Availability changed behind the app's back.
+        return result
+    return scheduler.every(interval, maintain, name="booking-maintenance")
+
+def schedule_hold_sweeper(scheduler: Scheduler, db: Database, *, interval: float = 30.0, batch_size: int = 500) -> Job:
+    """Delete expired holds every interval seconds (queries already ignore them; this keeps the table small)."""
+    holds = HoldRepository(Database(db.path))  # Own connection, like the maintenance job.
+    def sweep_holds() -> int:
+        return holds.sweep(_utc_stamp(), batch_size=batch_size)
+    return scheduler.every(interval, sweep_holds, name="hold-sweeper")
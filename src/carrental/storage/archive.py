@@ -0,0 +1,58 @@
+# ==============================================================================
+# Archival job: move old bookings out of the live table in small batches.
+# Every step tells you plainly what it does.
+
+# ==============================================================================
+
+"""Booking archival: bookings that ended long ago move to bookings_archive."""  # Keeps the hot table small.
+
+from __future__ import annotations  # Modern hints.
+import calendar  # Knows how many days each month has.
+from datetime import date, datetime, timezone  # For the cutoff date and the archived_at stamp.
+from typing import Optional  # Type names.
+from carrental.storage.db import Database  # DB helper.
+from carrental.storage.repositories import _BOOKING_COLS  # Same column list the union reads use.
+
+def months_before(day: date, months: int) -> date:  # Step back whole months, clipping the day (Mar 31 -> Feb 28).
+    y, m = divmod(day.year * 12 + (day.month - 1) - months, 12)  # Count months from year 0.
+    last = calendar.monthrange(y, m + 1)[1]  # Days in the target month.
+    return date(y, m + 1, min(day.day, last))
+
+class BookingArchiver:  # Moves bookings in bounded batches so other users are never blocked for long.
+    """Archive bookings whose end_date is older than N months."""  # Human description.
+    def __init__(self, db: Database, *, batch_size: int = 500) -> None:
+        self.db = db  # Where the bookings live.
+        self.batch_size = batch_size  # Rows moved per transaction.
+
+    def cutoff(self, older_than_months: int, today: Optional[date] = None) -> str:  # Bookings ending before this date are archived.
+        return months_before(today or date.today(), older_than_months).isoformat()
+
+    def pending_count(self, older_than_months: int, today: Optional[date] = None) -> int:  # How many rows a run would move (dry run).
+        with self.db.read() as cur:  # Pure read: no commit.
+            cur.execute("SELECT COUNT(*) FROM bookings WHERE end_date < ?", (self.cutoff(older_than_months, today),))
+            return int(cur.fetchone()[0])
+
+    def archive_batch(self, cutoff: str) -> int:  # Move at most one batch; returns rows moved.
+        stamp = datetime.now(timezone.utc).isoformat(timespec="seconds")  # When the rows were archived.
+        with self.db.unit_of_work() as con:  # One short transaction per batch.
+            cur = con.cursor()
+            cur.execute("SELECT id FROM bookings WHERE end_date < ? ORDER BY id LIMIT ?", (cutoff, self.batch_size))  # Uses idx_bookings_end_date.
+            ids = [r[0] for r in cur.fetchall()]
+            if not ids:
+                return 0
+            marks = ",".join("?" * len(ids))  # One placeholder per id.
+            cur.execute(f"INSERT INTO bookings_archive ({_BOOKING_COLS}, archived_at) SELECT {_BOOKING_COLS}, ? FROM bookings WHERE id IN ({marks})", (stamp, *ids))  # Copy rows.
+            cur.execute(f"DELETE FROM bookings WHERE id IN ({marks})", ids)  # Then remove them from the live table.
+            return len(ids)
+
+    def run(self, older_than_months: int = 12, *, max_batches: Optional[int] = None, today: Optional[date] = None) -> int:  # Archive until done (or max_batches).
+        cutoff = self.cutoff(older_than_months, today)
+        moved = 0
+        batches = 0
+        while max_batches is None or batches < max_batches:
+            n = self.archive_batch(cutoff)
+            moved += n
+            batches += 1
+            if n < self.batch_size:  # Short batch means nothing is left.
+                break
+        return moved
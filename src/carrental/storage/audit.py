@@ -0,0 +1,145 @@
+# ==============================================================================
+# Audit trail for admin changes, written in the background in batches.
+# Every step tells you plainly what it does.
+#   - DESIGN PATTERN: Producer/Consumer (callers enqueue, one thread writes)
+# ==============================================================================
+
+"""Asynchronous audit log: who changed what, when, and the before/after values."""  # Admin actions stay fast and traceable.
+
+from __future__ import annotations  # Modern hints.
+import atexit, json, queue, threading, time  # Exit flush, value encoding, bounded queue, writer thread, retry backoff.
+from typing import Any, Dict, List, Optional, Tuple  # Type names.
+from carrental.storage.db import Database  # Own connection for the writer.
+from carrental.storage.repositories import _utc_stamp, _where  # Same timestamps and WHERE builder as the repositories.
+from carrental.storage.statements import STATEMENTS  # One SQL string per filter shape.
+from carrental.utils.metrics import METRICS  # Counts entries given up on.
+
+_STOP = object()  # Tells the writer thread to finish.
+_DROPPED = METRICS.counter("carrental_audit_dropped_total", "Audit entries dropped because the database stayed unwritable.")
+_INSERT = "INSERT INTO audit_log (ts, actor, action, entity, entity_id, before_json, after_json) VALUES (?, ?, ?, ?, ?, ?, ?)"
+
+def _encode(value: Any) -> Optional[str]:  # Dicts/values -> JSON text (None stays NULL).
+    return None if value is None else json.dumps(value, sort_keys=True, default=str)
+
+class AuditLog:  # record() only enqueues; a daemon thread writes batches on its own connection.
+    """Bounded queue in front of the audit_log table; flush() waits, close() drains and stops."""  # Human description.
+    def __init__(self, db: Database, *, max_queue: int = 10_000, batch_size: int = 200, flush_interval: float = 0.5,
+                 retries: int = 5, retry_delay: float = 0.05, max_unwritten: int = 10_000, register_atexit: bool = True) -> None:
+        self.db = db  # Queries read through the app's Database.
+        self._writer_db = Database(db.path)  # Writes never share the app's connection or transaction.
+        self.batch_size = batch_size  # Entries per INSERT transaction.
+        self.flush_interval = flush_interval  # Longest an entry waits before a (partial) batch is written.
+        self._queue: "queue.Queue[Any]" = queue.Queue(maxsize=max_queue)  # Full queue = callers wait (entries are never dropped).
+        self._local = threading.local()  # Actor per thread (one CLI session per thread).
+        self.written = 0  # Entries committed so far.
+        self.batches = 0  # INSERT transactions so far.
+        self.errors = 0  # Write attempts that failed even after retrying (their entries are kept, see unwritten and dropped).
+        self.retries = retries  # Extra attempts per write, waiting retry_delay, then twice as long each time.
+        self.retry_delay = retry_delay
+        self.unwritten: List[Tuple] = []  # Entries whose write failed; they go first in the next write.
+        self.max_unwritten = max_unwritten  # Most failed entries kept; past that the oldest are dropped (a broken disk must not eat memory).
+        self.dropped = 0  # Entries given up on so far (also carrental_audit_dropped_total).
+        self._closed = False  # Set by close(); checked together with the put so nothing lands after _STOP.
+        self._state = threading.Lock()  # Guards _closed and the _STOP put.
+        self._thread = threading.Thread(target=self._run, name="audit-writer", daemon=True)
+        self._thread.start()
+        if register_atexit:
+            atexit.register(self.close)  # Flush-on-exit guarantee.
+
+    # --- producer side ---
+    def set_actor(self, actor: Optional[str]) -> None:  # Who is acting on this thread (e.g. the admin's email).
+        self._local.actor = actor
+
+    @property
+    def actor(self) -> Optional[str]:
+        return getattr(self._local, "actor", None)
+
+    def record(self, action: str, entity: str, entity_id: Any = None, *, before: Any = None, after: Any = None,
+               actor: Optional[str] = None) -> None:
+        """Queue one entry, e.g. record("car.update", "car", 7, before={...}, after={...})."""
+        row = (_utc_stamp(), actor or self.actor, action, entity, None if entity_id is None else str(entity_id), _encode(before), _encode(after))
+        with self._state:  # Either queued before _STOP (and written) or refused.
+            if self._closed:
+                raise RuntimeError("AuditLog is closed")
+            self._queue.put(row)  # Blocks only when max_queue entries are already waiting.
+
+    def flush(self) -> None:  # Wait until everything queued so far was written (or moved to unwritten).
+        self._queue.join()
+
+    def close(self) -> None:  # Write what is left and stop the thread (safe to call twice).
+        with self._state:
+            if not self._closed:
+                self._closed = True
+                self._queue.put(_STOP)
+        self._thread.join()
+
+    # --- consumer side ---
+    def _run(self) -> None:
+        while True:
+            first = self._queue.get()  # Sleep until there is work.
+            batch: List[Tuple] = []
+            stop = first is _STOP
+            if not stop:
+                batch.append(first)
+                try:  # Gather more for up to flush_interval, so bursts become one transaction.
+                    while len(batch) < self.batch_size:
+                        item = self._queue.get(timeout=self.flush_interval)
+                        if item is _STOP:
+                            stop = True
+                            break
+                        batch.append(item)
+                except queue.Empty:
+                    pass
+            if batch or (stop and self.unwritten):  # Last chance for earlier failures at close.
+                self._write(batch)
+            for _ in range(len(batch) + stop):  # Lets flush() return.
+                self._queue.task_done()
+            if stop:
+                return
+
+    def _write(self, batch: List[Tuple]) -> None:  # Earlier failures first, so entries stay in order.
+        rows = self.unwritten + batch
+        delay = self.retry_delay
+        for attempt in range(self.retries + 1):  # E.g. the file is locked by a long write: back off and try again.
+            try:
+                with self._writer_db.write() as cur:
+                    cur.executemany(_INSERT, rows)
+                self.written += len(rows)
+                self.batches += 1
+                self.unwritten = []
+                return
+            except Exception:
+                if attempt < self.retries:
+                    time.sleep(delay)
+                    delay *= 2
+        self.errors += 1
+        excess = len(rows) - self.max_unwritten
+        if excess > 0:  # The database stays broken: keep the newest entries, count the rest.
+            rows = rows[excess:]
+            self.dropped += excess
+            _DROPPED.inc(excess)
+        self.unwritten = rows  # The next batch (or close) tries them again.
+
+    # --- queries ---
+    def query(self, *, actor: Optional[str] = None, action: Optional[str] = None, entity: Optional[str] = None, entity_id: Any = None,
+              since: Optional[str] = None, until: Optional[str] = None, limit: int = 100, offset: int = 0) -> List[Dict]:
+        """Newest first; since/until compare against the UTC timestamp text (a date like "2030-01-05" works)."""
+        self.flush()  # Read our own entries.
+        where: List[str] = []
+        params: List[Any] = []
+        for col, value in (("actor", actor), ("action", action), ("entity", entity), ("entity_id", entity_id)):
+            if value is not None:
+                where.append(f"{col} = ?"); params.append(str(value))
+        if since is not None:
+            where.append("ts >= ?"); params.append(since)
+        if until is not None:
+            where.append("ts < ?"); params.append(until)
+        sql = STATEMENTS.get(("audit.query", tuple(where)), lambda: f"SELECT * FROM audit_log{_where(where)} ORDER BY id DESC LIMIT ? OFFSET ?")
+        with self.db.read() as cur:  # Read-only: no transaction, no commit.
+            cur.execute(sql, (*params, limit, offset))
+            rows = [dict(r) for r in cur.fetchall()]
+        for r in rows:
+            before, after = r.pop("before_json"), r.pop("after_json")
+            r["before"] = json.loads(before) if before is not None else None
+            r["after"] = json.loads(after) if after is not None else None
+        return rows
@@ -0,0 +1,78 @@
+# ==============================================================================
+# Storage backend interface so services do not care where data lives.
+# Every step tells you plainly what it does.
+#   - DESIGN PATTERN: Repository + Abstract Factory (one backend builds all three repos)
+# ==============================================================================
+
+"""Storage backend protocol plus the SQLite implementation."""  # Services talk to a backend, not to SQL.
+
+from __future__ import annotations  # Modern hints.
+from typing import Callable, Dict, List, Optional, Protocol, Union  # Type names.
+from carrental.storage.db import Database  # SQLite helper.
+from carrental.storage.repositories import UserRepository, CarRepository, BookingRepository, HoldRepository  # SQLite repos.
+from carrental.storage.bulk import CarFilter  # Bulk update filter.
+
+class UserStore(Protocol):  # What every user repository must offer.
+    def get_by_email(self, email: str) -> Optional[Dict]: ...
+    def create(self, email: str, password: str, name: str, role: str) -> bool: ...
+    def verify(self, email: str, password: str) -> Optional[Dict]: ...
+    def list_by_role(self, role: str) -> List[Dict]: ...
+    def list_admins(self) -> List[Dict]: ...
+    def delete_by_id(self, user_id: int) -> bool: ...
+    def delete_by_email(self, email: str) -> bool: ...
+    def set_password(self, email: str, new_password: str) -> bool: ...
+    def set_email(self, old_email: str, new_email: str) -> bool: ...
+    def set_name(self, email: str, new_name: str) -> bool: ...
+
+class CarStore(Protocol):  # What every car repository must offer.
+    def list(self, *, only_available: bool = True) -> List[Dict]: ...
+    def add(self, make: str, model: str, year: int, mileage: int, daily_rate: float, available: bool, min_days: int, max_days: int, vehicle_type: str) -> bool: ...
+    def update(self, car_id: int, *, expected_version: Optional[int] = None, **fields) -> bool: ...  # ConflictError if expected_version is stale.
+    def delete(self, car_id: int) -> bool: ...
+    def get(self, car_id: int) -> Optional[Dict]: ...
+    def set_availability(self, car_id: int, available: bool) -> Optional[int]: ...  # New version, None if the car is missing.
+    def toggle_availability(self, car_id: int) -> None: ...
+    def subscribe(self, callback: Callable[[str, Optional[int]], None]) -> None: ...  # Observer hook: (event, car_id).
+    def bulk_update(self, flt: CarFilter, changes, *, dry_run: bool = False) -> int: ...  # Set-based update; returns matched count.
+
+class BookingStore(Protocol):  # What every booking repository must offer.
+    def create(self, user_id: int, car_id: int, start: str, end: str, total_price: float, payment_key: Optional[str] = None) -> bool: ...
+    def get_by_payment_key(self, payment_key: str) -> Optional[Dict]: ...
+    def list(self, *, user_id: Optional[int] = None, status: Optional[str] = None, include_archive: bool = False) -> List[Dict]: ...
+    def overlapping(self, start: str, end: str) -> List[Dict]: ...
+    def history(self, *, user_id: Optional[int] = None, status: Optional[str] = None, date_from: Optional[str] = None, date_to: Optional[str] = None,
+                limit: Optional[int] = None, offset: int = 0, include_archive: bool = False) -> List[Dict]: ...  # Joined with car + customer fields.
+    def totals(self, *, user_id: Optional[int] = None, date_from: Optional[str] = None, date_to: Optional[str] = None,
+               today: Optional[str] = None, include_archive: bool = True) -> Dict: ...  # {"bookings", "spent", "upcoming"}.
+    def set_status(self, booking_id: int, status: str, *, expected_version: Optional[int] = None) -> None: ...  # Same CAS rule.
+    def set_car_version(self, booking_id: int, car_version: Optional[int]) -> None: ...  # Car version approval left (see BookingExpirer).
+    def get(self, booking_id: int) -> Optional[Dict]: ...
+
+class HoldStore(Protocol):  # Short-lived reservations while a customer confirms.
+    def place(self, token: str, user_id: int, car_id: int, start: str, end: str, expires_at: str, now: str) -> bool: ...  # False if taken.
+    def get(self, token: str) -> Optional[Dict]: ...
+    def release(self, token: str) -> bool: ...
+    def live(self, start: str, end: str, now: str, *, car_id: Optional[int] = None, exclude_user: Optional[int] = None) -> List[Dict]: ...
+    def sweep(self, now: str, *, batch_size: int = 500) -> int: ...  # Delete expired holds; returns how many.
+
+class StorageBackend(Protocol):  # A backend hands out the repositories.
+    name: str  # Short label for reports ("sqlite", "memory").
+    users: UserStore
+    cars: CarStore
+    bookings: BookingStore
+    holds: HoldStore
+
+class SQLiteBackend:  # The original SQLite storage, wrapped as a backend.
+    """Backend that keeps everything in the SQLite file managed by Database."""  # Human description.
+    name = "sqlite"
+    def __init__(self, db: Database) -> None:
+        self.db = db  # Keep the DB for callers that need raw access.
+        self.users = UserRepository(db)
+        self.cars = CarRepository(db)
+        self.bookings = BookingRepository(db)
+        self.holds = HoldRepository(db)
+
+def as_backend(store: Union[Database, StorageBackend]) -> StorageBackend:  # Accept either a Database or a ready backend.
+    if isinstance(store, Database):  # Old call sites pass Database...
+        return SQLiteBackend(store)  # ...so wrap it.
+    return store  # Already a backend (e.g. MemoryBackend).
@@ -0,0 +1,99 @@
+# ==============================================================================
+# Set-based bulk updates for cars: one filter, a few field changes, one statement.
+# Every step tells you plainly what it does.
+
+# ==============================================================================
+
+"""Bulk update specs shared by the SQLite and in-memory car repositories."""  # "All SUVs +5%" in one UPDATE.
+
+from __future__ import annotations  # Modern hints.
+from dataclasses import dataclass  # Small value objects.
+from typing import Any, Dict, Iterable, List, Optional, Tuple  # Type names.
+
+OPS = ("mul", "add", "set")  # Field expressions: multiply, add to, or overwrite.
+NUMERIC = ("year", "mileage", "daily_rate", "min_days", "max_days")  # Columns mul/add make sense for.
+TEXT = ("make", "model", "vehicle_type")  # Columns that can only be set.
+FIELDS = NUMERIC + TEXT + ("available",)  # Everything a bulk update may touch.
+_INTS = ("year", "mileage", "min_days", "max_days")  # Stored as whole numbers.
+
+@dataclass(frozen=True)
+class CarFilter:  # Which cars to change; None means "any".
+    make: Optional[str] = None  # Exact make, case-insensitive.
+    vehicle_type: Optional[str] = None  # Exact type, case-insensitive.
+    year_min: Optional[int] = None  # Inclusive bounds...
+    year_max: Optional[int] = None
+    rate_min: Optional[float] = None
+    rate_max: Optional[float] = None
+
+    def where(self) -> Tuple[str, List[Any]]:  # SQL condition + parameters.
+        conds: List[str] = []
+        params: List[Any] = []
+        if self.make is not None:
+            conds.append("make = ? COLLATE NOCASE"); params.append(self.make)
+        if self.vehicle_type is not None:
+            conds.append("vehicle_type = ? COLLATE NOCASE"); params.append(self.vehicle_type)
+        for col, op, value in (("year", ">=", self.year_min), ("year", "<=", self.year_max),
+                               ("daily_rate", ">=", self.rate_min), ("daily_rate", "<=", self.rate_max)):
+            if value is not None:
+                conds.append(f"{col} {op} ?"); params.append(value)
+        return (" WHERE " + " AND ".join(conds)) if conds else "", params
+
+    def matches(self, car: Dict[str, Any]) -> bool:  # Same test in Python (in-memory engine).
+        if self.make is not None and str(car["make"]).lower() != self.make.lower():
+            return False
+        if self.vehicle_type is not None and str(car["vehicle_type"]).lower() != self.vehicle_type.lower():
+            return False
+        if self.year_min is not None and car["year"] < self.year_min: return False
+        if self.year_max is not None and car["year"] > self.year_max: return False
+        if self.rate_min is not None and car["daily_rate"] < self.rate_min: return False
+        if self.rate_max is not None and car["daily_rate"] > self.rate_max: return False
+        return True
+
+@dataclass(frozen=True)
+class FieldChange:  # One "field op value" expression, e.g. ("daily_rate", "mul", 1.05).
+    field: str
+    op: str
+    value: Any
+
+    def __post_init__(self) -> None:  # Reject anything we cannot turn into safe SQL.
+        if self.field not in FIELDS:
+            raise ValueError(f"unknown field '{self.field}'")
+        if self.op not in OPS:
+            raise ValueError(f"unknown op '{self.op}' (use one of {', '.join(OPS)})")
+        if self.op != "set" and self.field not in NUMERIC:
+            raise ValueError(f"'{self.op}' only works on numeric fields")
+
+    def sql(self) -> Tuple[str, Any]:  # "col = expr" + its parameter.
+        f = self.field
+        if self.op == "set":
+            return f"{f} = ?", (1 if self.value else 0) if f == "available" else self.value
+        expr = f"{f} * ?" if self.op == "mul" else f"{f} + ?"
+        if f == "daily_rate":
+            expr = f"ROUND({expr}, 2)"  # Money stays at cents.
+        elif f in _INTS:
+            expr = f"CAST(ROUND({expr}) AS INTEGER)"
+        return f"{f} = {expr}", self.value
+
+    def apply(self, car: Dict[str, Any]) -> None:  # Same change in Python (in-memory engine).
+        f = self.field
+        if self.op == "set":
+            car[f] = (1 if self.value else 0) if f == "available" else self.value
+            return
+        new = car[f] * self.value if self.op == "mul" else car[f] + self.value
+        car[f] = round(new, 2) if f == "daily_rate" else int(round(new)) if f in _INTS else new
+
+def parse_changes(changes: Iterable[Any]) -> List[FieldChange]:  # Accept FieldChange objects or (field, op, value) tuples.
+    out = [c if isinstance(c, FieldChange) else FieldChange(*c) for c in changes]
+    if not out:
+        raise ValueError("no changes given")
+    if len({c.field for c in out}) != len(out):
+        raise ValueError("each field may only be changed once")
+    return out
+
+def update_sql(flt: CarFilter, changes: List[FieldChange]) -> Tuple[str, List[Any]]:  # One UPDATE for the whole set.
+    sets, params = [], []
+    for c in changes:
+        s, p = c.sql()
+        sets.append(s); params.append(p)
+    where, wparams = flt.where()
+    return "UPDATE cars SET " + ", ".join(sets) + ", version = version + 1" + where, params + wparams
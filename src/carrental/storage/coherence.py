@@ -0,0 +1,166 @@
+# ==============================================================================
+# Cache coherence: notice writes from other processes and drop only what they touched.
+# Every step tells you plainly what it does.
+#   - DESIGN PATTERN: Proxy (cached repositories stand in front of the real ones)
+# ==============================================================================
+
+"""Per-table change counters (kept by triggers) plus read caches that trust them."""  # Cache safely across processes.
+
+from __future__ import annotations  # Modern hints.
+import threading  # Caches are shared by threads.
+from collections import OrderedDict  # Bounded LRU.
+from typing import Any, Dict, Iterable, Optional, Sequence, Tuple, Union  # Type names.
+from carrental.storage.db import Database  # The file we watch.
+
+TRACKED: Sequence[str] = ("users", "cars", "bookings", "bookings_archive")  # Tables that get counter triggers.
+_MISS = object()  # Cache-miss marker (None is a valid cached result).
+
+def install_counters(db: Database, tables: Iterable[str] = TRACKED) -> None:
+    """Create change_counters and AFTER INSERT/UPDATE/DELETE triggers (idempotent; they live in the file)."""
+    with db.write() as cur:
+        cur.execute("""CREATE TABLE IF NOT EXISTS change_counters (
+            table_name TEXT PRIMARY KEY,
+            counter INTEGER NOT NULL DEFAULT 0
+        )""")  # One row per watched table.
+        for table in tables:
+            cur.execute("INSERT OR IGNORE INTO change_counters (table_name, counter) VALUES (?, 0)", (table,))
+            for op in ("INSERT", "UPDATE", "DELETE"):  # Every writer bumps the counter, even processes without this module.
+                cur.execute(f"""CREATE TRIGGER IF NOT EXISTS trg_{table}_{op.lower()}_counter AFTER {op} ON {table}
+                    BEGIN UPDATE change_counters SET counter = counter + 1 WHERE table_name = '{table}'; END""")
+
+class ChangeTracker:  # Answers "which tables changed?" with one PRAGMA in the common case.
+    """Reads the counter table only when PRAGMA data_version or our own total_changes moved."""  # Human description.
+    def __init__(self, db: Database, tables: Iterable[str] = TRACKED) -> None:
+        self.db = db
+        install_counters(db, tables)
+        self._lock = threading.Lock()
+        self._stamp: Optional[Tuple[int, int]] = None  # (data_version, total_changes) at the last counter read.
+        self._versions: Dict[str, int] = {}  # table -> counter at that time.
+        self.polls = 0  # Cheap checks made.
+        self.counter_reads = 0  # Times the counter table was actually read.
+
+    def versions(self) -> Dict[str, int]:  # Current counter per table.
+        con = self.db.connect()
+        with self._lock:
+            self.polls += 1
+            cur = self.db.cursor(con)
+            cur.execute("PRAGMA data_version")  # Changes when another connection commits.
+            stamp = (cur.fetchone()[0], con.total_changes)  # total_changes covers our own writes.
+            if stamp != self._stamp:
+                cur.execute("SELECT table_name, counter FROM change_counters")
+                self._versions = {name: counter for name, counter in cur.fetchall()}
+                self._stamp = stamp
+                self.counter_reads += 1
+            return self._versions
+
+    def in_transaction(self) -> bool:  # Uncommitted data must not be cached (a rollback would make it a lie).
+        return self.db.connect().in_transaction
+
+def _copy(value: Any) -> Any:  # Callers may edit what they get; the cached original must not change.
+    if isinstance(value, list):
+        return [dict(v) if isinstance(v, dict) else v for v in value]
+    if isinstance(value, dict):
+        return dict(value)
+    return value
+
+class _CachedRepository:  # Shared proxy logic; subclasses list which reads are cached and what they depend on.
+    DEPENDS: Dict[str, Tuple[str, ...]] = {}  # method name -> tables its result comes from.
+
+    def __init__(self, inner: Any, tracker: ChangeTracker, *, max_entries: int = 1024) -> None:
+        self._inner = inner  # The real repository.
+        self._tracker = tracker
+        self._max = max_entries
+        self._cache: "OrderedDict[Tuple, Tuple[Tuple, Any]]" = OrderedDict()  # key -> (counters when read, result).
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _read(self, method: str, *args, **kwargs) -> Any:
+        fn = getattr(self._inner, method)
+        if self._tracker.in_transaction():  # Inside someone's transaction: go straight to SQL.
+            return fn(*args, **kwargs)
+        versions = self._tracker.versions()
+        stamp = tuple(versions.get(t) for t in self.DEPENDS[method])  # Only this method's tables matter.
+        key = (method, args, tuple(sorted(kwargs.items())))
+        with self._lock:
+            entry = self._cache.get(key, _MISS)
+            if entry is not _MISS and entry[0] == stamp:
+                self._cache.move_to_end(key)
+                self.hits += 1
+                return _copy(entry[1])
+            self.misses += 1
+        value = fn(*args, **kwargs)  # Read after the stamp, so the value is at least that new.
+        with self._lock:
+            self._cache[key] = (stamp, value)
+            self._cache.move_to_end(key)
+            while len(self._cache) > self._max:
+                self._cache.popitem(last=False)  # Drop the least recently used.
+        return _copy(value)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._cache.clear()
+
+    def __getattr__(self, name: str) -> Any:  # Writes and anything uncached pass straight through.
+        return getattr(self._inner, name)
+
+class CachedUserRepository(_CachedRepository):
+    DEPENDS = {"get_by_email": ("users",), "list_by_role": ("users",), "list_admins": ("users",)}
+    def get_by_email(self, email: str) -> Optional[Dict]:
+        return self._read("get_by_email", email)
+    def list_by_role(self, role: str):
+        return self._read("list_by_role", role)
+    def list_admins(self):
+        return self._read("list_admins")
+
+class CachedCarRepository(_CachedRepository):
+    DEPENDS = {"list": ("cars",), "get": ("cars",)}
+    def list(self, *, only_available: bool = True):
+        return self._read("list", only_available=only_available)
+    def get(self, car_id: int) -> Optional[Dict]:
+        return self._read("get", car_id)
+
+class CachedBookingRepository(_CachedRepository):
+    DEPENDS = {
+        "get": ("bookings",),
+        "get_by_payment_key": ("bookings",),
+        "overlapping": ("bookings",),
+        "list": ("bookings", "bookings_archive"),
+        "totals": ("bookings", "bookings_archive"),
+        "history": ("bookings", "bookings_archive", "cars", "users"),  # Joined with car and customer names.
+    }
+    def get(self, booking_id: int) -> Optional[Dict]:
+        return self._read("get", booking_id)
+    def get_by_payment_key(self, payment_key: str) -> Optional[Dict]:
+        return self._read("get_by_payment_key", payment_key)
+    def overlapping(self, start: str, end: str):
+        return self._read("overlapping", start, end)
+    def list(self, **kwargs):
+        return self._read("list", **kwargs)
+    def totals(self, **kwargs) -> Dict:
+        return self._read("totals", **kwargs)
+    def history(self, **kwargs):
+        return self._read("history", **kwargs)
+
+class CachedBackend:  # StorageBackend whose reads are cached and kept coherent with the file.
+    """Wraps a SQLite-backed backend (or a Database); each Database gets its own tracker."""  # Human description.
+    def __init__(self, store: Union[Database, Any], *, max_entries: int = 1024) -> None:
+        from carrental.storage.backends import as_backend  # Local import: backends is the higher layer.
+        inner = as_backend(store)
+        self.name = f"cached:{inner.name}"
+        self.db = inner.db
+        self.inner = inner
+        self._trackers: Dict[int, ChangeTracker] = {}
+        self.users = CachedUserRepository(inner.users, self.tracker(inner.users.db), max_entries=max_entries)
+        self.cars = CachedCarRepository(inner.cars, self.tracker(inner.cars.db), max_entries=max_entries)
+        self.bookings = CachedBookingRepository(inner.bookings, self.tracker(inner.bookings.db), max_entries=max_entries)
+        self.holds = inner.holds  # Minutes-long rows checked against the clock: not worth caching.
+
+    def tracker(self, db: Database) -> ChangeTracker:  # Branch backends keep users in a different file.
+        if id(db) not in self._trackers:
+            self._trackers[id(db)] = ChangeTracker(db)
+        return self._trackers[id(db)]
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        return {name: {"hits": repo.hits, "misses": repo.misses}
+                for name, repo in (("users", self.users), ("cars", self.cars), ("bookings", self.bookings))}
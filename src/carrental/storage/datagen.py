@@ -0,0 +1,158 @@
+# ==============================================================================
+# Scale-test data generator: users, cars and years of realistic bookings.
+# Every step tells you plainly what it does.
+
+# ==============================================================================
+
+"""Deterministic bulk data generator (same seed -> same database, any worker count)."""  # Production-sized data on a laptop.
+
+from __future__ import annotations  # Modern hints.
+import random, time  # Seeded randomness and timing.
+from dataclasses import dataclass  # Generator settings.
+from datetime import date, timedelta  # Calendar maths.
+from multiprocessing import get_context  # Optional parallel generation.
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple  # Type names.
+from carrental.storage.db import Database  # Target database.
+from carrental.storage.repositories import _hash  # Same password hashing as the app.
+
+CATALOGUE: Sequence[Tuple[str, str, str, float]] = (  # (make, model, vehicle_type, typical daily rate).
+    ("Toyota", "Yaris", "Hatchback", 45.0), ("Toyota", "Corolla", "Sedan", 55.0), ("Toyota", "RAV4", "SUV", 85.0),
+    ("Honda", "Jazz", "Hatchback", 44.0), ("Honda", "Civic", "Sedan", 58.0), ("Honda", "CR-V", "SUV", 82.0),
+    ("Mazda", "3", "Sedan", 56.0), ("Mazda", "CX-5", "SUV", 84.0), ("Kia", "Rio", "Hatchback", 42.0),
+    ("Kia", "Sportage", "SUV", 80.0), ("Hyundai", "i30", "Hatchback", 47.0), ("Hyundai", "Tucson", "SUV", 81.0),
+    ("Ford", "Ranger", "Ute", 95.0), ("Toyota", "HiAce", "Van", 110.0), ("Tesla", "Model 3", "Sedan", 120.0),
+)
+SEASON = (0.8, 0.75, 0.85, 0.95, 0.9, 1.0, 1.25, 1.3, 1.0, 0.95, 0.9, 1.35)  # Demand by month (Jan..Dec): summer and Christmas peak.
+_BOOKING_INSERT = "INSERT INTO bookings (user_id, car_id, start_date, end_date, total_price, status) VALUES (?, ?, ?, ?, ?, ?)"
+
+@dataclass(frozen=True)
+class GeneratorConfig:  # Everything that decides the output; same config -> same rows.
+    users: int = 1_000  # Customer accounts.
+    cars: int = 200  # Fleet size.
+    years: int = 3  # Length of the booking history.
+    start: date = date(2022, 1, 1)  # First day of the history.
+    today: Optional[date] = None  # Bookings after this are still PENDING/APPROVED; default = 90 days before the end.
+    seed: int = 42  # Master seed.
+    utilization: float = 0.65  # Share of days a typical car is rented.
+    weekend_multiplier: float = 1.2  # Same rule as WeekendMultiplierStrategy.
+    batch_size: int = 50_000  # Rows per executemany/commit.
+    cars_per_task: int = 250  # Cars per worker task (multiprocessing).
+
+    @property
+    def end(self) -> date:
+        return self.start + timedelta(days=365 * self.years - 1)
+
+    @property
+    def cutoff(self) -> date:
+        return self.today or self.end - timedelta(days=90)
+
+class _Calendar:  # Per-day lookups precomputed once, so each booking costs O(1).
+    def __init__(self, cfg: GeneratorConfig) -> None:
+        self.first = cfg.start.toordinal()
+        self.days = (cfg.end - cfg.start).days + 1
+        pad = 32  # Bookings may run a little past the end.
+        dates = [cfg.start + timedelta(days=i) for i in range(self.days + pad)]
+        self.iso = [d.isoformat() for d in dates]  # Day index -> "YYYY-MM-DD".
+        self.weekday = [d.weekday() for d in dates]  # 0 = Monday.
+        self.demand = [SEASON[d.month - 1] for d in dates]  # Seasonal demand factor.
+        self.weekend_prefix = [0]  # Prefix sums: weekend days in [a, b) = p[b] - p[a].
+        for wd in self.weekday:
+            self.weekend_prefix.append(self.weekend_prefix[-1] + (wd >= 5))
+        self.cutoff = (cfg.cutoff - cfg.start).days
+
+def car_row(cfg: GeneratorConfig, car_id: int) -> Tuple:  # Car attributes depend only on (seed, car id).
+    rng = random.Random(cfg.seed * 7_919 + car_id)
+    make, model, vtype, rate = CATALOGUE[rng.randrange(len(CATALOGUE))]
+    return (make, model, rng.randint(2016, 2024), rng.randint(5_000, 180_000), round(rate * rng.uniform(0.9, 1.15), 2),
+            1, 1, rng.choice((14, 21, 30)), vtype)
+
+def car_bookings(cfg: GeneratorConfig, cal: _Calendar, car_id: int) -> Iterator[Tuple]:
+    """Non-overlapping bookings for one car, walking forward through the calendar."""
+    rng = random.Random(cfg.seed * 1_000_003 + car_id)  # Own stream per car: shards never change the result.
+    car = car_row(cfg, car_id)
+    rate, max_days = car[4], car[7]
+    mean_len = 3.5
+    mean_gap = mean_len * (1 - cfg.utilization) / cfg.utilization  # Idle days that give the target utilisation.
+    wm = cfg.weekend_multiplier
+    day = rng.randrange(7)
+    while day < cal.days:
+        wd = cal.weekday[day]
+        if wd in (1, 2, 3) and rng.random() < 0.3:  # Many trips start on a Friday.
+            day += 4 - wd
+            wd = 4
+        demand = cal.demand[day]
+        if wd >= 4:  # Fri-Sun starts: weekend getaways.
+            length = rng.randint(2, 3)
+        elif rng.random() < 0.12 * demand:  # Holidays, more of them in peak season.
+            length = rng.randint(7, 14)
+        else:  # Mid-week business trips.
+            length = rng.randint(1, 5)
+        length = min(length, max_days)
+        end = day + length - 1
+        weekend = cal.weekend_prefix[end + 1] - cal.weekend_prefix[day]
+        total = round(rate * (length - weekend) + rate * wm * weekend, 2)
+        if end < cal.cutoff:  # Finished trips: mostly approved, some rejected.
+            status = "APPROVED" if rng.random() < 0.92 else "REJECTED"
+        elif day <= cal.cutoff:  # Running right now.
+            status = "APPROVED"
+        else:  # Future trips: awaiting review or already approved.
+            status = "PENDING" if rng.random() < 0.6 else "APPROVED"
+        yield (rng.randint(1, cfg.users), car_id, cal.iso[day], cal.iso[end], total, status)
+        day = end + 1 + int(rng.expovariate(demand / mean_gap)) if mean_gap > 0 else end + 1  # Busier seasons, shorter gaps.
+
+def _task(args: Tuple[GeneratorConfig, int, int]) -> List[Tuple]:  # Worker: bookings for cars [lo, hi).
+    cfg, lo, hi = args
+    cal = _Calendar(cfg)
+    out: List[Tuple] = []
+    for car_id in range(lo, hi):
+        out.extend(car_bookings(cfg, cal, car_id))
+    return out
+
+def generate(db: Database, cfg: GeneratorConfig, *, workers: int = 1, progress=None) -> Dict[str, float]:
+    """Fill an empty database; returns row counts and timings. workers > 1 generates in parallel processes."""
+    con = db.connect()
+    for table in ("users", "cars", "bookings"):  # Never mix generated rows into real data.
+        if con.execute(f"SELECT EXISTS (SELECT 1 FROM {table})").fetchone()[0]:
+            raise ValueError(f"table '{table}' is not empty; generate into a fresh database file")
+    t0 = time.perf_counter()
+    con.execute("PRAGMA synchronous=OFF")  # Bulk load: a crash just means generating again.
+    indexes = [r[0] for r in con.execute("SELECT name FROM sqlite_master WHERE type='index' AND tbl_name='bookings' AND sql IS NOT NULL")]
+    for name in indexes:  # Cheaper to build indexes once at the end than to maintain them per row.
+        con.execute(f"DROP INDEX {name}")
+    pw = _hash("password")  # One hash for every generated account.
+    con.executemany("INSERT INTO users (email, password_hash, name, role) VALUES (?, ?, ?, 'customer')",
+                    ((f"user{i}@gen.local", pw, f"User {i}") for i in range(1, cfg.users + 1)))
+    con.executemany("INSERT INTO cars (make, model, year, mileage, daily_rate, available, min_days, max_days, vehicle_type) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    (car_row(cfg, i) for i in range(1, cfg.cars + 1)))
+    con.commit()
+    tasks = [(cfg, lo, min(lo + cfg.cars_per_task, cfg.cars + 1)) for lo in range(1, cfg.cars + 1, cfg.cars_per_task)]
+    written = 0
+    pending: List[Tuple] = []
+    def flush() -> None:
+        nonlocal written, pending
+        con.executemany(_BOOKING_INSERT, pending)
+        con.commit()
+        written += len(pending)
+        pending = []
+        if progress:
+            progress(written)
+    if workers > 1:
+        with get_context("spawn").Pool(workers) as pool:  # spawn: same behaviour on Windows and Linux.
+            for rows in pool.imap(_task, tasks):  # imap keeps task order, so ids are deterministic.
+                pending.extend(rows)
+                if len(pending) >= cfg.batch_size:
+                    flush()
+    else:
+        cal = _Calendar(cfg)
+        for _, lo, hi in tasks:
+            for car_id in range(lo, hi):
+                pending.extend(car_bookings(cfg, cal, car_id))
+                if len(pending) >= cfg.batch_size:
+                    flush()
+    flush()
+    t1 = time.perf_counter()
+    db._ensure_schema()  # Recreates the dropped indexes.
+    con.execute("PRAGMA synchronous=FULL")
+    t2 = time.perf_counter()
+    return {"users": cfg.users, "cars": cfg.cars, "bookings": written,
+            "load_seconds": round(t1 - t0, 2), "index_seconds": round(t2 - t1, 2)}
@@ -7,19 +7,46 @@
 """SQLite database helper (Singleton + Unit of Work)."""  # One connection for the whole app to share safely.
 
 from __future__ import annotations  # Modern hints.
-import sqlite3, threading, os  # Database driver, a lock, and file paths.
-from contextlib import contextmanager  # Lets us build a "with ...:" helper.
-from typing import Iterator  # Type of the generator we return.
+import queue, sqlite3, threading, os, time, weakref  # Connection pool, database driver, a lock, file paths, timers, per-thread cursor caches.
+from pathlib import Path  # Builds file: URIs for read-only connections.
+from contextlib import contextmanager, nullcontext  # Lets us build a "with ...:" helper.
+from typing import Callable, Dict, Iterator, List  # Type names.
+from carrental.utils.profiling import PROFILER  # Counts SQL time when --profile is on.
+from carrental.utils.metrics import METRICS  # Always-on latency histograms.
+
+_READ_SECONDS = METRICS.histogram("carrental_db_read_seconds", "Time spent inside db.read() blocks.")
+_WRITE_SECONDS = METRICS.histogram("carrental_db_unit_of_work_seconds", "Time spent inside unit_of_work() blocks.", ("outcome",))
+_READERS = METRICS.gauge("carrental_db_read_pool_connections", "Read-only pool connections opened.")
+_UNTIMED = nullcontext()  # Reusable stand-in for PROFILER.span() when profiling is off.
+
+class _CursorCache(dict):  # connection -> cursor for one thread (a dict subclass, so a WeakSet can track it).
+    __hash__ = object.__hash__  # Compared by identity: two threads' caches are never "equal".
+    __eq__ = object.__eq__
 
 class Database:  # Our database manager.
     _instance: "Database | None" = None  # A single copy for the whole program (Singleton).
     _lock = threading.Lock()  # A lock so two threads do not create two instances at the same time.
 
-    def __init__(self, path: str | None = None) -> None:  # Create the object with a file path.
+    def __init__(self, path: str | None = None, *, cached_statements: int = 256, read_pool: int = 0, foreign_keys: bool = True) -> None:  # Create the object with a file path.
         # Place the database file next to the code unless a path is given.
         default_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "carrental.db"))  # Build a default path.
         self.path = os.path.abspath(path or default_path)  # Use given path or default.
         self._conn: sqlite3.Connection | None = None  # The actual SQLite connection starts as None (not opened yet).
+        self._listeners: Dict[str, List[Callable[[str, int | None], None]]] = {}  # table -> callbacks (Observer).
+        self._tx = threading.local()  # depth > 0 while this thread has a transaction() open; its inner units of work join it.
+        self._write_lock = threading.RLock()  # One writer at a time on the shared connection, so a batch never swallows another thread's work.
+        self.cached_statements = cached_statements  # Prepared statements sqlite3 keeps per connection.
+        self._cursors = threading.local()  # One reusable cursor per thread and connection.
+        self._cursor_caches: "weakref.WeakSet[_CursorCache]" = weakref.WeakSet()  # Every thread's cache, so forget() can reach them.
+        self.read_pool = read_pool  # > 0: reads use this many extra read-only connections (WAL mode).
+        self.foreign_keys = foreign_keys  # Enforce the FOREIGN KEY clauses (SQLite ignores them unless asked).
+        self._readers: "queue.Queue[sqlite3.Connection] | None" = None  # Idle read-only connections.
+        self._readers_made = 0  # How many pool connections exist so far.
+        self._pool_lock = threading.Lock()  # Guards the two fields above and _cursor_caches.
+
+    @property
+    def _depth(self) -> int:  # Open transaction() blocks in the calling thread (other threads never join them).
+        return getattr(self._tx, "depth", 0)
 
     @classmethod  # This method belongs to the class, not an instance.
     def instance(cls) -> "Database":  # Get the one-and-only Database instance.
@@ -30,20 +57,140 @@ class Database:  # Our database manager.
 
     def connect(self) -> sqlite3.Connection:  # Open the SQLite connection if needed and return it.
         if self._conn is None:  # If we have not connected yet...
-            self._conn = sqlite3.connect(self.path, check_same_thread=False)  # Open the file as a database.
+            self._conn = sqlite3.connect(self.path, check_same_thread=False, cached_statements=self.cached_statements)  # Open the file as a database.
             self._conn.row_factory = sqlite3.Row  # Make rows act like dictionaries (name-based access).
+            if self.foreign_keys:  # Per connection; e.g. a car with bookings can no longer be deleted.
+                self._conn.execute("PRAGMA foreign_keys=ON")
             self._ensure_schema()  # Make sure tables exist.
+            if self.read_pool:  # WAL lets pooled readers run while a write is in progress.
+                self._conn.execute("PRAGMA journal_mode=WAL")
         return self._conn  # Give back the connection.
 
+    def cursor(self, con: sqlite3.Connection | None = None) -> sqlite3.Cursor:  # This thread's cursor on a connection (made once, reused).
+        con = con or self.connect()
+        cursors = getattr(self._cursors, "by_con", None)
+        if cursors is None:
+            cursors = self._cursors.by_con = _CursorCache()
+            with self._pool_lock:
+                self._cursor_caches.add(cursors)
+        cur = cursors.get(con)
+        if cur is None:  # First use in this thread for this connection.
+            cur = cursors[con] = con.cursor()
+        return cur
+
+    @contextmanager  # "with db.read() as cur:" for SELECTs: no transaction, no commit.
+    def read(self) -> Iterator[sqlite3.Cursor]:
+        start = time.perf_counter()
+        with PROFILER.span("sql") if PROFILER.enabled else _UNTIMED:  # Only build a span when profiling.
+            con = self.connect()
+            if not self.read_pool or self._depth:  # No pool, or inside transaction(): read our own writes.
+                try:
+                    yield self.cursor(con)
+                finally:
+                    _READ_SECONDS.observe(time.perf_counter() - start)
+                return
+            reader = self._take_reader()  # Borrow a read-only connection...
+            try:
+                yield self.cursor(reader)
+            finally:
+                if reader.in_transaction:  # A rejected write left sqlite3's implicit BEGIN open: end it, or later reads see an old snapshot.
+                    reader.rollback()
+                self._readers.put(reader)  # ...and hand it back.
+                _READ_SECONDS.observe(time.perf_counter() - start)
+
+    @contextmanager  # "with db.write() as cur:" for changes: commit on success, rollback on error.
+    def write(self) -> Iterator[sqlite3.Cursor]:
+        with self.unit_of_work() as con:
+            yield self.cursor(con)
+
+    def _take_reader(self) -> sqlite3.Connection:  # Idle pool connection, or a new one while under the limit.
+        with self._pool_lock:
+            if self._readers is None:
+                self._readers = queue.Queue()
+            pool = self._readers
+            if pool.empty() and self._readers_made < self.read_pool:
+                self._readers_made += 1
+                _READERS.inc()
+                return self._open_reader()
+        return pool.get()  # Pool is full: wait for a connection to come back.
+
+    def _open_reader(self) -> sqlite3.Connection:  # Read-only connection to the same file.
+        uri = Path(self.path).as_uri() + "?mode=ro"
+        con = sqlite3.connect(uri, uri=True, check_same_thread=False, cached_statements=self.cached_statements)
+        con.row_factory = sqlite3.Row  # Same row shape as the main connection.
+        return con
+
+    def forget(self, con: sqlite3.Connection) -> None:  # Drop every thread's cached cursor on con (call before closing it).
+        with self._pool_lock:
+            caches = list(self._cursor_caches)
+        for cache in caches:
+            cache.pop(con, None)
+
+    def close_readers(self) -> None:  # Close idle pool connections (e.g. before deleting the file).
+        pool = self._readers
+        while pool is not None and not pool.empty():
+            reader = pool.get_nowait()
+            self.forget(reader)
+            reader.close()
+            self._readers_made -= 1
+            _READERS.dec()
+
     @contextmanager  # This makes a "with db.unit_of_work() as con:" helper.
     def unit_of_work(self) -> Iterator[sqlite3.Connection]:  # A tiny transaction manager.
-        con = self.connect()  # Get the connection (opens if needed).
-        try:  # Try to do changes.
-            yield con  # Give the connection to the caller's code.
-            con.commit()  # If no error happened, save the changes.
-        except Exception:  # If something went wrong...
-            con.rollback()  # Undo any half-done work.
-            raise  # Re-raise so the caller sees the error.
+        with PROFILER.span("sql") if PROFILER.enabled else _UNTIMED:  # Only build a span when profiling.
+            con = self.connect()  # Get the connection (opens if needed).
+            if self._depth:  # Inside our own transaction(): the outer block commits or rolls back.
+                yield con
+                return
+            start = time.perf_counter()
+            with self._write_lock:  # Waits while another thread's transaction() is open.
+                try:  # Try to do changes.
+                    yield con  # Give the connection to the caller's code.
+                    if con.in_transaction:  # Pure reads never open one, so they skip the commit.
+                        con.commit()  # If no error happened, save the changes.
+                except Exception:  # If something went wrong...
+                    con.rollback()  # Undo any half-done work.
+                    _WRITE_SECONDS.observe(time.perf_counter() - start, outcome="rollback")
+                    raise  # Re-raise so the caller sees the error.
+            _WRITE_SECONDS.observe(time.perf_counter() - start, outcome="commit")
+
+    @contextmanager  # "with db.transaction():" groups many repository calls into one commit.
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        con = self.connect()
+        if self._depth:  # Already grouped: just join the outer transaction.
+            yield con
+            return
+        with self._write_lock:  # Other threads' writes wait instead of landing inside this group.
+            con.execute("BEGIN")  # Explicit BEGIN so savepoints nest inside it.
+            self._tx.depth = 1
+            try:
+                yield con
+                con.commit()  # One commit for the whole group.
+            except BaseException:
+                con.rollback()  # Undo the whole group.
+                raise
+            finally:
+                self._tx.depth = 0
+
+    @contextmanager  # "with db.savepoint():" lets one step fail without undoing the rest of a transaction().
+    def savepoint(self, name: str = "step") -> Iterator[sqlite3.Connection]:
+        con = self.connect()
+        con.execute(f"SAVEPOINT {name}")
+        try:
+            yield con
+        except BaseException:
+            con.execute(f"ROLLBACK TO {name}")  # Undo just this step...
+            raise
+        finally:
+            con.execute(f"RELEASE {name}")  # ...and close the savepoint either way.
+
+    # --- change notifications (Observer) ---
+    def subscribe(self, table: str, callback: Callable[[str, int | None], None]) -> None:  # Call back on writes to a table.
+        self._listeners.setdefault(table, []).append(callback)  # Every repo on this Database shares the list.
+
+    def notify(self, table: str, event: str, row_id: int | None = None) -> None:  # Tell listeners a row changed ("add", "update", "delete").
+        for cb in list(self._listeners.get(table, ())):  # Copy so callbacks may subscribe others.
+            cb(event, row_id)
 
     # --- schema ---
     def _ensure_schema(self) -> None:  # Create tables the first time the app runs.
@@ -82,3 +229,59 @@ class Database:  # Our database manager.
             FOREIGN KEY(user_id) REFERENCES users(id),
             FOREIGN KEY(car_id) REFERENCES cars(id)
         )""")  # Bookings table schema.
+        # Archive table: same columns as bookings plus when the row was moved.
+        cur.execute("""CREATE TABLE IF NOT EXISTS bookings_archive (
+            id INTEGER PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            car_id INTEGER NOT NULL,
+            start_date TEXT NOT NULL,
+            end_date TEXT NOT NULL,
+            total_price REAL NOT NULL,
+            status TEXT NOT NULL,
+            archived_at TEXT NOT NULL
+        )""")  # Historical bookings live here so hot queries only scan the live set.
+        # Short-lived reservations while a customer confirms a quote.
+        cur.execute("""CREATE TABLE IF NOT EXISTS holds (
+            token TEXT PRIMARY KEY,
+            user_id INTEGER NOT NULL,
+            car_id INTEGER NOT NULL,
+            start_date TEXT NOT NULL,
+            end_date TEXT NOT NULL,
+            expires_at TEXT NOT NULL
+        )""")  # Expired rows are ignored by every query and swept in the background.
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_holds_car ON holds(car_id, expires_at)")  # "Is this car held right now?"
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_holds_expires ON holds(expires_at)")  # Sweeper and "all live holds".
+        # Who changed what (written in batches by storage/audit.py).
+        cur.execute("""CREATE TABLE IF NOT EXISTS audit_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            ts TEXT NOT NULL,
+            actor TEXT,
+            action TEXT NOT NULL,
+            entity TEXT NOT NULL,
+            entity_id TEXT,
+            before_json TEXT,
+            after_json TEXT
+        )""")  # Append-only: nothing in the app updates or deletes these rows.
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_audit_entity ON audit_log(entity, entity_id)")  # History of one car/booking/user.
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_audit_actor ON audit_log(actor)")  # Everything one admin did.
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_bookings_end_date ON bookings(end_date)")  # Lets the archiver find old rows fast.
+        # Additive columns for databases created by older versions.
+        self._add_column("bookings", "payment_key", "TEXT")  # Idempotency key of the payment behind the booking.
+        self._add_column("bookings_archive", "payment_key", "TEXT")  # Archive keeps the same columns.
+        self._add_column("bookings", "created_at", "TEXT")  # UTC time the booking was placed (NULL for older rows).
+        self._add_column("bookings_archive", "created_at", "TEXT")
+        self._add_column("cars", "version", "INTEGER NOT NULL DEFAULT 1")  # Bumped by every write; CAS updates compare it.
+        self._add_column("bookings", "version", "INTEGER NOT NULL DEFAULT 1")
+        self._add_column("bookings", "car_version", "INTEGER")  # Car version right after approval took it out of service.
+        cur.execute("CREATE UNIQUE INDEX IF NOT EXISTS idx_bookings_payment_key ON bookings(payment_key)")  # One booking per payment (NULLs allowed).
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_bookings_user_start ON bookings(user_id, start_date)")  # A customer's history, already in date order.
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_bookings_status ON bookings(status)")  # Pending queue and status filters.
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_bookings_car_status ON bookings(car_id, status)")  # "Does this car still have an approved booking?"
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_bookings_archive_user_start ON bookings_archive(user_id, start_date)")  # Same for archived history.
+        con.commit()  # Save the schema.
+
+    def _add_column(self, table: str, column: str, decl: str) -> None:  # ALTER TABLE only if the column is missing.
+        cur = self._conn.cursor()
+        cur.execute(f"PRAGMA table_info({table})")  # List existing columns.
+        if column not in {r[1] for r in cur.fetchall()}:
+            cur.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
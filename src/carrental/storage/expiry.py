@@ -0,0 +1,60 @@
+# ==============================================================================
+# Booking housekeeping: expire forgotten requests, close finished trips.
+# Every step tells you plainly what it does.
+
+# ==============================================================================
+
+"""Booking lifecycle jobs: PENDING -> EXPIRED and APPROVED -> COMPLETED, in small batches."""  # Keeps the review queue short.
+
+from __future__ import annotations  # Modern hints.
+from datetime import date, datetime, timedelta, timezone  # Hold time and "today".
+from typing import Dict, Optional  # Type names.
+from carrental.storage.db import Database  # DB helper.
+
+class BookingExpirer:  # Same shape as BookingArchiver: one short transaction per batch.
+    """Expire PENDING bookings nobody reviewed in time; complete APPROVED bookings that have ended."""  # Human description.
+    def __init__(self, db: Database, *, hold_hours: float = 48.0, batch_size: int = 200) -> None:
+        self.db = db  # Use a Database of its own when running on a background thread.
+        self.hold_hours = hold_hours  # How long a request may wait for an admin.
+        self.batch_size = batch_size  # Rows changed per transaction.
+
+    def expire_batch(self, now: datetime) -> int:  # At most one batch of PENDING -> EXPIRED; returns rows changed.
+        cutoff = (now - timedelta(hours=self.hold_hours)).isoformat(timespec="seconds")
+        with self.db.write() as cur:  # One statement, so a concurrent approval is never overwritten.
+            cur.execute("UPDATE bookings SET status='EXPIRED', version=version+1 WHERE id IN (SELECT id FROM bookings"
+                        " WHERE status='PENDING' AND (created_at < ? OR start_date < ?) ORDER BY id LIMIT ?)",
+                        (cutoff, now.date().isoformat(), self.batch_size))  # Trips that already started can never be approved.
+            return cur.rowcount
+
+    def complete_batch(self, today: date) -> int:  # At most one batch of APPROVED -> COMPLETED; frees their cars.
+        with self.db.write() as cur:
+            cur.execute("SELECT id, car_id FROM bookings WHERE status='APPROVED' AND end_date < ? ORDER BY id LIMIT ?",
+                        (today.isoformat(), self.batch_size))
+            rows = cur.fetchall()
+            if not rows:
+                return 0
+            ids = [r[0] for r in rows]
+            cars = sorted({r[1] for r in rows})
+            cur.execute(f"UPDATE bookings SET status='COMPLETED', version=version+1 WHERE status='APPROVED' AND id IN ({','.join('?' * len(ids))})", ids)
+            done = cur.rowcount
+            # Only undo what approval did: a car edited since (e.g. an admin set Available = n) stays as it is.
+            # car_version is NULL for trips approved before it existed; those cars are freed as before.
+            cur.execute(f"UPDATE cars SET available=1, version=version+1 WHERE available=0 AND id IN ({','.join('?' * len(cars))})"
+                        " AND NOT EXISTS (SELECT 1 FROM bookings b WHERE b.car_id = cars.id AND b.status = 'APPROVED')"  # Uses idx_bookings_car_status.
+                        f" AND EXISTS (SELECT 1 FROM bookings b WHERE b.car_id = cars.id AND b.id IN ({','.join('?' * len(ids))})"
+                        " AND (b.car_version IS NULL OR b.car_version = cars.version))",
+                        (*cars, *ids))
+            return done
+
+    def run(self, *, now: Optional[datetime] = None, max_batches: Optional[int] = None) -> Dict[str, int]:  # Both jobs until done (or max_batches each).
+        now = now or datetime.now(timezone.utc)
+        out = {"expired": 0, "completed": 0}
+        for key, step in (("expired", lambda: self.expire_batch(now)), ("completed", lambda: self.complete_batch(now.date()))):
+            batches = 0
+            while max_batches is None or batches < max_batches:
+                n = step()
+                out[key] += n
+                batches += 1
+                if n < self.batch_size:  # Short batch means nothing is left.
+                    break
+        return out
@@ -0,0 +1,129 @@
+# ==============================================================================
+# Group-commit writer: many booking inserts share one transaction.
+# Every step tells you plainly what it does.
+
+# ==============================================================================
+
+"""Write-behind booking queue flushed every N ms or M items (group commit)."""  # One fsync for a whole burst.
+
+from __future__ import annotations  # Modern hints.
+import queue, sqlite3, threading, time  # Work queue, driver, background thread, clocks.
+from concurrent.futures import Future  # Each caller waits on its own future.
+from typing import List, Optional, Tuple  # Type names.
+from carrental.storage.db import Database  # DB helper (used for the path and schema).
+from carrental.storage.repositories import _BOOKING_INSERT, _booking_params, _utc_stamp  # Same insert (and hold check) as BookingRepository.
+
+_SYNC = {"full": "FULL", "normal": "NORMAL", "off": "OFF"}  # Durability level -> PRAGMA synchronous value.
+_STOP = object()  # Marker that tells the thread to finish.
+
+class GroupCommitWriter:  # Owns its own connection and a background flush thread.
+    """Queue booking inserts and commit them in batches; futures resolve to the new booking id."""  # Human description.
+    def __init__(self, db: Database, *, max_items: int = 64, max_delay_ms: float = 5.0, durability: str = "full") -> None:
+        if durability not in _SYNC:
+            raise ValueError(f"durability must be one of {sorted(_SYNC)}")
+        self.max_items = max_items  # Flush when this many inserts are waiting...
+        self.max_delay = max_delay_ms / 1000.0  # ...or when the oldest one has waited this long.
+        self.durability = durability  # full = strongest fsync, normal = fewer syncs, off = leave flushing to the OS.
+        self._writer_db = Database(db.path)  # Separate connection so batches never mix with other threads' work.
+        self._queue: "queue.Queue" = queue.Queue()
+        self._closed = False  # Set by close(); checked with the put so nothing lands after _STOP.
+        self._state = threading.Lock()  # Guards _closed and the _STOP put.
+        self.batches = 0  # Stats: how many commits were made...
+        self.items = 0  # ...and how many rows they carried.
+        con = self._writer_db.connect()
+        con.execute(f"PRAGMA synchronous={_SYNC[durability]}")
+        self._thread = threading.Thread(target=self._run, name="booking-group-commit", daemon=True)
+        self._thread.start()
+
+    def submit(self, user_id: int, car_id: int, start: str, end: str, total_price: float, payment_key: Optional[str] = None) -> "Future[int]":
+        """Queue one booking insert; the future gets the booking id once its batch commits."""
+        fut: "Future[int]" = Future()
+        with self._state:  # Either queued before _STOP (and flushed) or refused.
+            if self._closed:
+                raise RuntimeError("GroupCommitWriter is closed")
+            self._queue.put((fut, _booking_params(user_id, car_id, start, end, total_price, payment_key, _utc_stamp())))
+        return fut
+
+    def create(self, user_id: int, car_id: int, start: str, end: str, total_price: float, payment_key: Optional[str] = None) -> bool:
+        """Drop-in for BookingRepository.create: waits for the batch, returns True/False."""
+        try:
+            self.submit(user_id, car_id, start, end, total_price, payment_key).result()
+            return True
+        except sqlite3.IntegrityError:
+            return False
+
+    def close(self) -> None:  # Flush everything still queued, then stop the thread (safe to call twice).
+        with self._state:
+            if not self._closed:
+                self._closed = True
+                self._queue.put(_STOP)
+        self._thread.join()
+        if self._writer_db._conn is not None:
+            self._writer_db._conn.close()
+            self._writer_db._conn = None
+
+    def __enter__(self) -> "GroupCommitWriter":
+        return self
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    # --- background thread ---
+    def _run(self) -> None:
+        stopping = False
+        while not stopping:
+            first = self._queue.get()  # Sleep until there is work.
+            if first is _STOP:
+                break
+            batch: List[Tuple[Future, tuple]] = [first]
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.max_items:  # Gather more until full or the delay runs out.
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=left)
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stopping = True  # Flush this batch, then exit.
+                    break
+                batch.append(item)
+            self._flush(batch)
+        while True:  # Anything left after _STOP still gets written.
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is not _STOP:
+                self._flush([item])
+
+    def _flush(self, batch: List[Tuple[Future, tuple]]) -> None:  # One transaction for the whole batch.
+        con = self._writer_db.connect()
+        results: List[Tuple[Future, object, bool]] = []
+        try:
+            with self._writer_db.unit_of_work():
+                cur = con.cursor()
+                cur.execute("BEGIN")  # Explicit, so the savepoints below nest inside one transaction.
+                for fut, row in batch:
+                    cur.execute("SAVEPOINT one")  # A bad row (e.g. duplicate payment_key) must not sink the batch.
+                    try:
+                        cur.execute(_BOOKING_INSERT, row)
+                        if cur.rowcount == 1:
+                            results.append((fut, cur.lastrowid, True))
+                        else:  # Another customer holds these dates; create() maps this to False like a duplicate.
+                            results.append((fut, sqlite3.IntegrityError("car is held or booked by someone else for these dates"), False))
+                    except sqlite3.Error as ex:
+                        cur.execute("ROLLBACK TO one")
+                        results.append((fut, ex, False))
+                    cur.execute("RELEASE one")
+        except Exception as ex:  # Commit itself failed: every caller in the batch sees it.
+            for fut, _ in batch:
+                fut.set_exception(ex)
+            return
+        self.batches += 1
+        self.items += len(batch)
+        for fut, value, ok in results:  # Resolve only after the commit is durable.
+            if ok:
+                fut.set_result(value)
+            else:
+                fut.set_exception(value)
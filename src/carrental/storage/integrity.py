@@ -0,0 +1,172 @@
+# ==============================================================================
+# Consistency checks over the whole database, split by id range across workers.
+# Every step tells you plainly what it does.
+#   - DESIGN PATTERN: Map/Reduce (each worker checks one id range; results are merged into one plan)
+# ==============================================================================
+
+"""Integrity checker: orphans, double-booked cars, stuck availability flags and price drift, plus a repair plan."""  # Finds what the app should never have let happen.
+
+from __future__ import annotations  # Modern hints.
+import sqlite3, threading, time  # Read-only worker connections, one per thread, timings.
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor  # Threads (SQLite releases the GIL) or processes.
+from dataclasses import dataclass, field  # Issue and report records.
+from datetime import date  # "Active booking" cut-off.
+from pathlib import Path  # Read-only file URI.
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple  # Type names.
+from carrental.core.strategies import PricingStrategy, WeekendMultiplierStrategy  # Price recomputation (the app's default).
+from carrental.storage.db import Database  # Where to find the file; repairs run through it.
+
+@dataclass
+class Issue:  # One problem; repair is (sql, params) or None when a person has to decide.
+    check: str
+    entity: str  # "booking" or "car".
+    entity_id: int
+    detail: str
+    repair: Optional[Tuple[str, Tuple[Any, ...]]] = None
+    advisory: bool = False  # Worth a look but may be legitimate (rate changed, car parked): never planned, never fails the run.
+
+@dataclass
+class IntegrityReport:
+    issues: List[Issue] = field(default_factory=list)
+    chunks: int = 0  # Id ranges checked.
+    seconds: float = 0.0
+
+    def counts(self) -> Dict[str, int]:  # Issues per check.
+        out: Dict[str, int] = {}
+        for issue in self.issues:
+            out[issue.check] = out.get(issue.check, 0) + 1
+        return out
+
+    def plan(self) -> List[Dict[str, Any]]:  # Repairs in a stable order, each statement once.
+        seen, out = set(), []
+        for issue in sorted(self.issues, key=lambda i: (i.check, i.entity_id)):
+            if issue.repair and issue.repair not in seen:
+                seen.add(issue.repair)
+                out.append({"check": issue.check, "entity": issue.entity, "id": issue.entity_id, "sql": issue.repair[0], "params": list(issue.repair[1])})
+        return out
+
+    def needs_review(self) -> List[Issue]:  # Problems with no automatic fix (money already taken, etc.).
+        return [i for i in self.issues if i.repair is None and not i.advisory]
+
+    def advisories(self) -> List[Issue]:  # Reported for information only.
+        return [i for i in self.issues if i.advisory]
+
+# --- checks: each gets a cursor and an id range, returns issues ---
+
+def _orphans(cur: sqlite3.Cursor, lo: int, hi: int, ctx: Dict[str, Any]) -> List[Issue]:  # Bookings whose user or car is gone.
+    cur.execute("SELECT b.id, b.status, b.user_id, b.car_id, u.id IS NULL AS no_user, c.id IS NULL AS no_car FROM bookings b"
+                " LEFT JOIN users u ON u.id = b.user_id LEFT JOIN cars c ON c.id = b.car_id"
+                " WHERE b.id BETWEEN ? AND ? AND (u.id IS NULL OR c.id IS NULL)", (lo, hi))
+    out = []
+    for bid, status, uid, cid, no_user, no_car in cur.fetchall():
+        missing = " and ".join(x for x, gone in ((f"user {uid}", no_user), (f"car {cid}", no_car)) if gone)
+        repair = None if status in ("APPROVED", "COMPLETED") else ("DELETE FROM bookings WHERE id = ?", (bid,))  # Paid trips need a person.
+        out.append(Issue("orphan_booking", "booking", bid, f"{status} booking points at missing {missing}", repair))
+    return out
+
+def _overlaps(cur: sqlite3.Cursor, lo: int, hi: int, ctx: Dict[str, Any]) -> List[Issue]:  # Two approved bookings, same car, same days.
+    # Split by car: walk each car's approved trips in start order and compare with the latest end so far (one sort, no pairwise join).
+    cur.execute("SELECT id, car_id, start_date, end_date, prev_end FROM ("
+                " SELECT id, car_id, start_date, end_date, MAX(end_date) OVER"
+                "  (PARTITION BY car_id ORDER BY start_date, id ROWS BETWEEN UNBOUNDED PRECEDING AND 1 PRECEDING) AS prev_end"
+                " FROM bookings WHERE car_id BETWEEN ? AND ? AND status = 'APPROVED')"
+                " WHERE prev_end >= start_date", (lo, hi))
+    return [Issue("overlapping_approved", "booking", bid, f"car {car} {start}..{end} overlaps an earlier approved trip (ending {prev_end})")
+            for bid, car, start, end, prev_end in cur.fetchall()]  # Both trips are paid: a person picks which customer to move or refund.
+
+def _idle_unavailable(cur: sqlite3.Cursor, lo: int, hi: int, ctx: Dict[str, Any]) -> List[Issue]:  # Flag says booked, no booking says so.
+    # Only a flag that approval set (the booking remembers the car version it produced) and nobody touched since is put back;
+    # anything else may be an admin parking the car, which is reported but left alone.
+    cur.execute("SELECT id, version, EXISTS (SELECT 1 FROM bookings b WHERE b.car_id = cars.id AND b.status IN ('APPROVED', 'COMPLETED')"
+                "  AND b.car_version = cars.version) AS from_booking FROM cars WHERE id BETWEEN ? AND ? AND available = 0"
+                " AND NOT EXISTS (SELECT 1 FROM bookings b WHERE b.car_id = cars.id AND b.status = 'APPROVED' AND b.end_date >= ?)",
+                (lo, hi, ctx["today"]))
+    out = []
+    for cid, version, from_booking in cur.fetchall():
+        if from_booking:
+            out.append(Issue("unavailable_without_booking", "car", cid, "still unavailable after its last approved booking ended",
+                             ("UPDATE cars SET available = 1, version = version + 1 WHERE id = ? AND available = 0 AND version = ?", (cid, version))))
+        else:
+            out.append(Issue("unavailable_without_booking", "car", cid, "unavailable with no active booking (parked on purpose?)", advisory=True))
+    return out
+
+def _prices(cur: sqlite3.Cursor, lo: int, hi: int, ctx: Dict[str, Any]) -> List[Issue]:  # Stored total vs the pricing strategy today.
+    # The rate at booking time is not stored, so a difference is usually a later rate change: report it, never re-price.
+    pricing: PricingStrategy = ctx["pricing"]
+    cur.execute("SELECT b.id, b.status, b.start_date, b.end_date, b.total_price, c.daily_rate FROM bookings b JOIN cars c ON c.id = b.car_id"
+                " WHERE b.id BETWEEN ? AND ? AND b.status IN ('PENDING', 'APPROVED', 'COMPLETED')", (lo, hi))
+    out = []
+    for bid, status, start, end, total, rate in cur.fetchall():
+        try:
+            expected = round(pricing.quote(rate, start, end)[0], 2)
+        except ValueError as ex:  # E.g. end before start: the dates themselves are wrong.
+            out.append(Issue("price_mismatch", "booking", bid, f"cannot price {start}..{end}: {ex}"))
+            continue
+        if abs(expected - total) > 0.005:
+            out.append(Issue("price_drift", "booking", bid, f"{status} total {total:.2f}, at today's rate {expected:.2f}", advisory=True))
+    return out
+
+CHECKS: Dict[str, Tuple[str, Callable[[sqlite3.Cursor, int, int, Dict[str, Any]], List[Issue]]]] = {  # name -> (table split by id, check).
+    "orphans": ("bookings", _orphans),
+    "overlaps": ("cars", _overlaps),
+    "availability": ("cars", _idle_unavailable),
+    "prices": ("bookings", _prices),
+}
+
+_local = threading.local()  # One read-only connection per worker thread (or process).
+
+def _connection(path: str) -> sqlite3.Connection:
+    cons = getattr(_local, "cons", None)
+    if cons is None:
+        cons = _local.cons = {}
+    con = cons.get(path)
+    if con is None:
+        con = cons[path] = sqlite3.connect(Path(path).as_uri() + "?mode=ro", uri=True)  # Checks never write.
+    return con
+
+def _check_range(path: str, check: str, lo: int, hi: int, ctx: Dict[str, Any]) -> List[Issue]:  # Runs inside a worker (module level so processes can pickle it).
+    return CHECKS[check][1](_connection(path).cursor(), lo, hi, ctx)
+
+class IntegrityChecker:  # Splits every check into id ranges and runs them on a pool.
+    """Read-only scan of the database; run() returns an IntegrityReport whose plan() lists the fixes."""  # Human description.
+    def __init__(self, db: Database, *, workers: int = 4, chunk_size: int = 10_000, processes: bool = False,
+                 pricing: Optional[PricingStrategy] = None, today: Optional[date] = None) -> None:
+        self.db = db
+        self.workers = max(1, workers)
+        self.chunk_size = max(1, chunk_size)
+        self.processes = processes  # True: price checks (pure Python) use every core; the strategy must be picklable.
+        self.pricing = pricing or WeekendMultiplierStrategy()  # Same default as RentalService.
+        self.today = today
+
+    def ranges(self, table: str) -> List[Tuple[int, int]]:  # [lo, hi] id ranges covering the table.
+        with self.db.read() as cur:  # Read-only: no transaction, no commit.
+            cur.execute(f"SELECT MIN(id), MAX(id) FROM {table}")
+            lo, hi = cur.fetchone()
+        if lo is None:
+            return []
+        return [(start, min(start + self.chunk_size - 1, hi)) for start in range(lo, hi + 1, self.chunk_size)]
+
+    def run(self, checks: Sequence[str] = tuple(CHECKS)) -> IntegrityReport:
+        unknown = [c for c in checks if c not in CHECKS]
+        if unknown:
+            raise ValueError(f"unknown checks: {', '.join(unknown)} (choose from {', '.join(CHECKS)})")
+        ctx = {"today": (self.today or date.today()).isoformat(), "pricing": self.pricing}
+        tasks = [(check, lo, hi) for check in checks for lo, hi in self.ranges(CHECKS[check][0])]
+        report = IntegrityReport(chunks=len(tasks))
+        start = time.perf_counter()
+        pool: Executor = ProcessPoolExecutor(self.workers) if self.processes else ThreadPoolExecutor(self.workers, thread_name_prefix="integrity")
+        with pool:
+            futures = [pool.submit(_check_range, self.db.path, check, lo, hi, ctx) for check, lo, hi in tasks]
+            for fut in futures:  # Submission order, so the report is the same on every run.
+                report.issues.extend(fut.result())
+        report.seconds = time.perf_counter() - start
+        return report
+
+def apply_plan(db: Database, plan: List[Dict[str, Any]]) -> int:  # Run every repair in one transaction; returns rows changed.
+    changed = 0
+    with db.transaction() as con:
+        for step in plan:
+            changed += con.execute(step["sql"], tuple(step["params"])).rowcount
+    if changed:
+        db.notify("cars", "bulk", None)  # Availability may have changed.
+    return changed
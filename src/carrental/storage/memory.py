@@ -0,0 +1,336 @@
+# ==============================================================================
+# Pure in-memory storage engine (no SQLite) for tests and load simulation.
+# Every step tells you plainly what it does.
+#   - DESIGN PATTERN: Repository (same methods as the SQLite repositories)
+# ==============================================================================
+
+"""In-memory backend: dict tables plus sorted id indexes."""  # Same shapes as the SQLite rows, at memory speed.
+
+from __future__ import annotations  # Modern hints.
+import threading  # One lock per table keeps threaded load tests safe.
+from contextlib import nullcontext  # No hold table to lock when bookings stand alone.
+from datetime import date  # "Today" for the totals.
+from bisect import bisect_left, insort  # Keep index lists sorted without re-sorting.
+from typing import Any, Callable, Dict, List, Optional  # Type names.
+from carrental.storage.repositories import ConflictError, _hash, _utc_stamp  # Same conflicts, password hashing and timestamps as SQLite.
+from carrental.storage.bulk import CarFilter, parse_changes  # Same bulk update specs as SQLite.
+
+def _index_remove(ids: List[int], item: int) -> None:  # Drop one id from a sorted list.
+    i = bisect_left(ids, item)  # Binary search for it.
+    if i < len(ids) and ids[i] == item:  # Only remove if it is really there.
+        del ids[i]
+
+class MemoryUserRepository:  # Users kept in a dict keyed by id.
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._rows: Dict[int, Dict[str, Any]] = {}  # id -> row.
+        self._by_email: Dict[str, int] = {}  # Unique index like the SQLite UNIQUE constraint.
+        self._next_id = 1  # Acts like AUTOINCREMENT.
+        self.bookings: Optional["MemoryBookingRepository"] = None  # Set by MemoryBackend: users with bookings cannot be deleted.
+    def get_by_email(self, email: str) -> Optional[Dict]:
+        with self._lock:
+            uid = self._by_email.get(email)
+            return dict(self._rows[uid]) if uid is not None else None
+    def create(self, email: str, password: str, name: str, role: str) -> bool:
+        with self._lock:
+            if email in self._by_email:  # Duplicate email fails, same as SQLite.
+                return False
+            uid = self._next_id; self._next_id += 1
+            self._rows[uid] = {"id": uid, "email": email, "password_hash": _hash(password), "name": name, "role": role}
+            self._by_email[email] = uid
+            return True
+    def verify(self, email: str, password: str) -> Optional[Dict]:
+        user = self.get_by_email(email)
+        if not user or user["password_hash"] != _hash(password):
+            return None
+        return user
+    def list_by_role(self, role: str) -> List[Dict]:
+        with self._lock:
+            return [dict(r) for r in self._rows.values() if r["role"] == role]  # Dict keeps insertion (= id) order.
+    def list_admins(self) -> List[Dict]:
+        return self.list_by_role("admin")
+    def delete_by_id(self, user_id: int) -> bool:
+        if self.bookings is not None and self.bookings.uses_user(user_id):
+            return False
+        with self._lock:
+            row = self._rows.pop(user_id, None)
+            if row is None:
+                return False
+            del self._by_email[row["email"]]
+            return True
+    def delete_by_email(self, email: str) -> bool:
+        with self._lock:
+            uid = self._by_email.get(email)
+            return self.delete_by_id(uid) if uid is not None else False
+    def set_password(self, email: str, new_password: str) -> bool:
+        return self._set(email, "password_hash", _hash(new_password))
+    def set_email(self, old_email: str, new_email: str) -> bool:
+        with self._lock:
+            uid = self._by_email.get(old_email)
+            if uid is None or (new_email != old_email and new_email in self._by_email):  # Missing user or email taken.
+                return False
+            del self._by_email[old_email]
+            self._by_email[new_email] = uid
+            self._rows[uid]["email"] = new_email
+            return True
+    def set_name(self, email: str, new_name: str) -> bool:
+        return self._set(email, "name", new_name)
+    def _set(self, email: str, field: str, value: Any) -> bool:
+        with self._lock:
+            uid = self._by_email.get(email)
+            if uid is None:
+                return False
+            self._rows[uid][field] = value
+            return True
+
+class MemoryCarRepository:  # Cars in a dict plus a sorted index of available ids.
+    _FIELDS = ("make", "model", "year", "mileage", "daily_rate", "min_days", "max_days", "available")  # Updatable columns.
+    def __init__(self) -> None:
+        self._lock = threading.RLock()
+        self._rows: Dict[int, Dict[str, Any]] = {}
+        self._available: List[int] = []  # Sorted ids where available == 1.
+        self._next_id = 1
+        self._listeners: List[Callable[[str, Optional[int]], None]] = []  # Same Observer hook as CarRepository.
+        self.bookings: Optional["MemoryBookingRepository"] = None  # Set by MemoryBackend: booked cars cannot be deleted (SQLite foreign key).
+    def subscribe(self, callback: Callable[[str, Optional[int]], None]) -> None:
+        self._listeners.append(callback)
+    def _notify(self, event: str, car_id: Optional[int]) -> None:  # Called outside the lock so listeners may read back.
+        for cb in list(self._listeners):
+            cb(event, car_id)
+    def list(self, *, only_available: bool = True) -> List[Dict]:
+        with self._lock:
+            if only_available:
+                return [dict(self._rows[i]) for i in self._available]
+            return [dict(r) for r in self._rows.values()]
+    def add(self, make: str, model: str, year: int, mileage: int, daily_rate: float, available: bool, min_days: int, max_days: int, vehicle_type: str) -> bool:
+        with self._lock:
+            cid = self._next_id; self._next_id += 1
+            self._rows[cid] = {"id": cid, "make": make, "model": model, "year": year, "mileage": mileage, "daily_rate": daily_rate,
+                               "available": 1 if available else 0, "min_days": min_days, "max_days": max_days, "vehicle_type": vehicle_type, "version": 1}
+            if available:
+                insort(self._available, cid)
+        self._notify("add", cid)
+        return True
+    def update(self, car_id: int, *, expected_version: Optional[int] = None, **fields: Any) -> bool:
+        changes = {k: v for k, v in fields.items() if k in self._FIELDS and v is not None}  # Same "only provided fields" rule.
+        if not changes:
+            return False
+        with self._lock:
+            row = self._rows.get(car_id)
+            if row is None:
+                return False
+            if expected_version is not None and row["version"] != expected_version:
+                raise ConflictError("car", car_id, dict(row))
+            row["version"] += 1
+            if "available" in changes:
+                self._set_available_locked(row, bool(changes.pop("available")))
+            row.update(changes)
+        self._notify("update", car_id)
+        return True
+    def delete(self, car_id: int) -> bool:
+        if self.bookings is not None and self.bookings.uses_car(car_id):
+            return False
+        with self._lock:
+            row = self._rows.pop(car_id, None)
+            if row is None:
+                return False
+            _index_remove(self._available, car_id)
+        self._notify("delete", car_id)
+        return True
+    def get(self, car_id: int) -> Optional[Dict]:
+        with self._lock:
+            row = self._rows.get(car_id)
+            return dict(row) if row else None
+    def set_availability(self, car_id: int, available: bool) -> Optional[int]:
+        with self._lock:
+            row = self._rows.get(car_id)
+            if row is None:
+                return None
+            self._set_available_locked(row, available)
+            row["version"] += 1
+            version = row["version"]
+        self._notify("update", car_id)
+        return version
+    def toggle_availability(self, car_id: int) -> None:
+        with self._lock:
+            row = self._rows.get(car_id)
+            if row is None:
+                return
+            self._set_available_locked(row, not row["available"])
+            row["version"] += 1
+        self._notify("update", car_id)
+    def bulk_update(self, flt: CarFilter, changes, *, dry_run: bool = False) -> int:  # Same contract as CarRepository.bulk_update.
+        plan = parse_changes(changes)
+        with self._lock:
+            hits = [row for row in self._rows.values() if flt.matches(row)]
+            if dry_run:
+                return len(hits)
+            for row in hits:
+                new = dict(row)
+                for change in plan:
+                    change.apply(new)
+                available = new.pop("available")
+                new["version"] += 1
+                row.update(new)
+                self._set_available_locked(row, bool(available))  # Keep the index in step.
+        if hits:
+            self._notify("bulk", None)
+        return len(hits)
+    def _set_available_locked(self, row: Dict[str, Any], available: bool) -> None:  # Keep the flag and the index in step.
+        if available and not row["available"]:
+            insort(self._available, row["id"])
+        elif not available and row["available"]:
+            _index_remove(self._available, row["id"])
+        row["available"] = 1 if available else 0
+
+class MemoryBookingRepository:  # Bookings in a dict plus sorted per-user and per-status indexes.
+    def __init__(self, users: Optional[MemoryUserRepository] = None, cars: Optional[MemoryCarRepository] = None) -> None:
+        self._users = users  # For the joined history view (names instead of ids).
+        self._cars = cars
+        self._lock = threading.RLock()
+        self._rows: Dict[int, Dict[str, Any]] = {}
+        self._by_user: Dict[int, List[int]] = {}  # user_id -> sorted booking ids.
+        self._by_status: Dict[str, List[int]] = {}  # status -> sorted booking ids.
+        self._by_payment_key: Dict[str, int] = {}  # payment_key -> booking id.
+        self._next_id = 1
+        self.holds: Optional["MemoryHoldRepository"] = None  # Set by MemoryBackend: another customer's live hold blocks a booking.
+    def create(self, user_id: int, car_id: int, start: str, end: str, total_price: float, payment_key: Optional[str] = None) -> bool:
+        holds = self.holds
+        with holds._lock if holds else nullcontext(), self._lock:  # Holds first, the same order as MemoryHoldRepository.place.
+            if holds and holds._blocks_locked(user_id, car_id, start, end, _utc_stamp()):
+                return False
+            if payment_key is not None and payment_key in self._by_payment_key:  # Same rule as the UNIQUE index.
+                return False
+            if any(r["car_id"] == car_id and r["status"] in ("PENDING", "APPROVED") and r["end_date"] >= start and r["start_date"] <= end
+                   for r in self._rows.values()):  # Same overlap rule as the insert guard and MemoryHoldRepository.place.
+                return False
+            bid = self._next_id; self._next_id += 1
+            self._rows[bid] = {"id": bid, "user_id": user_id, "car_id": car_id, "start_date": start, "end_date": end,
+                               "total_price": total_price, "status": "PENDING", "payment_key": payment_key, "created_at": _utc_stamp(), "version": 1, "car_version": None}
+            if payment_key is not None:
+                self._by_payment_key[payment_key] = bid
+            insort(self._by_user.setdefault(user_id, []), bid)
+            insort(self._by_status.setdefault("PENDING", []), bid)
+            return True
+    def list(self, *, user_id: Optional[int] = None, status: Optional[str] = None, include_archive: bool = False) -> List[Dict]:  # Nothing is ever archived in memory.
+        with self._lock:
+            if user_id is not None and status is not None:  # Walk the smaller index, filter by the other field.
+                a, b = self._by_user.get(user_id, []), self._by_status.get(status, [])
+                ids = [i for i in (a if len(a) <= len(b) else b) if self._rows[i]["user_id"] == user_id and self._rows[i]["status"] == status]
+            elif user_id is not None:
+                ids = self._by_user.get(user_id, [])
+            elif status is not None:
+                ids = self._by_status.get(status, [])
+            else:
+                ids = list(self._rows.keys())
+            return [dict(self._rows[i]) for i in reversed(ids)]  # Newest first, like ORDER BY id DESC.
+    def get_by_payment_key(self, payment_key: str) -> Optional[Dict]:
+        with self._lock:
+            bid = self._by_payment_key.get(payment_key)
+            return dict(self._rows[bid]) if bid is not None else None
+    def _matching(self, user_id: Optional[int], status: Optional[str], date_from: Optional[str], date_to: Optional[str]) -> List[Dict]:  # Filtered copies.
+        rows = self.list(user_id=user_id, status=status)
+        return [r for r in rows if (date_from is None or r["end_date"] >= date_from) and (date_to is None or r["start_date"] <= date_to)]
+    def history(self, *, user_id: Optional[int] = None, status: Optional[str] = None, date_from: Optional[str] = None, date_to: Optional[str] = None,
+                limit: Optional[int] = None, offset: int = 0, include_archive: bool = False) -> List[Dict]:  # Same rows as the SQLite join.
+        rows = sorted(self._matching(user_id, status, date_from, date_to), key=lambda r: (r["start_date"], r["id"]), reverse=True)
+        rows = rows[offset:] if limit is None else rows[offset:offset + limit]
+        out = []
+        for r in rows:
+            car = self._cars.get(r["car_id"]) if self._cars else None
+            user = self._users._rows.get(r["user_id"]) if self._users else None
+            r.pop("payment_key", None)  # The joined view does not carry these (same as SQLite).
+            r.pop("created_at", None)
+            r.pop("version", None)
+            r.pop("car_version", None)
+            r.update(make=car and car["make"], model=car and car["model"], vehicle_type=car and car["vehicle_type"],
+                     user_name=user and user["name"], user_email=user and user["email"])
+            out.append(r)
+        return out
+    def totals(self, *, user_id: Optional[int] = None, date_from: Optional[str] = None, date_to: Optional[str] = None,
+               today: Optional[str] = None, include_archive: bool = True) -> Dict[str, Any]:
+        day = today or date.today().isoformat()
+        rows = self._matching(user_id, None, date_from, date_to)
+        spent = sum(r["total_price"] for r in rows if r["status"] in ("APPROVED", "COMPLETED") and r["start_date"] <= day)
+        upcoming = sum(1 for r in rows if r["status"] in ("PENDING", "APPROVED") and r["start_date"] > day)
+        return {"bookings": len(rows), "spent": round(float(spent), 2), "upcoming": upcoming}
+    def overlapping(self, start: str, end: str) -> List[Dict]:
+        with self._lock:
+            return [{"car_id": r["car_id"], "start_date": r["start_date"], "end_date": r["end_date"], "status": r["status"]}
+                    for r in self._rows.values()
+                    if r["status"] in ("PENDING", "APPROVED") and r["end_date"] >= start and r["start_date"] <= end]
+    def set_status(self, booking_id: int, status: str, *, expected_version: Optional[int] = None) -> None:
+        with self._lock:
+            row = self._rows.get(booking_id)
+            if row is None:
+                return
+            if expected_version is not None and row["version"] != expected_version:
+                raise ConflictError("booking", booking_id, dict(row))
+            row["version"] += 1  # SQLite bumps it even when the status is unchanged.
+            if row["status"] == status:
+                return
+            _index_remove(self._by_status[row["status"]], booking_id)
+            insort(self._by_status.setdefault(status, []), booking_id)
+            row["status"] = status
+    def set_car_version(self, booking_id: int, car_version: Optional[int]) -> None:
+        with self._lock:
+            row = self._rows.get(booking_id)
+            if row is not None:
+                row["car_version"] = car_version
+    def uses_user(self, user_id: int) -> bool:  # Any booking for this user? (foreign-key check)
+        with self._lock:
+            return bool(self._by_user.get(user_id))
+    def uses_car(self, car_id: int) -> bool:  # Any booking for this car? (no car index: a scan is fine for deletes)
+        with self._lock:
+            return any(r["car_id"] == car_id for r in self._rows.values())
+    def get(self, booking_id: int) -> Optional[Dict]:
+        with self._lock:
+            row = self._rows.get(booking_id)
+            return dict(row) if row else None
+
+class MemoryHoldRepository:  # Holds in a dict keyed by token.
+    def __init__(self, bookings: Optional[MemoryBookingRepository] = None) -> None:
+        self._rows: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._bookings = bookings  # Needed for the "already booked" check.
+    def place(self, token: str, user_id: int, car_id: int, start: str, end: str, expires_at: str, now: str) -> bool:
+        with self._lock:  # Check and insert under one lock, like the single SQLite statement.
+            if self._blocks_locked(user_id, car_id, start, end, now):
+                return False
+            if self._bookings and any(b["car_id"] == car_id for b in self._bookings.overlapping(start, end)):
+                return False
+            self._rows[token] = {"token": token, "user_id": user_id, "car_id": car_id, "start_date": start, "end_date": end, "expires_at": expires_at}
+            return True
+    def _blocks_locked(self, user_id: int, car_id: int, start: str, end: str, now: str) -> bool:  # Someone else holds the car on these dates.
+        return any(h["car_id"] == car_id and h["expires_at"] > now and h["user_id"] != user_id
+                   and h["end_date"] >= start and h["start_date"] <= end for h in self._rows.values())
+    def get(self, token: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._rows.get(token)
+            return dict(row) if row else None
+    def release(self, token: str) -> bool:
+        with self._lock:
+            return self._rows.pop(token, None) is not None
+    def live(self, start: str, end: str, now: str, *, car_id: Optional[int] = None, exclude_user: Optional[int] = None) -> List[Dict]:
+        with self._lock:
+            return [{"car_id": h["car_id"], "start_date": h["start_date"], "end_date": h["end_date"], "user_id": h["user_id"]}
+                    for h in self._rows.values()
+                    if h["expires_at"] > now and h["end_date"] >= start and h["start_date"] <= end
+                    and (car_id is None or h["car_id"] == car_id) and (exclude_user is None or h["user_id"] != exclude_user)]
+    def sweep(self, now: str, *, batch_size: int = 500) -> int:
+        with self._lock:
+            dead = [t for t, h in self._rows.items() if h["expires_at"] <= now][:batch_size]
+            for t in dead:
+                del self._rows[t]
+            return len(dead)
+
+class MemoryBackend:  # Bundles the in-memory repositories.
+    """Backend that keeps everything in Python dicts (lost when the process ends)."""  # Human description.
+    name = "memory"
+    def __init__(self) -> None:
+        self.users = MemoryUserRepository()
+        self.cars = MemoryCarRepository()
+        self.bookings = MemoryBookingRepository(self.users, self.cars)
+        self.users.bookings = self.cars.bookings = self.bookings  # Same delete rules as the SQLite foreign keys.
+        self.holds = MemoryHoldRepository(self.bookings)
+        self.bookings.holds = self.holds  # Same hold check in create() as the SQLite insert.
@@ -8,8 +8,22 @@
 
 from __future__ import annotations  # Modern hints.
 import hashlib  # To hash passwords safely.
-from typing import List, Optional, Dict, Any  # Type names.
+import sqlite3  # For the IntegrityError type.
+from datetime import date, datetime, timezone  # "Today" for totals, UTC stamps for new rows.
+from typing import List, Optional, Dict, Any, Callable  # Type names.
 from carrental.storage.db import Database  # DB helper.
+from carrental.storage.bulk import CarFilter, parse_changes, update_sql  # Set-based car updates.
+from carrental.storage.statements import STATEMENTS  # One canonical SQL string per query shape.
+
+class ConflictError(Exception):  # A compare-and-swap write lost: the row changed after it was read.
+    def __init__(self, entity: str, entity_id: int, current: Dict) -> None:
+        super().__init__(f"{entity} {entity_id} was changed by someone else (now version {current['version']})")
+        self.entity = entity
+        self.entity_id = entity_id
+        self.current = current  # The row as it is now, so the caller can show it or retry.
+
+def _utc_stamp() -> str:  # "2030-01-05T09:30:00+00:00": sorts correctly as text.
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
 
 def _hash(pw: str) -> str:  # Turn a plain password into a safe, scrambled string.
     return hashlib.sha256(pw.encode("utf-8")).hexdigest()  # SHA-256 produces a long hex string.
@@ -18,15 +32,13 @@ class UserRepository:  # All user-related SQL goes here.
     def __init__(self, db: Database) -> None:  # Build the repo.
         self.db = db  # Save the DB so we can use it later.
     def get_by_email(self, email: str) -> Optional[Dict]:  # Find a user by email.
-        with self.db.unit_of_work() as con:  # Open a transaction.
-            cur = con.cursor()  # Get a cursor.
+        with self.db.read() as cur:  # Read-only: no transaction, no commit.
             cur.execute("SELECT * FROM users WHERE email=?", (email,))  # Run SQL to fetch the row.
             row = cur.fetchone()  # Get one row or None.
             return dict(row) if row else None  # Turn it into a dict if it exists.
     def create(self, email: str, password: str, name: str, role: str) -> bool:  # Add a new user.
         try:  # It might fail (e.g., duplicate email), so we protect it.
-            with self.db.unit_of_work() as con:  # Transaction.
-                cur = con.cursor()  # Cursor.
+            with self.db.write() as cur:  # Transaction.
                 cur.execute("INSERT INTO users (email, password_hash, name, role) VALUES (?, ?, ?, ?)", (email, _hash(password), name, role))  # Insert.
             return True  # If we got here, it worked.
         except Exception:  # Any error means False.
@@ -39,41 +51,41 @@ class UserRepository:  # All user-related SQL goes here.
             return None  # Wrong password.
         return user  
     def list_by_role(self, role: str) -> List[Dict]:
-        with self.db.unit_of_work() as con:
-            cur = con.cursor()
+        with self.db.read() as cur:  # Read-only: no transaction, no commit.
             cur.execute("SELECT * FROM users WHERE role=? ORDER BY id", (role,))
             return [dict(r) for r in cur.fetchall()]
 
     def list_admins(self) -> List[Dict]:
         return self.list_by_role("admin")
 
-    def delete_by_id(self, user_id: int) -> bool:
-        with self.db.unit_of_work() as con:
-            cur = con.cursor()
-            cur.execute("DELETE FROM users WHERE id=?", (user_id,))
-            return cur.rowcount > 0
+    def delete_by_id(self, user_id: int) -> bool:  # False if missing or the user still has bookings.
+        try:
+            with self.db.write() as cur:
+                cur.execute("DELETE FROM users WHERE id=?", (user_id,))
+                return cur.rowcount > 0
+        except sqlite3.IntegrityError:  # Foreign key: bookings still point at this user.
+            return False
 
     def delete_by_email(self, email: str) -> bool:
-        with self.db.unit_of_work() as con:
-            cur = con.cursor()
-            cur.execute("DELETE FROM users WHERE email=?", (email,))
-            return cur.rowcount > 0
+        try:
+            with self.db.write() as cur:
+                cur.execute("DELETE FROM users WHERE email=?", (email,))
+                return cur.rowcount > 0
+        except sqlite3.IntegrityError:
+            return False
 
     def set_password(self, email: str, new_password: str) -> bool:
-        with self.db.unit_of_work() as con:
-            cur = con.cursor()
+        with self.db.write() as cur:
             cur.execute("UPDATE users SET password_hash=? WHERE email=?", (_hash(new_password), email))
             return cur.rowcount > 0
 
     def set_email(self, old_email: str, new_email: str) -> bool:
-        with self.db.unit_of_work() as con:
-            cur = con.cursor()
+        with self.db.write() as cur:
             cur.execute("UPDATE users SET email=? WHERE email=?", (new_email, old_email))
             return cur.rowcount > 0
 
     def set_name(self, email: str, new_name: str) -> bool:
-        with self.db.unit_of_work() as con:
-            cur = con.cursor()
+        with self.db.write() as cur:
             cur.execute("UPDATE users SET name=? WHERE email=?", (new_name, email))
             return cur.rowcount > 0
 # Success: return the whole user dict.
@@ -81,20 +93,23 @@ class UserRepository:  # All user-related SQL goes here.
 class CarRepository:  # SQL for cars.
     def __init__(self, db: Database) -> None:  # Build repo.
         self.db = db  # Save DB.
+    def subscribe(self, callback: Callable[[str, Optional[int]], None]) -> None:  # Hear about add/update/delete from any CarRepository on this DB.
+        self.db.subscribe("cars", callback)
     def list(self, *, only_available: bool = True) -> List[Dict]:  # List all cars, maybe only available ones.
-        with self.db.unit_of_work() as con:  # Transaction.
-            cur = con.cursor()  # Cursor.
+        with self.db.read() as cur:  # Read-only: no transaction, no commit.
             sql = "SELECT * FROM cars"  # Base query.
             if only_available:  # If caller only wants available...
                 sql += " WHERE available=1"  # Only rows with available=1.
             cur.execute(sql)  # Run query.
             return [dict(r) for r in cur.fetchall()]  # Convert all rows to dictionaries.
     def add(self, make: str, model: str, year: int, mileage: int, daily_rate: float, available: bool, min_days: int, max_days: int, vehicle_type: str) -> bool:  # Insert car.
-        with self.db.unit_of_work() as con:  # Transaction.
-            cur = con.cursor()  # Cursor.
+        with self.db.write() as cur:  # Transaction.
             cur.execute("INSERT INTO cars (make, model, year, mileage, daily_rate, available, min_days, max_days, vehicle_type) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", (make, model, year, mileage, daily_rate, 1 if available else 0, min_days, max_days, vehicle_type))  # Insert row.
-            return True  # Insert ok.
-    def update(self, car_id: int, *, make: Optional[str] = None, model: Optional[str] = None, year: Optional[int] = None, mileage: Optional[int] = None, daily_rate: Optional[float] = None, min_days: Optional[int] = None, max_days: Optional[int] = None, available: Optional[bool] = None) -> bool:  # Update only provided fields.
+            car_id = cur.lastrowid  # New id for listeners.
+        self.db.notify("cars", "add", car_id)  # After commit, so listeners can read the row.
+        return True  # Insert ok.
+    def update(self, car_id: int, *, make: Optional[str] = None, model: Optional[str] = None, year: Optional[int] = None, mileage: Optional[int] = None, daily_rate: Optional[float] = None, min_days: Optional[int] = None, max_days: Optional[int] = None, available: Optional[bool] = None,
+               expected_version: Optional[int] = None) -> bool:  # Update only provided fields; with expected_version, only if nobody changed the car since.
         fields: List[str] = []
         values: List[Any] = []
         if make is not None: fields.append("make=?"); values.append(make)
@@ -108,60 +123,206 @@ class CarRepository:  # SQL for cars.
         if not fields:
             return False
         values.append(car_id)
-        with self.db.unit_of_work() as con:
-            cur = con.cursor()
-            cur.execute("UPDATE cars SET " + ", ".join(fields) + " WHERE id=?", tuple(values))
-            return cur.rowcount > 0  # True if a row was changed.
-    def delete(self, car_id: int) -> bool:  # Remove a car.
-        with self.db.unit_of_work() as con:  # Transaction.
-            cur = con.cursor()  # Cursor.
-            cur.execute("DELETE FROM cars WHERE id=?", (car_id,))  # Delete row.
-            return cur.rowcount > 0  # True if a row was deleted.
+        cas = expected_version is not None
+        if cas:
+            values.append(expected_version)
+        sql = STATEMENTS.get(("cars.update", tuple(fields), cas),  # Same fields -> same statement.
+                             lambda: "UPDATE cars SET " + ", ".join(fields) + ", version=version+1 WHERE id=?" + (" AND version=?" if cas else ""))
+        with self.db.write() as cur:
+            cur.execute(sql, tuple(values))
+            changed = cur.rowcount > 0  # True if a row was changed.
+        if not changed and cas:  # Missing car (False) or a newer version (conflict).
+            current = self.get(car_id)
+            if current is not None:
+                raise ConflictError("car", car_id, current)
+        if changed:
+            self.db.notify("cars", "update", car_id)  # Refresh caches/indexes for this car.
+        return changed
+    def delete(self, car_id: int) -> bool:  # Remove a car (False if missing or it still has bookings).
+        try:
+            with self.db.write() as cur:  # Transaction.
+                cur.execute("DELETE FROM cars WHERE id=?", (car_id,))  # Delete row.
+                deleted = cur.rowcount > 0  # True if a row was deleted.
+        except sqlite3.IntegrityError:  # Foreign key: bookings still point at this car.
+            return False
+        if deleted:
+            self.db.notify("cars", "delete", car_id)  # Drop it from caches/indexes.
+        return deleted
     def get(self, car_id: int) -> Optional[Dict]:  # Read one car.
-        with self.db.unit_of_work() as con:  # Transaction.
-            cur = con.cursor()  # Cursor.
+        with self.db.read() as cur:  # Read-only: no transaction, no commit.
             cur.execute("SELECT * FROM cars WHERE id=?", (car_id,))  # Select row.
             row = cur.fetchone()  # One or None.
             return dict(row) if row else None  # Dict or None.
-    def set_availability(self, car_id: int, available: bool) -> None:  # Force availability flag.
-        with self.db.unit_of_work() as con:  # Transaction.
-            cur = con.cursor()  # Cursor.
-            cur.execute("UPDATE cars SET available=? WHERE id=?", (1 if available else 0, car_id))  # Update.
+    def set_availability(self, car_id: int, available: bool) -> Optional[int]:  # Force availability flag; returns the new version (None if missing).
+        with self.db.write() as cur:  # Transaction.
+            cur.execute("UPDATE cars SET available=?, version=version+1 WHERE id=?", (1 if available else 0, car_id))  # Update.
+            cur.execute("SELECT version FROM cars WHERE id=?", (car_id,))  # Same transaction, so this is our write's version.
+            row = cur.fetchone()
+        self.db.notify("cars", "update", car_id)  # Availability changed.
+        return row[0] if row else None
     def toggle_availability(self, car_id: int) -> None:  # Flip available to the opposite value.
-        with self.db.unit_of_work() as con:  # Transaction.
-            cur = con.cursor()  # Cursor.
-            cur.execute("UPDATE cars SET available = 1 - available WHERE id=?", (car_id,))  # Clever trick: 1-0=1, 1-1=0.
+        with self.db.write() as cur:  # Transaction.
+            cur.execute("UPDATE cars SET available = 1 - available, version = version + 1 WHERE id=?", (car_id,))  # Clever trick: 1-0=1, 1-1=0.
+        self.db.notify("cars", "update", car_id)  # Availability changed.
+    def bulk_update(self, flt: CarFilter, changes, *, dry_run: bool = False) -> int:  # Change every matching car in one statement.
+        plan = parse_changes(changes)  # Validates fields and ops before any SQL runs.
+        where, wparams = flt.where()
+        if dry_run:  # Preview: how many cars would change.
+            with self.db.read() as cur:  # Read-only: no transaction, no commit.
+                cur.execute("SELECT COUNT(*) FROM cars" + where, tuple(wparams))
+                return int(cur.fetchone()[0])
+        with self.db.write() as cur:  # Transaction.
+            sql, params = update_sql(flt, plan)
+            cur.execute(sql, tuple(params))  # One round trip for the whole fleet.
+            changed = cur.rowcount
+        if changed:
+            self.db.notify("cars", "bulk", None)  # No ids: caches/indexes reload.
+        return changed
+
+_BOOKING_COLS = "id, user_id, car_id, start_date, end_date, total_price, status, payment_key, created_at"  # Columns shared by bookings and bookings_archive.
+
+def _history_filter(user_id: Optional[int], status: Optional[str], date_from: Optional[str], date_to: Optional[str]):  # Conditions + values for history/totals.
+    where: List[str] = []
+    params: List[Any] = []
+    if user_id is not None:
+        where.append("b.user_id = ?"); params.append(user_id)  # Uses idx_bookings_user_start.
+    if status is not None:  # With a user filter the unary + keeps SQLite on the (far more selective) user index.
+        where.append("+b.status = ?" if user_id is not None else "b.status = ?"); params.append(status)
+    if date_from is not None:  # Bookings that touch [date_from, date_to].
+        where.append("b.end_date >= ?"); params.append(date_from)
+    if date_to is not None:
+        where.append("b.start_date <= ?"); params.append(date_to)
+    return where, params
+
+def _where(conds: List[str]) -> str:  # " WHERE a AND b" or "".
+    return (" WHERE " + " AND ".join(conds)) if conds else ""
+
+def _history_source(include_archive: bool) -> str:  # Live table, or live + archive as one relation.
+    if include_archive:
+        return f"(SELECT {_BOOKING_COLS} FROM bookings UNION ALL SELECT {_BOOKING_COLS} FROM bookings_archive)"
+    return "bookings"
+
+_BOOKING_INSERT = ("INSERT INTO bookings (user_id, car_id, start_date, end_date, total_price, status, payment_key, created_at) SELECT ?, ?, ?, ?, ?, ?, ?, ?"
+                   " WHERE NOT EXISTS (SELECT 1 FROM holds WHERE car_id = ? AND expires_at > ? AND user_id <> ? AND end_date >= ? AND start_date <= ?)"
+                   " AND NOT EXISTS (SELECT 1 FROM bookings WHERE car_id = ? AND status IN ('PENDING', 'APPROVED') AND end_date >= ? AND start_date <= ?)")  # Same rules as HoldRepository.place.
+
+def _booking_params(user_id: int, car_id: int, start: str, end: str, total_price: float, payment_key: Optional[str], now: str) -> tuple:  # Values for _BOOKING_INSERT.
+    return (user_id, car_id, start, end, total_price, "PENDING", payment_key, now, car_id, now, user_id, start, end, car_id, start, end)
 
 class BookingRepository:  # All booking-related SQL.
     def __init__(self, db: Database) -> None:  # Build repo.
         self.db = db  # Save DB.
-    def create(self, user_id: int, car_id: int, start: str, end: str, total_price: float) -> bool:  # Insert booking.
-        with self.db.unit_of_work() as con:  # Transaction.
-            cur = con.cursor()  # Cursor.
-            cur.execute("INSERT INTO bookings (user_id, car_id, start_date, end_date, total_price, status) VALUES (?, ?, ?, ?, ?, ?)", (user_id, car_id, start, end, total_price, "PENDING"))  # Insert row.
-            return True  # Insert ok.
-    def list(self, *, user_id: Optional[int] = None, status: Optional[str] = None) -> List[Dict]:  # Read many bookings.
-        with self.db.unit_of_work() as con:  # Transaction.
-            cur = con.cursor()  # Cursor.
-            sql = "SELECT * FROM bookings"  # Base query.
-            params: List[Any] = []  # Values for placeholders.
-            where: List[str] = []  # Conditions.
-            if user_id is not None:  # Add condition if asked.
-                where.append("user_id=?"); params.append(user_id)  # Filter by user.
-            if status is not None:  # Add condition if asked.
-                where.append("status=?"); params.append(status)  # Filter by status.
-            if where:  # If any conditions were added...
-                sql += " WHERE " + " AND ".join(where)  # Attach them to SQL.
-            sql += " ORDER BY id DESC"  # Newest first looks nicer.
+    def create(self, user_id: int, car_id: int, start: str, end: str, total_price: float, payment_key: Optional[str] = None) -> bool:  # Insert booking.
+        try:  # A repeated payment_key breaks the unique index.
+            with self.db.write() as cur:  # Transaction; the insert itself re-checks holds, so one placed after the quote still wins.
+                cur.execute(_BOOKING_INSERT, _booking_params(user_id, car_id, start, end, total_price, payment_key, _utc_stamp()))
+                return cur.rowcount == 1  # 0 = another customer holds these dates, or a live booking has them.
+        except sqlite3.IntegrityError:  # Already booked for this payment.
+            return False
+    def get_by_payment_key(self, payment_key: str) -> Optional[Dict]:  # Find the booking a payment produced (idempotent retries).
+        with self.db.read() as cur:  # Read-only: no transaction, no commit.
+            cur.execute("SELECT * FROM bookings WHERE payment_key=?", (payment_key,))  # Uses the unique index.
+            row = cur.fetchone()  # One or None.
+            return dict(row) if row else None  # Dict or None.
+    def list(self, *, user_id: Optional[int] = None, status: Optional[str] = None, include_archive: bool = False) -> List[Dict]:  # Read many bookings.
+        params: List[Any] = []  # Values for placeholders.
+        where: List[str] = []  # Conditions.
+        if user_id is not None:  # Add condition if asked.
+            where.append("user_id=?"); params.append(user_id)  # Filter by user.
+        if status is not None:  # Add condition if asked.
+            where.append("+status=?" if user_id is not None else "status=?"); params.append(status)  # Filter by status (user index wins when both).
+        if include_archive:  # Same filters for both halves of the UNION.
+            params = params * 2
+        sql = STATEMENTS.get(("bookings.list", tuple(where), include_archive), lambda: self._list_sql(where, include_archive))  # Built once per shape.
+        with self.db.read() as cur:  # Read-only: no transaction, no commit.
             cur.execute(sql, tuple(params))  # Run query.
             return [dict(r) for r in cur.fetchall()]  # Turn rows into dicts.
-    def set_status(self, booking_id: int, status: str) -> None:  # Update status for one booking.
-        with self.db.unit_of_work() as con:  # Transaction.
-            cur = con.cursor()  # Cursor.
-            cur.execute("UPDATE bookings SET status=? WHERE id=?", (status, booking_id))  # Update.
+    @staticmethod
+    def _list_sql(where: List[str], include_archive: bool) -> str:  # SQL text for one list() shape.
+        cond = (" WHERE " + " AND ".join(where)) if where else ""  # Attach conditions to SQL.
+        if include_archive:  # Admin asked for history too, so read both tables in one go.
+            sql = f"SELECT {_BOOKING_COLS} FROM bookings{cond} UNION ALL SELECT {_BOOKING_COLS} FROM bookings_archive{cond}"
+        else:
+            sql = f"SELECT * FROM bookings{cond}"  # Live bookings only (the hot path).
+        return sql + " ORDER BY id DESC"  # Newest first looks nicer.
+    def history(self, *, user_id: Optional[int] = None, status: Optional[str] = None, date_from: Optional[str] = None, date_to: Optional[str] = None,
+                limit: Optional[int] = None, offset: int = 0, include_archive: bool = False) -> List[Dict]:  # Bookings joined with car + customer, newest first.
+        where, params = _history_filter(user_id, status, date_from, date_to)
+        sql = STATEMENTS.get(("bookings.history", tuple(where), include_archive), lambda: (
+            "SELECT b.id, b.user_id, b.car_id, b.start_date, b.end_date, b.total_price, b.status,"
+            " c.make, c.model, c.vehicle_type, u.name AS user_name, u.email AS user_email"
+            f" FROM {_history_source(include_archive)} b LEFT JOIN cars c ON c.id = b.car_id LEFT JOIN users u ON u.id = b.user_id"
+            f"{_where(where)} ORDER BY b.start_date DESC, b.id DESC LIMIT ? OFFSET ?"))  # Deleted cars/users still list (NULL names).
+        with self.db.read() as cur:  # Read-only: no transaction, no commit.
+            cur.execute(sql, (*params, -1 if limit is None else limit, offset))  # LIMIT -1 = no limit, so one statement fits both.
+            return [dict(r) for r in cur.fetchall()]
+    def totals(self, *, user_id: Optional[int] = None, date_from: Optional[str] = None, date_to: Optional[str] = None,
+               today: Optional[str] = None, include_archive: bool = True) -> Dict[str, Any]:  # Counts and money summed by SQLite, not Python.
+        where, params = _history_filter(user_id, None, date_from, date_to)
+        day = today or date.today().isoformat()
+        sql = STATEMENTS.get(("bookings.totals", tuple(where), include_archive), lambda: (
+            "SELECT COUNT(*) AS bookings,"
+            " COALESCE(SUM(CASE WHEN b.status IN ('APPROVED', 'COMPLETED') AND b.start_date <= ? THEN b.total_price END), 0) AS spent,"
+            " COALESCE(SUM(CASE WHEN b.status IN ('PENDING', 'APPROVED') AND b.start_date > ? THEN 1 END), 0) AS upcoming"
+            f" FROM {_history_source(include_archive)} b{_where(where)}"))
+        with self.db.read() as cur:  # Read-only: no transaction, no commit.
+            cur.execute(sql, (day, day, *params))
+            row = cur.fetchone()
+            return {"bookings": int(row["bookings"]), "spent": round(float(row["spent"]), 2), "upcoming": int(row["upcoming"])}
+    def overlapping(self, start: str, end: str) -> List[Dict]:  # Every PENDING/APPROVED booking touching [start, end], in one query.
+        with self.db.read() as cur:  # Read-only: no transaction, no commit.
+            cur.execute("SELECT car_id, start_date, end_date, status FROM bookings WHERE status IN ('PENDING', 'APPROVED') AND end_date >= ? AND start_date <= ?", (start, end))  # Interval overlap test.
+            return [dict(r) for r in cur.fetchall()]  # Turn rows into dicts.
+    def set_status(self, booking_id: int, status: str, *, expected_version: Optional[int] = None) -> None:  # Update status for one booking.
+        with self.db.write() as cur:  # Transaction.
+            if expected_version is None:
+                cur.execute("UPDATE bookings SET status=?, version=version+1 WHERE id=?", (status, booking_id))  # Update.
+                return
+            cur.execute("UPDATE bookings SET status=?, version=version+1 WHERE id=? AND version=?", (status, booking_id, expected_version))
+            lost = cur.rowcount == 0
+        current = self.get(booking_id) if lost else None
+        if current is not None:  # Another admin decided first.
+            raise ConflictError("booking", booking_id, current)
+    def set_car_version(self, booking_id: int, car_version: Optional[int]) -> None:  # Remember the car version approval left behind.
+        with self.db.write() as cur:
+            cur.execute("UPDATE bookings SET car_version=? WHERE id=?", (car_version, booking_id))
     def get(self, booking_id: int) -> Optional[Dict]:  # Read a single booking.
-        with self.db.unit_of_work() as con:  # Transaction.
-            cur = con.cursor()  # Cursor.
+        with self.db.read() as cur:  # Read-only: no transaction, no commit.
             cur.execute("SELECT * FROM bookings WHERE id=?", (booking_id,))  # Run query.
             row = cur.fetchone()  # One or None.
             return dict(row) if row else None  # Dict or None.
+
+class HoldRepository:  # Temporary reservations (token -> car + dates) with an expiry time.
+    def __init__(self, db: Database) -> None:  # Build repo.
+        self.db = db  # Save DB.
+    def place(self, token: str, user_id: int, car_id: int, start: str, end: str, expires_at: str, now: str) -> bool:  # False if the car is taken.
+        with self.db.write() as cur:  # Check and insert in one statement, so two customers cannot both win.
+            cur.execute("INSERT INTO holds (token, user_id, car_id, start_date, end_date, expires_at) SELECT ?, ?, ?, ?, ?, ?"
+                        " WHERE NOT EXISTS (SELECT 1 FROM holds WHERE car_id = ? AND expires_at > ? AND user_id <> ? AND end_date >= ? AND start_date <= ?)"
+                        " AND NOT EXISTS (SELECT 1 FROM bookings WHERE car_id = ? AND status IN ('PENDING', 'APPROVED') AND end_date >= ? AND start_date <= ?)",
+                        (token, user_id, car_id, start, end, expires_at, car_id, now, user_id, start, end, car_id, start, end))
+            return cur.rowcount == 1
+    def get(self, token: str) -> Optional[Dict]:  # Read one hold (expired or not).
+        with self.db.read() as cur:  # Read-only: no transaction, no commit.
+            cur.execute("SELECT * FROM holds WHERE token=?", (token,))
+            row = cur.fetchone()
+            return dict(row) if row else None
+    def release(self, token: str) -> bool:  # Drop a hold (booked, or the customer said no).
+        with self.db.write() as cur:
+            cur.execute("DELETE FROM holds WHERE token=?", (token,))
+            return cur.rowcount == 1
+    def live(self, start: str, end: str, now: str, *, car_id: Optional[int] = None, exclude_user: Optional[int] = None) -> List[Dict]:  # Unexpired holds touching [start, end].
+        where = ["expires_at > ?", "end_date >= ?", "start_date <= ?"]
+        params: List[Any] = [now, start, end]
+        if car_id is not None:
+            where.insert(0, "car_id = ?"); params.insert(0, car_id)  # Uses idx_holds_car.
+        if exclude_user is not None:
+            where.append("user_id <> ?"); params.append(exclude_user)  # A customer never blocks themselves.
+        sql = STATEMENTS.get(("holds.live", tuple(where)), lambda: f"SELECT car_id, start_date, end_date, user_id FROM holds{_where(where)}")
+        with self.db.read() as cur:  # Read-only: no transaction, no commit.
+            cur.execute(sql, tuple(params))
+            return [dict(r) for r in cur.fetchall()]
+    def sweep(self, now: str, *, batch_size: int = 500) -> int:  # Delete one batch of expired holds; returns rows removed.
+        with self.db.write() as cur:
+            cur.execute("DELETE FROM holds WHERE token IN (SELECT token FROM holds WHERE expires_at <= ? LIMIT ?)", (now, batch_size))
+            return cur.rowcount
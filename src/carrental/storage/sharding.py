@@ -0,0 +1,107 @@
+# ==============================================================================
+# Branch sharding: one SQLite file per depot plus a router in front of them.
+# Every step tells you plainly what it does.
+#   - DESIGN PATTERN: Router/Facade (one object decides which branch file to use)
+# ==============================================================================
+
+"""Multi-branch storage: per-branch car/booking files, shared users, parallel fan-out reads."""  # Depots stop sharing one write lock.
+
+from __future__ import annotations  # Modern hints.
+import os, re  # File paths and branch-name checks.
+from datetime import datetime, timezone  # "Now" for live holds.
+from concurrent.futures import ThreadPoolExecutor  # Fan-out over branches.
+from typing import Callable, Dict, Iterable, List, Optional, TypeVar  # Type names.
+from carrental.storage.db import Database  # One Database per file.
+from carrental.storage.repositories import BookingRepository, CarRepository, HoldRepository, UserRepository  # Same SQL, per branch.
+
+T = TypeVar("T")
+_NAME = re.compile(r"^[a-z0-9_-]+$")  # Branch names end up in file names.
+
+class BranchBackend:  # StorageBackend for one branch: shared users, branch-local cars and bookings.
+    """Lets the normal services (RentalService, InventoryService) run against a single branch."""  # Human description.
+    def __init__(self, branch: str, central: Database, db: Database) -> None:
+        self.name = f"branch:{branch}"
+        self.db = db  # The branch file (same attribute SQLiteBackend exposes).
+        self.users = UserRepository(central)  # Accounts are company-wide.
+        self.cars = CarRepository(db)
+        self.bookings = BookingRepository(db)
+        self.holds = HoldRepository(db)  # Holds sit next to the bookings they protect.
+
+class ShardRouter:  # Routes per-branch work to its file and fans cross-branch reads out over threads.
+    """Branch name -> Database, plus merged queries across every branch."""  # Human description.
+    def __init__(self, central: Database, branches: Dict[str, Database], *, workers: Optional[int] = None) -> None:
+        if not branches:
+            raise ValueError("at least one branch is required")
+        self.central = central  # Users live here.
+        self.branches = dict(branches)  # name -> Database.
+        self._backends = {name: BranchBackend(name, central, db) for name, db in self.branches.items()}
+        self._pool = ThreadPoolExecutor(max_workers=workers or len(branches), thread_name_prefix="shard")
+
+    @classmethod
+    def open(cls, directory: str, names: Iterable[str], *, central: Optional[Database] = None, **kwargs) -> "ShardRouter":
+        """One file per branch (carrental_<name>.db) in directory; users in central (default carrental.db there)."""
+        dbs: Dict[str, Database] = {}
+        for name in names:
+            if not _NAME.match(name):
+                raise ValueError(f"bad branch name '{name}' (use a-z, 0-9, - and _)")
+            dbs[name] = Database(os.path.join(directory, f"carrental_{name}.db"), foreign_keys=False)  # bookings.user_id points into the central file.
+        return cls(central or Database(os.path.join(directory, "carrental.db")), dbs, **kwargs)
+
+    # --- routing ---
+    def _check(self, branch: str) -> str:
+        if branch not in self.branches:
+            raise KeyError(f"unknown branch '{branch}'")
+        return branch
+
+    def backend(self, branch: str) -> BranchBackend:  # Hand to a service: RentalService(router.backend("north")).
+        return self._backends[self._check(branch)]
+
+    def cars(self, branch: str) -> CarRepository:
+        return self.backend(branch).cars
+
+    def bookings(self, branch: str) -> BookingRepository:
+        return self.backend(branch).bookings
+
+    # --- fan-out ---
+    def fan_out(self, fn: Callable[[str, BranchBackend], T]) -> Dict[str, T]:
+        """Run fn(branch, backend) on every branch in parallel; results keyed by branch."""
+        futures = {name: self._pool.submit(fn, name, be) for name, be in self._backends.items()}
+        return {name: fut.result() for name, fut in futures.items()}
+
+    def _merged(self, fn: Callable[[str, BranchBackend], List[Dict]]) -> List[Dict]:  # Fan out, tag each row with its branch.
+        out: List[Dict] = []
+        for name, rows in self.fan_out(fn).items():
+            out.extend(dict(r, branch=name) for r in rows)
+        return out
+
+    def list_cars(self, *, only_available: bool = True) -> List[Dict]:
+        return self._merged(lambda _, be: be.cars.list(only_available=only_available))
+
+    def find_free_cars(self, start: str, end: str, *, vehicle_type: Optional[str] = None, make: Optional[str] = None,
+                       limit: Optional[int] = None) -> List[Dict]:
+        """Available cars with no PENDING/APPROVED booking or live hold touching [start, end], in every branch, cheapest first."""
+        now = datetime.now(timezone.utc).isoformat(timespec="seconds")
+        def one(_: str, be: BranchBackend) -> List[Dict]:
+            busy = {b["car_id"] for b in be.bookings.overlapping(start, end)}
+            busy.update(h["car_id"] for h in be.holds.live(start, end, now))
+            return [c for c in be.cars.list(only_available=True)
+                    if c["id"] not in busy
+                    and (vehicle_type is None or c["vehicle_type"].lower() == vehicle_type.lower())
+                    and (make is None or c["make"].lower() == make.lower())]
+        rows = sorted(self._merged(one), key=lambda c: (c["daily_rate"], c["branch"], c["id"]))
+        return rows if limit is None else rows[:limit]
+
+    def bookings_for_user(self, user_id: int) -> List[Dict]:  # A customer's trips across every depot, newest start first.
+        rows = self._merged(lambda _, be: be.bookings.history(user_id=user_id))  # Car names come from each branch's join.
+        with self.central.read() as cur:  # The customer lives in the central file, not in the branches.
+            cur.execute("SELECT name, email FROM users WHERE id=?", (user_id,))
+            user = cur.fetchone()
+        for b in rows:
+            b["user_name"], b["user_email"] = (user["name"], user["email"]) if user else (None, None)
+        return sorted(rows, key=lambda b: (b["start_date"], b["branch"], b["id"]), reverse=True)
+
+    def pending_bookings(self) -> List[Dict]:  # Review queue for the whole company.
+        return sorted(self._merged(lambda _, be: be.bookings.list(status="PENDING")), key=lambda b: (b["branch"], b["id"]))
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=True)
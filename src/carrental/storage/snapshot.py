@@ -0,0 +1,155 @@
+# ==============================================================================
+# Read-only reporting snapshots: copy the live DB, then read the copy via mmap.
+# Every step tells you plainly what it does.
+#   - DESIGN PATTERN: Proxy (SnapshotDatabase stands in for Database on reads)
+# ==============================================================================
+
+"""Online snapshots (sqlite3 backup API) opened immutable + mmap for reporting."""  # Long scans stop competing with bookings.
+
+from __future__ import annotations  # Modern hints.
+import os, sqlite3, threading, time  # File handling, driver, refresher thread, read timings.
+from contextlib import contextmanager  # "with snapshot.read() as cur:" pins one generation.
+from pathlib import Path  # Builds the file: URI.
+from typing import Dict, Iterator, Optional, Set  # Type names.
+from carrental.storage.db import Database, _READ_SECONDS, _UNTIMED  # Live database (and the class we extend), same read metric.
+from carrental.utils.profiling import PROFILER  # Snapshot reads count as SQL time too.
+
+def take_snapshot(db: Database, dest: str, *, pages_per_step: int = 1024) -> str:
+    """Copy db into dest with the backup API; the live DB stays writable while it runs."""
+    tmp = dest + ".tmp"  # Build next to the target so the final rename is atomic.
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    db.connect()  # Make sure the live file exists and has its schema.
+    src = sqlite3.connect(db.path)  # Own connection: the app's connection keeps serving bookings.
+    try:
+        dst = sqlite3.connect(tmp)
+        try:
+            src.backup(dst, pages=pages_per_step, sleep=0)  # Copies in steps; retries a busy step at once (not after 0.25 s); restarts if a writer changes pages.
+        finally:
+            dst.close()
+    finally:
+        src.close()
+    os.replace(tmp, dest)  # Readers only ever see a complete file.
+    return dest
+
+class SnapshotDatabase(Database):  # A Database whose connection points at a frozen copy.
+    """Read-only Database over a snapshot file; refresh() swaps in a newer copy."""  # Human description.
+    def __init__(self, source: Database, path: Optional[str] = None, *, mmap_mb: int = 256) -> None:
+        base = path or os.path.splitext(source.path)[0] + ".snapshot"  # e.g. carrental.snapshot.<n>.db
+        super().__init__(base + ".db")
+        self.source = source  # Where snapshots are copied from.
+        self.base = base  # Generation files are base.<n>.db.
+        self.mmap_bytes = mmap_mb * 1024 * 1024  # How much of the file SQLite may map instead of read().
+        self.generation = 0  # Bumps on every refresh.
+        self._swap = threading.Lock()  # One refresh at a time.
+        self._refs = threading.Lock()  # Guards the two fields below (never held while copying).
+        self._borrowers: Dict[sqlite3.Connection, int] = {}  # Connection -> reads still running on it.
+        self._retired: Set[sqlite3.Connection] = set()  # Older generations waiting for their last reader.
+
+    def _file(self, gen: int) -> str:
+        return f"{self.base}.{gen}.db"
+
+    def _open(self, path: str) -> sqlite3.Connection:  # immutable=1: no locks, no change checks; mmap for zero-copy reads.
+        uri = Path(path).as_uri() + "?mode=ro&immutable=1"
+        con = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        con.row_factory = sqlite3.Row  # Same row shape as the live DB.
+        con.execute(f"PRAGMA mmap_size={self.mmap_bytes}")
+        return con
+
+    def connect(self) -> sqlite3.Connection:  # First use takes the first snapshot.
+        if self._conn is None:
+            with self._swap:
+                if self._conn is None:  # Another thread may have taken it while we waited.
+                    self._refresh()
+        return self._conn
+
+    @contextmanager  # Like Database.read(), but the generation stays open until the block ends.
+    def read(self) -> Iterator[sqlite3.Cursor]:
+        start = time.perf_counter()
+        with PROFILER.span("sql") if PROFILER.enabled else _UNTIMED:
+            con = self._borrow()
+            try:
+                yield self.cursor(con)
+            finally:
+                self._give_back(con)
+                _READ_SECONDS.observe(time.perf_counter() - start)
+
+    def _borrow(self) -> sqlite3.Connection:
+        self.connect()
+        with self._refs:
+            con = self._conn  # Re-read under the lock: refresh() may just have swapped it.
+            self._borrowers[con] = self._borrowers.get(con, 0) + 1
+            return con
+
+    def _give_back(self, con: sqlite3.Connection) -> None:  # The last reader of a retired generation closes it.
+        with self._refs:
+            left = self._borrowers.get(con, 0) - 1  # Missing after close(): nothing left to track.
+            if left > 0:
+                self._borrowers[con] = left
+                return
+            self._borrowers.pop(con, None)
+            if con not in self._retired:
+                return
+            self._retired.discard(con)
+        self._drop(con)
+
+    def refresh(self) -> int:
+        """Take a new snapshot and point every new reader at it; returns the new generation."""
+        with self._swap:
+            return self._refresh()
+
+    def _refresh(self) -> int:  # Caller holds _swap.
+        gen = self.generation + 1
+        path = take_snapshot(self.source, self._file(gen))  # Never overwrite a file that is open immutable.
+        con = self._open(path)
+        with self._refs:
+            old = self._conn
+            self._conn, self.path, self.generation = con, path, gen  # New queries use the new copy.
+            busy = old is not None and old in self._borrowers
+            if busy:  # A long report is still reading it: its last read closes it.
+                self._retired.add(old)
+        if old is not None and not busy:
+            self._drop(old)
+        return gen
+
+    def close(self) -> None:  # Close every connection and delete the snapshot files (reads still running fail).
+        with self._swap, self._refs:
+            cons = list(self._retired) + ([self._conn] if self._conn is not None else [])
+            self._retired, self._conn = set(), None
+            self._borrowers.clear()
+        for con in cons:
+            self._drop(con)
+
+    def _drop(self, con: sqlite3.Connection) -> None:
+        path = con.execute("PRAGMA database_list").fetchone()[2]  # The file this connection reads.
+        self.forget(con)  # Cached cursors would keep the closed connection alive.
+        con.close()
+        try:
+            os.remove(path)
+        except OSError:
+            pass  # Still open elsewhere (Windows); a later refresh or restart cleans it up.
+
+class SnapshotRefresher:  # Background thread that refreshes a snapshot every N seconds.
+    """Keep a SnapshotDatabase at most interval seconds behind the live DB."""  # Human description.
+    def __init__(self, snapshot: SnapshotDatabase, interval: float = 300.0) -> None:
+        self.snapshot = snapshot
+        self.interval = interval  # Seconds between refreshes.
+        self.errors = 0  # Failed refreshes (the old snapshot keeps serving).
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="snapshot-refresher", daemon=True)
+
+    def start(self) -> "SnapshotRefresher":
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):  # Sleep, then refresh, until stopped.
+            try:
+                self.snapshot.refresh()
+            except sqlite3.Error:
+                self.errors += 1
@@ -0,0 +1,36 @@
+# ==============================================================================
+# Statement registry: one canonical SQL string per query shape.
+# Every step tells you plainly what it does.
+#   - DESIGN PATTERN: Flyweight (identical query shapes share one SQL string)
+# ==============================================================================
+
+"""Canonical SQL for dynamically built queries so sqlite3's statement cache hits."""  # Same shape, same string, no re-prepare.
+
+from __future__ import annotations  # Modern hints.
+import sys, threading  # String interning and a lock for first-time builds.
+from typing import Callable, Dict, Hashable  # Type names.
+
+def canonical(sql: str) -> str:  # Collapse runs of whitespace (our SQL has no multi-space string literals).
+    return " ".join(sql.split())
+
+class StatementRegistry:  # Maps a query "shape" key to its one SQL string.
+    """Build each SQL variant once; later calls get the same (interned) string back."""  # Human description.
+    def __init__(self) -> None:
+        self._sql: Dict[Hashable, str] = {}  # shape key -> canonical SQL.
+        self._lock = threading.Lock()
+        self.builds = 0  # How many distinct statements exist (size hint for cached_statements).
+
+    def get(self, key: Hashable, build: Callable[[], str]) -> str:
+        sql = self._sql.get(key)  # Fast path: no lock, no string building.
+        if sql is None:
+            with self._lock:
+                sql = self._sql.get(key)
+                if sql is None:
+                    sql = self._sql[key] = sys.intern(canonical(build()))  # Interned: hash computed once.
+                    self.builds += 1
+        return sql
+
+    def __len__(self) -> int:
+        return len(self._sql)
+
+STATEMENTS = StatementRegistry()  # Shared by every repository.
@@ -0,0 +1,230 @@
+# ==============================================================================
+# Runtime metrics: counters, gauges and histograms in Prometheus text format.
+# Every step tells you plainly what it does.
+#   - DESIGN PATTERN: Registry (one place that knows every metric)
+# ==============================================================================
+
+"""Tiny metrics registry with striped locks, a text dump and an optional /metrics HTTP endpoint."""  # Watch throughput under load.
+
+from __future__ import annotations  # Modern hints.
+import itertools, os, threading, time  # Stripe ids, atomic file writes, locks, timers.
+from abc import ABC, abstractmethod  # Every metric kind must render itself.
+from bisect import bisect_left  # Bucket lookup.
+from contextlib import contextmanager  # "with histogram.time():".
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer  # Local scrape endpoint.
+from typing import Dict, Iterator, List, Sequence, Tuple  # Type names.
+
+STRIPES = 8  # Lock stripes per metric: threads rarely wait on each other.
+DEFAULT_BUCKETS: Tuple[float, ...] = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)  # Seconds.
+_stripe_ids = itertools.count()  # Hands each thread its own stripe, round robin.
+_local = threading.local()
+
+def _stripe() -> int:  # This thread's stripe (fixed for the thread's lifetime).
+    i = getattr(_local, "stripe", None)
+    if i is None:
+        i = _local.stripe = next(_stripe_ids) % STRIPES
+    return i
+
+def _fmt(value: float) -> str:  # 3 -> "3", 0.25 -> "0.25", inf -> "+Inf".
+    if value == float("inf"):
+        return "+Inf"
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+def _escape(value: str) -> str:  # Backslash, quote and newline must be escaped in label values.
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def _labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:  # {a="x",le="0.5"}
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+class _Metric(ABC):  # Name, help text and label names shared by every kind.
+    kind = ""
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:  # Label values in declared order.
+        if not labels and not self.labelnames:  # Hot path: unlabelled metric.
+            return ()
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    @abstractmethod
+    def lines(self) -> List[str]:  # Prometheus text for this metric.
+        ...
+
+class Counter(_Metric):  # Only goes up (requests, errors, ...).
+    kind = "counter"
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, help, labelnames)
+        self._locks = [threading.Lock() for _ in range(STRIPES)]
+        self._values: List[Dict[Tuple[str, ...], float]] = [{} for _ in range(STRIPES)]
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        if amount < 0:
+            raise ValueError("counters only go up")
+        key = self._key(labels)
+        i = _stripe()
+        with self._locks[i]:  # Only threads sharing this stripe can contend.
+            values = self._values[i]
+            values[key] = values.get(key, 0.0) + amount
+
+    def _merged(self) -> Dict[Tuple[str, ...], float]:  # Sum every stripe.
+        out: Dict[Tuple[str, ...], float] = {}
+        for lock, values in zip(self._locks, self._values):
+            with lock:
+                for key, v in values.items():
+                    out[key] = out.get(key, 0.0) + v
+        return out
+
+    def value(self, **labels: str) -> float:
+        return self._merged().get(self._key(labels), 0.0)
+
+    def lines(self) -> List[str]:
+        return [f"{self.name}{_labels(self.labelnames, key)} {_fmt(v)}" for key, v in sorted(self._merged().items())]
+
+class Gauge(_Metric):  # Goes up and down (pool size, queue depth, ...).
+    kind = "gauge"
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, help, labelnames)
+        self._lock = threading.Lock()  # set() must win as a whole, so one lock is enough.
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = float(value)
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def value(self, **labels: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def lines(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f"{self.name}{_labels(self.labelnames, key)} {_fmt(v)}" for key, v in items]
+
+class Histogram(_Metric):  # Latency distribution: bucket counts plus sum and count.
+    kind = "histogram"
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> None:
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self._locks = [threading.Lock() for _ in range(STRIPES)]
+        self._values: List[Dict[Tuple[str, ...], List[float]]] = [{} for _ in range(STRIPES)]  # key -> [per-bucket counts..., +Inf, sum].
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        slot = bisect_left(self.buckets, value)  # First bucket with bound >= value; len(buckets) = +Inf.
+        i = _stripe()
+        with self._locks[i]:
+            row = self._values[i].get(key)
+            if row is None:
+                row = self._values[i][key] = [0.0] * (len(self.buckets) + 2)
+            row[slot] += 1
+            row[-1] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:  # Observe how long the block took.
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _merged(self) -> Dict[Tuple[str, ...], List[float]]:
+        out: Dict[Tuple[str, ...], List[float]] = {}
+        for lock, values in zip(self._locks, self._values):
+            with lock:
+                for key, row in values.items():
+                    acc = out.setdefault(key, [0.0] * len(row))
+                    for j, v in enumerate(row):
+                        acc[j] += v
+        return out
+
+    def count(self, **labels: str) -> int:
+        row = self._merged().get(self._key(labels))
+        return int(sum(row[:-1])) if row else 0
+
+    def lines(self) -> List[str]:
+        out: List[str] = []
+        for key, row in sorted(self._merged().items()):
+            running = 0.0
+            for bound, n in zip(self.buckets + (float("inf"),), row[:-1]):  # Buckets are cumulative in the text format.
+                running += n
+                le = 'le="' + _fmt(bound) + '"'
+                out.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {_fmt(running)}")
+            out.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_fmt(row[-1])}")
+            out.append(f"{self.name}_count{_labels(self.labelnames, key)} {_fmt(running)}")
+        return out
+
+class MetricsRegistry:  # Get-or-create metrics by name; render them all at once.
+    """Holds every metric; render() gives Prometheus text, write()/serve() publish it."""  # Human description.
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name: str, help: str, labelnames: Sequence[str], **kwargs) -> _Metric:
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help, labelnames, **kwargs)
+            elif not isinstance(metric, cls) or metric.labelnames != tuple(labelnames):
+                raise ValueError(f"metric {name} already registered with a different type or labels")
+            return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get(Counter, name, help, labelnames)
+
+    def gauge(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._get(Gauge, name, help, labelnames)
+
+    def histogram(self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        return self._get(Histogram, name, help, labelnames, buckets=buckets)
+
+    def render(self) -> str:  # Prometheus text exposition format 0.0.4.
+        with self._lock:
+            metrics = list(self._metrics.values())
+        out: List[str] = []
+        for m in metrics:
+            out += [f"# HELP {m.name} {m.help}", f"# TYPE {m.name} {m.kind}"]
+            out += m.lines()
+        return "\n".join(out) + "\n"
+
+    def write(self, path: str) -> None:  # Atomic dump (e.g. for node_exporter's textfile collector).
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as fh:
+            fh.write(self.render())
+        os.replace(tmp, path)
+
+    def serve(self, port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:  # GET /metrics on a daemon thread; call .shutdown() to stop.
+        registry = self
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:
+                if self.path.split("?", 1)[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            def log_message(self, format: str, *args) -> None:  # Keep the CLI screen clean.
+                pass
+        server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+        return server
+
+METRICS = MetricsRegistry()  # The one registry the app uses.
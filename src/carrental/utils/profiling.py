@@ -0,0 +1,151 @@
+# ==============================================================================
+# Opt-in profiler for the CLI (--profile): per-command latency breakdown.
+# Every step tells you plainly what it does.
+
+# ==============================================================================
+
+"""Per-command timers split into SQL, render, input and Python time."""  # Tells us whether tabulate, SQLite or our code is slow.
+
+from __future__ import annotations
+import cProfile, functools, inspect, io, math, pstats, threading, time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+CATEGORIES = ("sql", "render", "input")  # Time buckets measured inside a command; the rest is "python".
+
+def _percentile(values: List[float], pct: float) -> float:  # Nearest-rank percentile.
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = max(0, min(len(ordered) - 1, math.ceil(pct * len(ordered) / 100.0) - 1))  # Rank ceil(p*n); round() would round halves to even.
+    return ordered[idx]
+
+class Profiler:
+    """Collects one sample per command run; disabled (near zero cost) unless enable() is called."""
+    def __init__(self) -> None:
+        self.enabled = False
+        self.stacks = False  # Also run cProfile per command.
+        self._lock = threading.Lock()
+        self._local = threading.local()  # Current command + open span per thread.
+        self.samples: Dict[str, List[Dict[str, float]]] = {}  # label -> list of {"total", "sql", "render", "input"}.
+        self.calls: Dict[str, List[float]] = {}  # "Service.method" -> durations.
+        self._stats: Dict[str, pstats.Stats] = {}  # label -> merged cProfile stats.
+
+    def enable(self, *, stacks: bool = False) -> None:
+        self.enabled = True
+        self.stacks = stacks
+
+    def reset(self) -> None:
+        with self._lock:
+            self.samples.clear()
+            self.calls.clear()
+            self._stats.clear()
+
+    @contextmanager
+    def command(self, label: str) -> Iterator[None]:  # Time one Command.execute().
+        if not self.enabled:
+            yield
+            return
+        sample = {"total": 0.0, "sql": 0.0, "render": 0.0, "input": 0.0}
+        prev = getattr(self._local, "sample", None)
+        self._local.sample = sample
+        prof = cProfile.Profile() if self.stacks else None
+        start = time.perf_counter()
+        if prof:
+            prof.enable()
+        try:
+            yield
+        finally:  # Also runs for SystemExit from the Exit command.
+            if prof:
+                prof.disable()
+            sample["total"] = time.perf_counter() - start
+            self._local.sample = prev
+            with self._lock:
+                self.samples.setdefault(label, []).append(sample)
+                if prof:
+                    if label in self._stats:
+                        self._stats[label].add(prof)
+                    else:
+                        self._stats[label] = pstats.Stats(prof)
+
+    @contextmanager
+    def span(self, category: str) -> Iterator[None]:  # Time a slice of the current command (outermost span wins).
+        sample = getattr(self._local, "sample", None) if self.enabled else None
+        if sample is None or getattr(self._local, "in_span", False):
+            yield
+            return
+        self._local.in_span = True
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            sample[category] += time.perf_counter() - start
+            self._local.in_span = False
+
+    def record_call(self, name: str, seconds: float) -> None:
+        with self._lock:
+            self.calls.setdefault(name, []).append(seconds)
+
+    # --- reporting ---
+    def report(self) -> str:
+        out: List[str] = ["Per-command latency (ms, input wait excluded)", ""]
+        header = f"{'command':<24}{'runs':>6}{'p50':>10}{'p95':>10}{'sql':>10}{'render':>10}{'python':>10}"
+        out.append(header)
+        out.append("-" * len(header))
+        with self._lock:
+            for label, rows in sorted(self.samples.items()):
+                work = [r["total"] - r["input"] for r in rows]
+                n = len(rows)
+                sql = sum(r["sql"] for r in rows) / n
+                render = sum(r["render"] for r in rows) / n
+                python = sum(w for w in work) / n - sql - render
+                out.append(f"{label[:23]:<24}{n:>6}{_percentile(work, 50) * 1000:>10.2f}{_percentile(work, 95) * 1000:>10.2f}"
+                           f"{sql * 1000:>10.2f}{render * 1000:>10.2f}{python * 1000:>10.2f}")
+            if self.calls:
+                out += ["", "Service calls (ms)", f"{'call':<40}{'n':>6}{'p50':>10}{'p95':>10}"]
+                for name, secs in sorted(self.calls.items()):
+                    out.append(f"{name[:39]:<40}{len(secs):>6}{_percentile(secs, 50) * 1000:>10.2f}{_percentile(secs, 95) * 1000:>10.2f}")
+            for label, stats in sorted(self._stats.items()):
+                buf = io.StringIO()
+                stats.stream = buf
+                stats.sort_stats("cumulative").print_stats(15)
+                out += ["", f"== cProfile: {label} ==", buf.getvalue()]
+        return "\n".join(out) + "\n"
+
+    def write_report(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as fh:
+            fh.write(self.report())
+
+PROFILER = Profiler()  # The one profiler the app uses.
+
+def timed(category: str) -> Callable[[Callable[..., Any]], Callable[..., Any]]:  # Decorator: count a function under a span category.
+    def wrap(fn: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(fn)
+        def inner(*args: Any, **kwargs: Any) -> Any:
+            if not PROFILER.enabled:  # Fast path when profiling is off.
+                return fn(*args, **kwargs)
+            with PROFILER.span(category):
+                return fn(*args, **kwargs)
+        return inner
+    return wrap
+
+def profile_service(service: Any, profiler: Optional[Profiler] = None) -> Any:  # Wrap every public method of a service with a timer.
+    prof = profiler or PROFILER
+    name = type(service).__name__
+    for attr in dir(service):
+        if attr.startswith("_"):
+            continue
+        fn = getattr(service, attr)
+        if not callable(fn) or not hasattr(fn, "__self__") or inspect.iscoroutinefunction(fn):  # Sync bound methods only.
+            continue
+        def make(fn: Callable[..., Any], key: str) -> Callable[..., Any]:
+            @functools.wraps(fn)
+            def inner(*args: Any, **kwargs: Any) -> Any:
+                start = time.perf_counter()
+                try:
+                    return fn(*args, **kwargs)
+                finally:
+                    prof.record_call(key, time.perf_counter() - start)
+            return inner
+        setattr(service, attr, make(fn, f"{name}.{attr}"))
+    return service
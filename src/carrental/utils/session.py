@@ -0,0 +1,153 @@
+# ==============================================================================
+# Record a real CLI session and replay many of them headless, in parallel.
+# Every step tells you plainly what it does.
+#   - DESIGN PATTERN: Proxy (input/getpass/stdout route to the current thread's session)
+# ==============================================================================
+
+"""Session recorder and replayer: operator workloads become repeatable load tests."""  # UI-level latency you can compare run to run.
+
+from __future__ import annotations  # Modern hints.
+import builtins, getpass, io, json, sys, threading, time  # Patched hooks, session files, per-thread routing, think time.
+from collections import deque  # Last lines of output of a failed session.
+from concurrent.futures import ThreadPoolExecutor  # Parallel sessions.
+from typing import Any, Callable, Dict, Iterable, List, Optional  # Type names.
+from carrental.utils.profiling import PROFILER  # Per-command latency of the replayed sessions.
+
+# One JSON object per answered prompt:
+#   {"prompt": "Email:", "value": "a@b.c", "hidden": false, "think": 1.42}
+# "think" is how long the operator took to answer; hidden answers are null unless secrets were kept.
+
+class SessionRecorder:  # Wraps input()/getpass() and appends every answer to a JSONL file.
+    """Record the answers typed into this process; start() patches the prompts, stop() restores them."""  # Human description.
+    def __init__(self, path: str, *, keep_secrets: bool = False) -> None:
+        self.path = path
+        self.keep_secrets = keep_secrets  # False: passwords are written as null (replay supplies one).
+        self.events = 0
+        self._fh: Optional[io.TextIOBase] = None
+        self._saved: Optional[tuple] = None
+
+    def start(self) -> "SessionRecorder":
+        if self._saved is None:
+            self._fh = open(self.path, "w", encoding="utf-8")
+            self._saved = (builtins.input, getpass.getpass)
+            builtins.input = self._wrap(self._saved[0], hidden=False)
+            getpass.getpass = self._wrap(self._saved[1], hidden=True)
+        return self
+
+    def stop(self) -> None:  # Safe to call twice (also registered at exit).
+        if self._saved is not None:
+            builtins.input, getpass.getpass = self._saved
+            self._saved = None
+            self._fh.close()
+
+    def _wrap(self, ask: Callable[..., str], *, hidden: bool) -> Callable[..., str]:
+        def recorded(prompt: Any = "", *args: Any, **kwargs: Any) -> str:
+            start = time.perf_counter()
+            value = ask(prompt, *args, **kwargs)
+            event = {"prompt": str(prompt).strip(), "value": value if self.keep_secrets or not hidden else None,
+                     "hidden": hidden, "think": round(time.perf_counter() - start, 3)}
+            self._fh.write(json.dumps(event) + "\n")
+            self._fh.flush()  # A crash still leaves a usable session file.
+            self.events += 1
+            return value
+        return recorded
+
+def load_session(path: str) -> List[Dict]:  # Events of one recorded session.
+    with open(path, encoding="utf-8") as fh:
+        return [json.loads(line) for line in fh if line.strip()]
+
+class _Session:  # One replaying session: its answers and where its output goes.
+    def __init__(self, events: List[Dict], think: float, password: Optional[str]) -> None:
+        self.answers = deque(events)
+        self.think = think
+        self.password = password
+        self.tail: "deque[str]" = deque(maxlen=20)  # Last output lines, shown when a session fails.
+
+    def answer(self, hidden: bool) -> str:
+        if not self.answers:
+            raise EOFError("session ran out of recorded input")  # Same as stdin closing.
+        event = self.answers.popleft()
+        if self.think:
+            time.sleep(event.get("think", 0.0) * self.think)
+        value = event.get("value")
+        if value is None and event.get("hidden"):
+            if self.password is None:
+                raise EOFError("recorded password was redacted; pass a replay password")
+            value = self.password
+        return value
+
+class _Stdout:  # sys.stdout stand-in: replaying threads write to their session, others to the real stream.
+    def __init__(self, real: Any, local: threading.local) -> None:
+        self.real = real
+        self.local = local
+
+    def write(self, text: str) -> int:
+        session = getattr(self.local, "session", None)
+        if session is None:
+            return self.real.write(text)
+        session.tail.extend(line for line in text.splitlines() if line.strip())
+        return len(text)
+
+    def flush(self) -> None:
+        if getattr(self.local, "session", None) is None:
+            self.real.flush()
+
+    def isatty(self) -> bool:  # clear() skips the terminal escape when this is False.
+        return getattr(self.local, "session", None) is None and self.real.isatty()
+
+class HeadlessTerminal:  # Patch prompts and stdout once; each thread binds its own session.
+    """Context manager: inside it, threads that called bind() read answers from their session instead of the keyboard."""  # Human description.
+    def __init__(self) -> None:
+        self._local = threading.local()
+        self._saved: Optional[tuple] = None
+
+    def __enter__(self) -> "HeadlessTerminal":
+        self._saved = (builtins.input, getpass.getpass, sys.stdout)
+        real_input, real_getpass, real_stdout = self._saved
+        local = self._local
+        def input(prompt: Any = "") -> str:
+            session = getattr(local, "session", None)
+            return real_input(prompt) if session is None else session.answer(hidden=False)
+        def getpass_(prompt: str = "Password: ", stream: Any = None) -> str:
+            session = getattr(local, "session", None)
+            return real_getpass(prompt, stream) if session is None else session.answer(hidden=True)
+        builtins.input, getpass.getpass, sys.stdout = input, getpass_, _Stdout(real_stdout, local)
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        builtins.input, getpass.getpass, sys.stdout = self._saved
+
+    def run(self, entry: Callable[[], Any], events: List[Dict], *, think: float = 0.0, password: Optional[str] = None) -> Dict:
+        """Run entry() on this thread with events as its keyboard; returns what happened."""
+        session = self._local.session = _Session(events, think, password)
+        start = time.perf_counter()
+        error = None
+        try:
+            entry()
+        except SystemExit as ex:  # The Exit menu item ends the program this way.
+            if ex.code not in (None, 0):
+                error = f"exit code {ex.code}"
+        except Exception as ex:
+            error = f"{type(ex).__name__}: {ex}"
+        finally:
+            self._local.session = None
+        return {"ok": error is None, "error": error, "seconds": time.perf_counter() - start,
+                "unused": len(session.answers), "tail": list(session.tail) if error else []}
+
+def replay(entry: Callable[[], Any], sessions: Iterable[List[Dict]], *, workers: int = 8, think: float = 0.0,
+           password: Optional[str] = None) -> Dict:
+    """Replay every session through entry() (e.g. the CLI's main) on `workers` threads; returns a summary with the latency report."""
+    sessions = list(sessions)
+    PROFILER.reset()
+    was_enabled, PROFILER.enabled = PROFILER.enabled, True  # run_menu() times each command.
+    start = time.perf_counter()
+    try:
+        with HeadlessTerminal() as term, ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            results = list(pool.map(lambda events: term.run(entry, events, think=think, password=password), sessions))
+        seconds = time.perf_counter() - start
+        commands = sum(len(rows) for rows in PROFILER.samples.values())
+        return {"sessions": len(results), "ok": sum(r["ok"] for r in results), "failed": [r for r in results if not r["ok"]],
+                "seconds": seconds, "commands": commands, "commands_per_sec": commands / seconds if seconds else 0.0,
+                "report": PROFILER.report(), "results": results}
+    finally:
+        PROFILER.enabled = was_enabled
@@ -7,12 +7,14 @@
 """Console UI helpers: centered boxes, left-aligned content."""
 
 from __future__ import annotations
-import os, shutil
+import os, shutil, sys
 from typing import List
 import getpass
+from carrental.utils.profiling import timed
 
 def clear() -> None:
-    os.system("cls" if os.name == "nt" else "clear")
+    if sys.stdout.isatty():  # Piped or replayed output has no screen to clear (and no shell to spawn).
+        os.system("cls" if os.name == "nt" else "clear")
 
 def term_width(default: int = 80) -> int:
     try:
@@ -32,6 +34,7 @@ def _split_lines(items: List[str]) -> List[str]:
         out.extend(s.splitlines())
     return out
 
+@timed("render")
 def boxed(lines: List[str], title: str | None = None, padding: int = 0) -> str:
     """Draw a centered box; keep content LEFT-ALIGNED inside the box for neat columns."""
     width = term_width()
@@ -69,12 +72,14 @@ def boxed(lines: List[str], title: str | None = None, padding: int = 0) -> str:
 def box_text(text: str, title: str | None = None) -> str:
     return boxed(text.splitlines(), title=title)
 
+@timed("input")
 def prompt_center(label: str) -> str:
     w = term_width()
     inner = min(max(48, len(label) + 2), w - 10)
     left = max((w - inner) // 2, 0)
     return input((" " * left) + label.strip() + " ")
 
+@timed("input")
 def prompt_center_hidden(label: str) -> str:
     w = term_width()
     inner = min(max(48, len(label) + 2), w - 10)
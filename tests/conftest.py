@@ -18,15 +18,16 @@ def _isolate_cwd(tmp_path, monkeypatch):
     monkeypatch.chdir(tmp_path)
 
 @pytest.fixture(autouse=True)
-def _reset_db_singleton():
+def _reset_db_singleton(tmp_path):
     """
     Reset the Database singleton before/after each test so connections
-    and schema init are clean and independent.
+    and schema init are clean and independent. During a test it points at
+    a fresh file in tmp_path, never at the app's carrental.db.
     """
     try:
         from carrental.storage.db import Database
         if hasattr(Database, "_instance"):
-            Database._instance = None  # type: ignore[attr-defined]
+            Database._instance = Database(str(tmp_path / "carrental.db"))  # type: ignore[attr-defined]
     except Exception:
         pass
     yield
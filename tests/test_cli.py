@@ -0,0 +1,188 @@
+# tests/test_cli.py
+import time
+
+
+def test_profiler_splits_command_time_into_buckets():
+    from carrental.utils.profiling import PROFILER, timed, profile_service
+    from carrental.storage.db import Database
+    from carrental.services.inventory_service import InventoryService
+
+    @timed("render")
+    def render():
+        time.sleep(0.01)
+
+    @timed("input")
+    def wait_for_user():
+        time.sleep(0.05)
+
+    PROFILER.reset()
+    PROFILER.enable()
+    try:
+        inv = profile_service(InventoryService(Database("prof.db")))
+        for _ in range(3):
+            with PROFILER.command("View Cars"):
+                inv.list_cars()
+                render()
+                wait_for_user()
+        sample = PROFILER.samples["View Cars"][0]
+        assert sample["input"] >= 0.05 and sample["render"] >= 0.01 and sample["sql"] > 0
+        assert len(PROFILER.calls["InventoryService.list_cars"]) == 3
+        report = PROFILER.report()
+        assert "View Cars" in report and "p95" in report
+    finally:
+        PROFILER.enabled = False
+        PROFILER.reset()
+
+    from carrental.utils.profiling import _percentile
+    samples = [float(i) for i in range(1, 21)]
+    assert (_percentile(samples, 95), _percentile([1.0, 2.0], 50), _percentile([1.0, 2.0, 3.0], 50)) == (19.0, 1.0, 2.0)  # Nearest rank.
+
+
+def test_batch_runner_groups_writes_and_reads_in_parallel(tmp_path):
+    import io
+    import json
+    from carrental.storage.db import Database
+    from carrental.cli.batch import BatchRunner, load_ops
+
+    lines = [
+        {"op": "inventory.add_car", "args": {"make": "Toyota", "model": "Yaris", "year": 2020, "mileage": 10, "daily_rate": 50.0, "min_days": 1, "max_days": 14}},
+        {"op": "inventory.add_car", "args": {"make": "Kia", "model": "Rio", "year": 2021, "mileage": 10, "daily_rate": 40.0, "min_days": 1, "max_days": 14}},
+        {"op": "inventory.update_car", "args": {"car_id": 99, "daily_rate": 1.0}, "id": "missing"},
+        {"op": "inventory.update_car", "args": {"car_id": 1, "bogus": 1}, "id": "bad-args"},
+        {"op": "inventory.update_car", "args": {"car_id": 2, "daily_rate": 45.0}},
+        {"op": "inventory.get", "args": {"car_id": 2}},
+        {"op": "inventory.list_cars", "args": {}},
+        {"op": "nope.nothing"},
+    ]
+    path = tmp_path / "cmds.jsonl"
+    path.write_text("# nightly job\n" + "\n".join(json.dumps(x) for x in lines) + "\n", encoding="utf-8")
+
+    db = Database(str(tmp_path / "b.db"))
+    log = io.StringIO()
+    summary = BatchRunner(db, group_size=2).run(load_ops(str(path)), log=log)
+    results = summary["results"]
+    assert [r["ok"] for r in results] == [True, True, False, False, True, True, True, False]
+    assert results[2]["id"] == "missing" and "error" in results[3]
+    assert results[5]["result"]["daily_rate"] == 45.0
+    assert len(log.getvalue().splitlines()) == 8
+    assert summary["ops_per_sec"] > 0
+
+
+def test_metrics_registry_renders_prometheus_text(tmp_path):
+    import threading
+    import urllib.request
+    from carrental.utils.metrics import MetricsRegistry, METRICS
+    from carrental.storage.db import Database
+    from carrental.services.auth_service import AuthService
+
+    reg = MetricsRegistry()
+    hits = reg.counter("app_hits_total", "Hits.", ("path",))
+    depth = reg.gauge("app_queue_depth", "Queue depth.")
+    lat = reg.histogram("app_latency_seconds", "Latency.", buckets=(0.1, 1.0))
+    workers = [threading.Thread(target=lambda: [hits.inc(path='/a"b') for _ in range(1000)]) for _ in range(4)]
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    depth.inc(3); depth.dec()
+    for v in (0.05, 0.5, 5.0):
+        lat.observe(v)
+    text = reg.render()
+    assert '# TYPE app_hits_total counter\napp_hits_total{path="/a\\"b"} 4000\n' in text
+    assert "app_queue_depth 2\n" in text
+    assert 'app_latency_seconds_bucket{le="0.1"} 1\napp_latency_seconds_bucket{le="1"} 2\napp_latency_seconds_bucket{le="+Inf"} 3\n' in text
+    assert "app_latency_seconds_sum 5.55\napp_latency_seconds_count 3\n" in text
+
+    logins = METRICS.counter("carrental_logins_total", "Login attempts.", ("result",))
+    writes = METRICS.histogram("carrental_db_unit_of_work_seconds", "Time spent inside unit_of_work() blocks.", ("outcome",))
+    before = (logins.value(result="failed"), writes.count(outcome="commit"))
+    auth = AuthService(Database(str(tmp_path / "m.db")))
+    auth.register(email="x@test.local", password="pw", name="X")
+    auth.login(email="x@test.local", password="nope")
+    assert (logins.value(result="failed"), writes.count(outcome="commit")) == (before[0] + 1, before[1] + 1)
+
+    server = METRICS.serve(0)
+    try:
+        body = urllib.request.urlopen(f"http://127.0.0.1:{server.server_address[1]}/metrics").read().decode()
+        assert 'carrental_logins_total{result="failed"}' in body
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_recorded_session_replays_headless_in_parallel(tmp_path):
+    import threading
+    from carrental.main import main
+    from carrental.storage.db import Database
+    from carrental.storage.repositories import CarRepository
+    from carrental.utils.session import HeadlessTerminal, SessionRecorder, load_session, replay
+
+    db_path = str(tmp_path / "replay.db")
+    CarRepository(Database(db_path)).add("Kia", "Rio", 2021, 10, 40.0, True, 1, 14, "Hatchback")
+    typed = ["2", "Ann", "ann@test.local", "pw", "",  # Register (a duplicate on replay just says so).
+             "1", "ann@test.local", "pw", "1", "", "0", "",  # Login, View Cars, Logout.
+             "0"]  # Exit.
+    record = str(tmp_path / "ann.jsonl")
+    with HeadlessTerminal() as term:  # Stands in for the keyboard while recording.
+        recorder = SessionRecorder(record).start()
+        result = term.run(lambda: main(["--db", db_path]), [{"value": v} for v in typed])
+        recorder.stop()
+    assert result["ok"] and recorder.events == len(typed)
+    events = load_session(record)
+    assert [e["value"] for e in events if not e["hidden"]] == [v for v in typed if v != "pw"]
+    assert all(e["value"] is None for e in events if e["hidden"])  # Passwords are not written by default.
+
+    threads = threading.active_count()
+    summary = replay(lambda: main(["--db", db_path]), [events] * 6, workers=3, password="pw")
+    assert summary["ok"] == 6 and not summary["failed"]
+    assert threading.active_count() == threads  # Each main() stopped its scheduler and audit writer.
+    assert summary["commands"] == 6 * 4  # Register, Login, View Cars, Logout per session.
+    assert "View Cars" in summary["report"] and "Login" in summary["report"]
+
+    short = replay(lambda: main(["--db", db_path]), [events[:6]], password="pw")  # Input ends mid-session.
+    assert short["failed"][0]["error"].startswith("EOFError") and short["failed"][0]["tail"]
+    assert replay(lambda: main(["--db", db_path]), [events])["failed"][0]["error"].endswith("pass a replay password")
+
+
+def test_update_car_command_reports_a_concurrent_edit(tmp_path, monkeypatch, capsys):
+    import builtins
+    from carrental.cli.commands import UpdateCarCommand
+    from carrental.storage.db import Database
+    from carrental.services.inventory_service import InventoryService
+
+    inv = InventoryService(Database(str(tmp_path / "u.db")))
+    inv.add_car("Kia", "Rio", 2021, 10, 40.0, 1, 14)
+    answers = iter(["1", "", "", "", "", "55", "", "", "", ""])  # Car 1, new daily rate 55.
+    def typed(prompt=""):
+        if "Available" in prompt:  # Another admin saves while this one is still typing.
+            inv.update_car(1, daily_rate=60.0)
+        return next(answers)
+    monkeypatch.setattr(builtins, "input", typed)
+    assert UpdateCarCommand(inv).execute() is True
+    assert "Please try again." in capsys.readouterr().out  # The conflict box (wrapped, so match its last line).
+    assert inv.get(1)["daily_rate"] == 60.0  # The other admin's change survives.
+
+
+def test_my_bookings_pages_through_archived_history(tmp_path, monkeypatch, capsys):
+    import builtins
+    from carrental.cli.commands import MyBookingsCommand
+    from carrental.storage.archive import BookingArchiver
+    from carrental.storage.db import Database
+    from carrental.storage.repositories import BookingRepository, CarRepository, UserRepository
+    from carrental.services.rental_service import RentalService
+
+    db = Database(str(tmp_path / "m.db"))
+    UserRepository(db).create("m@test.local", "pw", "Mia", "customer")
+    CarRepository(db).add("Kia", "Rio", 2021, 10, 40.0, True, 1, 14, "Hatchback")
+    for month in range(1, 12):  # Eleven old trips, archived below...
+        BookingRepository(db).create(1, 1, f"2020-{month:02d}-01", f"2020-{month:02d}-02", 80.0)
+    BookingRepository(db).create(1, 1, "2030-01-01", "2030-01-02", 80.0)  # ...and one upcoming trip.
+    assert BookingArchiver(db).run(older_than_months=12) == 11
+    rent = RentalService(db)
+    rent.set_current_user_id(1)
+    answers = iter(["n", "", ""])  # Next page, leave the pager, then "Press Enter".
+    monkeypatch.setattr(builtins, "input", lambda prompt="": next(answers))
+    assert MyBookingsCommand(rent).execute() is True
+    out = capsys.readouterr().out
+    assert "Bookings: 12" in out and "page 2/2" in out
+    assert all(f"2020-{month:02d}-01" in out for month in range(1, 12))  # Count and rows agree: no empty pages.
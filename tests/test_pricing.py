@@ -0,0 +1,54 @@
+# tests/test_pricing.py
+from carrental.core.strategies import WeekendMultiplierStrategy
+from carrental.core.pricing import RateCalendarStrategy, WeekdayRule, SeasonRule, HolidayRule, DemandRule
+
+
+def test_rate_calendar_matches_weekend_strategy_by_default():
+    cal = RateCalendarStrategy(first_day="2025-01-01")
+    legacy = WeekendMultiplierStrategy()
+    for start, end in [("2025-09-20", "2025-09-22"), ("2025-03-03", "2025-03-30"), ("2025-12-31", "2026-01-02")]:
+        total, details = cal.quote(80.0, start, end)
+        legacy_total, legacy_details = legacy.quote(80.0, start, end)
+        assert total == legacy_total
+        assert details["weekday_days"] == legacy_details["weekday_days"]
+        assert details["weekend_days"] == legacy_details["weekend_days"]
+
+
+def test_rate_calendar_stacks_rules_and_grows_window():
+    cal = RateCalendarStrategy([WeekdayRule((5, 6), 1.0)], first_day="2025-06-01", horizon_days=30)
+    cal.set_rules([
+        SeasonRule((12, 1), (2, 28), 1.5),
+        HolidayRule(("2025-12-25",), 2.0),
+        DemandRule("2025-12-24", "2025-12-26", 0.5),
+    ])
+    assert cal.multiplier_for("2025-12-25") == 1.5 * 2.0 * 0.5
+    assert cal.multiplier_for("2026-02-10") == 1.5
+    assert cal.multiplier_for("2025-11-30") == 1.0
+    total, _ = cal.quote(100.0, "2025-12-23", "2025-12-26")  # 1.5 + 0.75 + 1.5 + 0.75
+    assert total == 450.0
+    window = cal._days
+    assert cal.quote(100.0, "2199-12-24", "2199-12-26")[0] == 450.0  # Far-off quotes are still priced...
+    assert cal._days == window  # ...without growing the calendar to reach them.
+
+
+def test_memoizing_strategy_caches_and_resets_on_reconfigure():
+    from carrental.core.pricing import MemoizingPricingStrategy
+
+    weekend = WeekendMultiplierStrategy()
+    memo = MemoizingPricingStrategy(weekend, max_entries=2)
+    first = memo.quote(80.0, "2025-09-19", "2025-09-22")
+    first[1]["days_total"] = 4.0  # Callers may decorate the details...
+    assert memo.quote(80.0, "2025-09-19", "2025-09-22") == weekend.quote(80.0, "2025-09-19", "2025-09-22")  # ...the cache is unaffected.
+    memo.quote(80.0, "2025-10-01", "2025-10-02")
+    memo.quote(90.0, "2025-10-01", "2025-10-02")  # Evicts the oldest (the first key).
+    assert memo.stats() == {"hits": 1, "misses": 3, "size": 2, "hit_rate": 0.25}
+
+    weekend.weekend_multiplier = 1.5  # Reconfigured: new prices, cache starts over.
+    assert memo.quote(90.0, "2025-10-01", "2025-10-02") == weekend.quote(90.0, "2025-10-01", "2025-10-02")
+    assert memo.stats()["size"] == 1
+
+    cal = RateCalendarStrategy(first_day="2025-01-01")
+    memo = MemoizingPricingStrategy(cal)
+    assert memo.quote(100.0, "2025-12-25", "2025-12-25")[0] == 100.0
+    cal.add_rule(HolidayRule(("2025-12-25",), 2.0))
+    assert memo.quote(100.0, "2025-12-25", "2025-12-25")[0] == 200.0
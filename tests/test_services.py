@@ -134,3 +134,275 @@ def test_booking_flow_creates_pending_or_confirmed():
     user_bookings = bookings.list(user_id=user["id"])
     assert len(user_bookings) >= 1
     assert user_bookings[0].get("status", "PENDING") in {"PENDING", "CONFIRMED", "REJECTED"}
+
+def test_availability_matrix_paints_bookings_in_one_pass():
+    from carrental.storage.memory import MemoryBackend
+    from carrental.core.availability import FREE, PENDING, BOOKED
+
+    store = MemoryBackend()
+    inv, rent = InventoryService(store), RentalService(store)
+    inv.add_car("Toyota", "Yaris", 2020, 100, 50.0, 1, 14)
+    inv.add_car("Honda", "Civic", 2021, 100, 60.0, 1, 14)
+    store.bookings.create(1, 1, "2030-01-02", "2030-01-03", 100.0)
+    store.bookings.create(1, 1, "2029-12-30", "2030-01-01", 100.0)
+    store.bookings.create(1, 2, "2030-01-04", "2030-01-09", 100.0)
+    rent.set_booking_status(3, "APPROVED")
+
+    m = rent.availability_matrix(start="2030-01-01", days=5)
+    assert m.row_for(1) == bytes([PENDING, PENDING, PENDING, FREE, FREE])
+    assert m.row_for(2) == bytes([FREE, FREE, FREE, BOOKED, BOOKED])
+    rows, _ = rent.fleet_heatmap_table(days=5, width=5)
+    assert len(rows) == 2
+
+def test_async_booking_pipeline_is_bounded_and_idempotent():
+    import asyncio
+    from carrental.storage.memory import MemoryBackend
+    from carrental.services.payment_pipeline import FakeGatewayServer, PaymentPipeline
+
+    store = MemoryBackend()
+    InventoryService(store).add_car("Toyota", "Yaris", 2020, 100, 50.0, 1, 14)
+    rent = RentalService(store)
+
+    async def scenario():
+        server = await FakeGatewayServer(latency=0.02).start()
+        try:
+            pipeline = PaymentPipeline(server.client(), concurrency=2, timeout=1.0)
+            results = await asyncio.gather(*[
+                rent.make_booking_async(user_id=1, car_id=1, start_date=f"2030-01-0{3 * (i % 3) + 1}", end_date=f"2030-01-0{3 * (i % 3) + 2}",
+                                        pipeline=pipeline, idempotency_key=f"k{i % 3}")
+                for i in range(6)
+            ])
+            slow = await FakeGatewayServer(latency=0.5).start()
+            timed_out = await PaymentPipeline(slow.client(), timeout=0.05, retries=1, backoff=0.01).pay(10.0, "slow")
+            await slow.stop()
+            return results, server.charges, server.peak_in_flight, timed_out
+        finally:
+            await server.stop()
+
+    results, charges, peak, timed_out = asyncio.run(scenario())
+    assert all(ok for ok, _ in results)
+    assert charges == 3
+    assert peak <= 2
+    assert len(store.bookings.list()) == 3
+    assert not timed_out.ok and timed_out.error == "timeout" and timed_out.attempts == 2
+
+    quote = rent.quote  # Someone else holds the dates once our quote has passed: refused before any money moves.
+    def quote_then_lose(*a, **kw):
+        out = quote(*a, **kw)
+        store.holds.place("theirs", 2, 1, "2030-02-01", "2030-02-02", rent._now(600), rent._now())
+        return out
+    rent.quote = quote_then_lose
+
+    async def taken():
+        server = await FakeGatewayServer(latency=0.0).start()
+        try:
+            res = await rent.make_booking_async(user_id=1, car_id=1, start_date="2030-02-01", end_date="2030-02-02",
+                                                pipeline=PaymentPipeline(server.client()), idempotency_key="late")
+            return res, server.charges
+        finally:
+            await server.stop()
+
+    (ok, message), charged = asyncio.run(taken())
+    assert not ok and "not available" in message and charged == 0
+    assert not store.holds.live("2030-01-01", "2030-01-31", rent._now())  # Our reservations were released after booking.
+
+    from carrental.utils.metrics import METRICS
+    bookings_total = METRICS.counter("carrental_bookings_total", "Booking attempts by result.", ("result",))
+    before = bookings_total.value(result="failed")
+    assert asyncio.run(rent.make_booking_async(car_id=1, start_date="2030-01-05", end_date="2030-01-06", pipeline=None))[0] is False  # No user.
+    assert bookings_total.value(result="failed") == before + 1  # Early returns count, same as make_booking.
+
+def test_alternatives_ranked_and_refreshed_on_car_changes():
+    from carrental.storage.memory import MemoryBackend
+
+    store = MemoryBackend()
+    inv, rent = InventoryService(store), RentalService(store)
+    inv.add_car("Toyota", "RAV4", 2021, 100, 90.0, 1, 14)     # 1: requested
+    inv.add_car("Toyota", "RAV4", 2020, 100, 88.0, 1, 14)     # 2: closest
+    inv.add_car("Honda", "Civic", 2012, 100, 40.0, 1, 14)     # 3: far
+    inv.add_car("Toyota", "Corolla", 2021, 100, 85.0, 1, 14)  # 4: middle
+    inv.set_availability(1, False)
+
+    assert [c["id"] for c in rent.alternatives(1, "2030-01-01", "2030-01-03")] == [2, 4, 3]
+    store.bookings.create(9, 2, "2030-01-02", "2030-01-05", 100.0)  # 2 is now busy on those dates
+    inv.add_car("Toyota", "RAV4", 2021, 100, 90.0, 1, 14)     # 5: identical twin, added after the index exists
+    assert [c["id"] for c in rent.alternatives(1, "2030-01-01", "2030-01-03", k=2)] == [5, 4]
+    inv.update_car(5, make="Kia", model="Rio", year=2010, daily_rate=20.0)
+    assert [c["id"] for c in rent.alternatives(1, "2030-01-01", "2030-01-03", k=2)] == [4, 3]
+
+
+def test_similarity_index_rescans_a_list_that_lost_a_neighbour():
+    from carrental.services.alternatives import SimilarityIndex
+    from carrental.storage.memory import MemoryBackend
+
+    store = MemoryBackend()
+    inv = InventoryService(store)
+    for year in (2021, 2020, 2019, 2018, 2017, 2016):         # 1 requested, 2..6 ever farther away
+        inv.add_car("Toyota", "RAV4", year, 100, 90.0, 1, 14)
+    index = SimilarityIndex(store.cars, neighbours=4)
+    assert [cid for _, cid in index.neighbours(1)] == [2, 3, 4, 5]
+    inv.delete_car(2)                                         # List keeps 3..5; 6 is next but was never stored
+    inv.add_car("Kia", "Rio", 2000, 100, 20.0, 1, 14)         # 7: far away, must not jump ahead of 6
+    assert [cid for _, cid in index.neighbours(1)] == [3, 4, 5, 6]
+
+
+def test_booking_history_joins_names_and_totals_in_sql(tmp_path):
+    from carrental.storage.backends import SQLiteBackend
+    from carrental.storage.memory import MemoryBackend
+
+    def run(store):
+        auth, inv, rent = AuthService(store), InventoryService(store), RentalService(store)
+        auth.register(email="h@test.local", password="pw", name="Hana")
+        uid = store.users.get_by_email("h@test.local")["id"]
+        inv.add_car("Toyota", "Yaris", 2020, 100, 50.0, 1, 14)
+        for start, end in [("2030-01-01", "2030-01-03"), ("2030-02-01", "2030-02-02"), ("2030-03-01", "2030-03-02")]:
+            rent.make_booking(user_id=uid, car_id=1, start_date=start, end_date=end)
+        rent.set_booking_status(1, "APPROVED")
+        page = rent.booking_history(uid, limit=2, offset=1)
+        ranged = rent.booking_history(uid, date_from="2030-01-02", date_to="2030-02-01")
+        totals = rent.booking_totals(uid, today="2030-02-15")
+        return page, ranged, totals, rent.my_bookings_table(uid)[0], rent.pending_bookings_table()[0]
+
+    sqlite_db = Database(str(tmp_path / "h.db"))
+    result = run(SQLiteBackend(sqlite_db))
+    assert result == run(MemoryBackend())
+    page, ranged, totals, my_rows, pending_rows = result
+    assert [b["start_date"] for b in page] == ["2030-02-01", "2030-01-01"]
+    assert page[0]["make"] == "Toyota" and page[0]["user_name"] == "Hana"
+    assert [b["id"] for b in ranged] == [2, 1]
+    assert totals == {"bookings": 3, "spent": 150.0, "upcoming": 1}
+    assert my_rows[0][1] == "Toyota Yaris" and pending_rows[0][1] == "Hana"
+    plan = " ".join(r[3] for r in sqlite_db.connect().execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM bookings b WHERE b.user_id = 1 ORDER BY b.start_date DESC"))
+    assert "idx_bookings_user_start" in plan
+
+def test_scheduler_expires_stale_requests_and_completes_trips(tmp_path):
+    from datetime import datetime, timedelta, timezone
+    from carrental.services.scheduler import Scheduler, schedule_booking_maintenance
+
+    clock = [0.0]
+    sched = Scheduler(clock=lambda: clock[0])
+    seen = []
+    sched.every(10, lambda: seen.append(clock[0]), name="tick")
+    once = sched.call_later(5, lambda: seen.append("once"))
+    sched.cancel(sched.call_later(1, lambda: seen.append("cancelled")))
+    for t in (0, 5, 12, 25):
+        clock[0] = t
+        sched.run_pending()
+    assert seen == [0, "once", 12, 25] and once.runs == 1
+
+    db = Database(str(tmp_path / "m.db"))
+    users, cars, bookings = UserRepository(db), CarRepository(db), BookingRepository(db)
+    users.create("m@test.local", "pw", "Mia", "customer")
+    for _ in range(4):
+        cars.add("Kia", "Rio", 2021, 10, 40.0, True, 1, 14, "Hatchback")
+    rent = RentalService(db)
+    today = datetime.now(timezone.utc).date()
+    day = lambda n: (today + timedelta(days=n)).isoformat()
+    bookings.create(1, 1, day(-5), day(-2), 120.0)  # Finished trip -> COMPLETED, car 1 free again.
+    bookings.create(1, 2, day(-5), day(-2), 120.0)  # Same, but car 2 has another approved trip ahead.
+    bookings.create(1, 2, day(10), day(12), 120.0)
+    bookings.create(1, 3, day(20), day(21), 80.0)  # Fresh request: stays PENDING.
+    bookings.create(1, 3, day(30), day(31), 80.0)  # Request nobody reviewed for three days -> EXPIRED.
+    bookings.create(1, 4, day(-5), day(-2), 120.0)  # Finished trip, but an admin parked car 4 since: it stays out.
+    for bid in (1, 2, 3, 6):
+        rent.set_booking_status(bid, "APPROVED")
+    cars.update(4, available=False)
+    db.connect().execute("UPDATE bookings SET created_at = ? WHERE id = 5",
+                         ((datetime.now(timezone.utc) - timedelta(hours=72)).isoformat(timespec="seconds"),))
+    db.connect().commit()
+
+    events = []
+    db.subscribe("cars", lambda event, car_id: events.append(event))
+    job = schedule_booking_maintenance(Scheduler(), db, hold_hours=48, batch_size=1)
+    job.fn()
+    assert job.fn.__name__ == "maintain" and events == ["bulk"]
+    assert [b["status"] for b in sorted(bookings.list(), key=lambda b: b["id"])] == ["COMPLETED", "COMPLETED", "APPROVED", "PENDING", "EXPIRED", "COMPLETED"]
+    assert [c["available"] for c in cars.list(only_available=False)] == [1, 0, 1, 0]
+    assert rent.booking_totals(1)["spent"] == 360.0  # Completed trips still count as money spent.
+
+def test_holds_block_other_customers_until_booked_or_expired(tmp_path):
+    import pytest
+    from carrental.storage.backends import SQLiteBackend
+    from carrental.storage.memory import MemoryBackend
+
+    for store in (SQLiteBackend(Database(str(tmp_path / "holds.db"))), MemoryBackend()):
+        for email in ("a@test.local", "b@test.local"):
+            store.users.create(email, "pw", email[0].upper(), "customer")
+        store.cars.add("Kia", "Rio", 2021, 10, 40.0, True, 1, 14, "Hatchback")
+        store.cars.add("Kia", "Picanto", 2021, 10, 38.0, True, 1, 14, "Hatchback")
+        rent = RentalService(store)
+        token = rent.hold(1, "2030-06-01", "2030-06-03", user_id=1)
+        assert rent.quote(1, "2030-06-01", "2030-06-03", user_id=1)[0] > 0  # Our own hold never blocks us.
+        with pytest.raises(ValueError, match="not available"):
+            rent.quote(1, "2030-06-02", "2030-06-05", user_id=2)
+        with pytest.raises(ValueError):
+            rent.hold(1, "2030-06-03", "2030-06-04", user_id=2)
+        rent.set_current_user_id(2)
+        assert [c["id"] for c in rent.alternatives(1, "2030-06-01", "2030-06-03")] == [2]
+        assert rent.make_booking(user_id=2, car_id=1, start_date="2030-06-01", end_date="2030-06-03", hold_token=token)[0] is False
+        assert rent.make_booking(user_id=1, car_id=1, start_date="2030-06-01", end_date="2030-06-03", hold_token=token)[0] is True
+        assert store.holds.get(token) is None  # Consumed: the booking now blocks the dates.
+        with pytest.raises(ValueError):
+            rent.hold(1, "2030-06-02", "2030-06-02", user_id=2)
+
+        short = RentalService(store, hold_ttl=-1)  # Expires at once.
+        stale = short.hold(2, "2030-07-01", "2030-07-02", user_id=1)
+        assert rent.hold(2, "2030-07-01", "2030-07-02", user_id=2)  # Expired holds are ignored...
+        assert short.make_booking(user_id=1, car_id=2, start_date="2030-07-01", end_date="2030-07-02", hold_token=stale)[1].endswith("expired. Please try again.")
+        short.hold(1, "2030-08-01", "2030-08-02", user_id=1)
+        assert rent.sweep_holds() == 1  # ...and swept in the background; the live one stays.
+
+        quote = rent.quote  # A hold placed after the quote passed must still stop a token-less booking.
+        def quote_then_held(*args, **kwargs):
+            price = quote(*args, **kwargs)
+            assert store.holds.place("late", 2, 2, "2030-09-01", "2030-09-02", rent._now(600), rent._now())
+            return price
+        rent.quote = quote_then_held
+        assert rent.make_booking(user_id=1, car_id=2, start_date="2030-09-01", end_date="2030-09-02")[0] is False
+        assert not store.bookings.overlapping("2030-09-01", "2030-09-02")
+        assert store.bookings.create(1, 2, "2030-10-01", "2030-10-03", 100.0)  # Dates hold() refuses are refused by a direct insert too.
+        assert store.bookings.create(2, 2, "2030-10-03", "2030-10-04", 100.0) is False
+
+def test_audit_log_batches_admin_changes_and_answers_queries(tmp_path):
+    import pytest
+    from carrental.storage.audit import AuditLog
+
+    db = Database(str(tmp_path / "audit.db"))
+    audit = AuditLog(db, batch_size=50, flush_interval=0.05, register_atexit=False)
+    audit.set_actor("boss@test.local")
+    auth, inv = AuthService(db, audit=audit), InventoryService(db, audit=audit)
+    rent = RentalService(db, audit=audit)
+    assert auth.add_admin("ann@test.local", "secret", "Ann")
+    assert auth.change_admin_password("ann@test.local", "hunter2")
+    auth.users.create("c@test.local", "pw", "Cy", "customer")
+    assert inv.add_car("Kia", "Rio", 2021, 10, 40.0, 1, 14)
+    assert inv.update_car(1, daily_rate=45.0)
+    assert rent.make_booking(user_id=2, car_id=1, start_date="2030-06-01", end_date="2030-06-03")[0]
+    rent.set_booking_status(1, "APPROVED")
+    for _ in range(120):  # A burst goes out in a few transactions, not one per entry.
+        audit.record("ping", "test")
+
+    rows = audit.query(entity="car")  # query() flushes first, so every entry is visible.
+    assert [r["action"] for r in rows] == ["car.update", "car.add"]
+    assert rows[0]["before"]["daily_rate"] == 40.0 and rows[0]["after"]["daily_rate"] == 45.0
+    assert audit.query(entity="booking")[0]["after"] == {"status": "APPROVED"}
+    password = audit.query(action="admin.password")[0]
+    assert password["actor"] == "boss@test.local" and "hunter2" not in str(password)
+    assert audit.written == 125 and audit.batches < 20 and audit.errors == 0
+    assert len(audit.query(action="ping", limit=10, offset=115)) == 5
+    audit.close()
+    audit.close()  # Safe twice.
+    with pytest.raises(RuntimeError):  # Refused after close instead of queued behind _STOP and never written.
+        audit.record("late", "test")
+
+    flaky = AuditLog(db, batch_size=1, flush_interval=0.01, retries=1, retry_delay=0.01, max_unwritten=2, register_atexit=False)
+    db.connect().execute("CREATE TRIGGER audit_down BEFORE INSERT ON audit_log BEGIN SELECT RAISE(ABORT, 'disk trouble'); END")  # Every write fails for now.
+    for action in ("lost", "kept", "also kept"):
+        flaky.record(action, "test")
+        flaky.flush()
+    assert flaky.errors == 3 and len(flaky.unwritten) == 2 and flaky.dropped == 1  # Bounded: only the oldest entry was given up.
+    db.connect().execute("DROP TRIGGER audit_down")
+    flaky.record("next", "test")
+    assert [r["action"] for r in flaky.query(entity="test", limit=4)] == ["next", "also kept", "kept", "ping"]  # Failed entries written later.
+    flaky.close()
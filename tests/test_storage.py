@@ -0,0 +1,341 @@
+# tests/test_storage.py
+from carrental.storage.db import Database
+from carrental.storage.backends import SQLiteBackend
+from carrental.storage.memory import MemoryBackend
+from carrental.services.auth_service import AuthService
+from carrental.services.inventory_service import InventoryService
+from carrental.services.rental_service import RentalService
+
+
+def _exercise(store):
+    auth, inv, rent = AuthService(store), InventoryService(store), RentalService(store)
+    assert auth.register(email="a@test.local", password="pw", name="A") is True
+    assert auth.register(email="a@test.local", password="pw", name="A") is False
+    assert auth.login(email="a@test.local", password="pw") is True
+    uid = auth.current_user_id()
+    inv.add_car("Toyota", "Yaris", 2020, 100, 50.0, 1, 14)
+    inv.add_car("Honda", "Civic", 2021, 100, 60.0, 1, 14)
+    inv.set_availability(2, False)
+    ok, _ = rent.make_booking(user_id=uid, car_id=1, start_date="2030-01-05", end_date="2030-01-07")
+    assert ok
+    bid = rent.pending_bookings()[0]["id"]
+    rent.set_booking_status(bid, "APPROVED")
+    return (
+        [c["id"] for c in inv.list_cars()],
+        rent.my_bookings_table(uid),
+        rent.pending_bookings(),
+        inv.get(1),
+    )
+
+
+def test_memory_backend_matches_sqlite(tmp_path):
+    sqlite_result = _exercise(SQLiteBackend(Database(str(tmp_path / "s.db"))))
+    memory_result = _exercise(MemoryBackend())
+    assert sqlite_result == memory_result
+    assert memory_result[0] == []  # car 1 approved, car 2 switched off
+
+
+def test_archiver_moves_old_bookings_in_batches(tmp_path):
+    from datetime import date
+    from carrental.storage.repositories import BookingRepository, CarRepository, UserRepository
+    from carrental.storage.archive import BookingArchiver
+
+    db = Database(str(tmp_path / "a.db"))
+    UserRepository(db).create("a@test.local", "pw", "Al", "customer")  # Foreign keys are enforced.
+    CarRepository(db).add("Kia", "Rio", 2021, 10, 40.0, True, 1, 14, "Hatchback")
+    bookings = BookingRepository(db)
+    for day in range(1, 8):
+        assert bookings.create(1, 1, f"2020-01-{2 * day - 1:02d}", f"2020-01-{2 * day:02d}", 10.0)
+    assert not bookings.create(1, 1, "2020-01-02", "2020-01-03", 10.0)  # Overlaps a pending booking.
+    bookings.create(1, 1, "2030-01-01", "2030-01-02", 10.0)
+
+    archiver = BookingArchiver(db, batch_size=3)
+    assert archiver.pending_count(12, today=date(2021, 6, 1)) == 7
+    assert archiver.run(12, max_batches=1, today=date(2021, 6, 1)) == 3
+    assert archiver.run(12, today=date(2021, 6, 1)) == 4
+    assert [b["start_date"] for b in bookings.list()] == ["2030-01-01"]
+    history = bookings.list(user_id=1, include_archive=True)
+    assert [b["id"] for b in history] == list(range(8, 0, -1))
+
+
+def test_group_commit_writer_batches_and_reports_ids(tmp_path):
+    import pytest
+    import sqlite3
+    from concurrent.futures import ThreadPoolExecutor
+    from carrental.storage.repositories import BookingRepository, CarRepository, UserRepository
+    from carrental.storage.group_commit import GroupCommitWriter
+
+    db = Database(str(tmp_path / "g.db"))
+    UserRepository(db).create("g@test.local", "pw", "Gus", "customer")
+    CarRepository(db).add("Kia", "Rio", 2021, 10, 40.0, True, 1, 14, "Hatchback")
+    with GroupCommitWriter(db, max_items=10, max_delay_ms=50) as writer:
+        with ThreadPoolExecutor(8) as pool:
+            futures = list(pool.map(lambda i: writer.submit(1, 1, f"2030-{1 + i // 28:02d}-{1 + i % 28:02d}", f"2030-{1 + i // 28:02d}-{1 + i % 28:02d}",
+                                                            10.0, f"k{i}"), range(40)))
+        ids = [f.result(timeout=5) for f in futures]
+        for dup in (writer.submit(1, 1, "2030-06-01", "2030-06-01", 10.0, "k0"),  # Same payment...
+                    writer.submit(1, 1, "2030-01-01", "2030-01-02", 10.0, "new")):  # ...or dates already booked.
+            with pytest.raises(sqlite3.IntegrityError):
+                dup.result(timeout=5)
+        assert writer.batches < 40
+    with pytest.raises(RuntimeError):  # Closed writers refuse work instead of leaving a future unresolved.
+        writer.submit(1, 1, "2030-01-01", "2030-01-02", 10.0, "late")
+    assert sorted(ids) == list(range(1, 41))
+    assert len(BookingRepository(db).list()) == 40
+
+
+def test_bulk_update_is_one_statement_on_both_engines(tmp_path):
+    import pytest
+    from carrental.storage.bulk import CarFilter
+
+    def run(store):
+        inv = InventoryService(store)
+        for make, model, rate in [("Toyota", "RAV4", 80.0), ("Honda", "CR-V", 90.0), ("Toyota", "Yaris", 40.0)]:
+            inv.add_car(make, model, 2021, 100, rate, 1, 14)
+        events = []
+        inv.car_repo.subscribe(lambda ev, cid: events.append((ev, cid)))
+        flt = CarFilter(make="toyota", rate_min=50.0)
+        assert inv.bulk_update(flt, [("daily_rate", "mul", 1.1)], dry_run=True) == 1
+        assert events == []  # A preview changes nothing.
+        assert inv.bulk_update(CarFilter(year_min=2020), [("daily_rate", "add", 5), ("available", "set", False)]) == 3
+        assert inv.bulk_update(flt, [("daily_rate", "mul", 1.1), ("mileage", "mul", 1.5)]) == 1
+        with pytest.raises(ValueError):
+            inv.bulk_update(flt, [("make", "mul", 2)])
+        return [(c["daily_rate"], c["mileage"], c["available"]) for c in inv.list_cars(only_available=False)], events, inv.list_cars()
+
+    sqlite_result = run(SQLiteBackend(Database(str(tmp_path / "b.db"))))
+    assert sqlite_result == run(MemoryBackend())
+    cars, events, available = sqlite_result
+    assert cars == [(93.5, 150, 0), (95.0, 100, 0), (45.0, 100, 0)]
+    assert events == [("bulk", None), ("bulk", None)] and available == []
+
+
+def test_snapshot_is_read_only_and_refreshes(tmp_path):
+    import os
+    import sqlite3
+    import pytest
+    from carrental.storage.snapshot import SnapshotDatabase
+    from carrental.storage.repositories import CarRepository
+
+    live = Database(str(tmp_path / "live.db"))
+    InventoryService(live).add_car("Toyota", "Yaris", 2020, 100, 50.0, 1, 14)
+    snap = SnapshotDatabase(live)
+    reports = InventoryService(snap)
+    assert [c["make"] for c in reports.list_cars()] == ["Toyota"]
+    assert snap.connect().execute("PRAGMA mmap_size").fetchone()[0] > 0
+
+    InventoryService(live).add_car("Honda", "Civic", 2021, 100, 60.0, 1, 14)
+    assert len(reports.list_cars()) == 1  # Frozen until refreshed.
+    first = snap.path
+    assert snap.refresh() == 2
+    assert len(reports.list_cars()) == 2
+    with pytest.raises(sqlite3.OperationalError):
+        CarRepository(snap).delete(1)
+    snap.refresh()
+    assert not os.path.exists(first)  # Generation before last is cleaned up.
+    with snap.read() as cur:  # A report outliving two refreshes keeps its generation open.
+        pinned = snap.path
+        snap.refresh()
+        snap.refresh()
+        cur.execute("SELECT COUNT(*) FROM cars")
+        assert cur.fetchone()[0] == 2 and os.path.exists(pinned)
+    assert not os.path.exists(pinned)  # The last reader closed it...
+    assert not snap._cursors.by_con  # ...and no cached cursor outlives its generation.
+    snap.close()
+    assert not [f for f in os.listdir(tmp_path) if "snapshot" in f]
+
+
+def test_statement_registry_reuses_sql_and_reads_skip_commit(tmp_path):
+    from carrental.storage.statements import STATEMENTS, canonical
+    from carrental.storage.repositories import BookingRepository, CarRepository
+
+    assert canonical("SELECT *\n   FROM cars  WHERE id=?") == "SELECT * FROM cars WHERE id=?"
+    db = Database(str(tmp_path / "r.db"), cached_statements=32)
+    cars, bookings = CarRepository(db), BookingRepository(db)
+    cars.add("Kia", "Rio", 2020, 10, 40.0, True, 1, 5, "CAR")
+    before = len(STATEMENTS)
+    for rate in (41.0, 42.0, 43.0):
+        assert cars.update(1, daily_rate=rate)
+        bookings.list(user_id=1)
+    assert len(STATEMENTS) - before <= 2  # One string per query shape, not per call.
+    assert db.cursor() is db.cursor()
+    with db.unit_of_work() as con:
+        cars.get(1)
+        assert not con.in_transaction  # Reads never open a transaction to commit.
+
+
+def test_read_pool_serves_reads_while_a_writer_holds_the_lock(tmp_path):
+    import sqlite3
+    import pytest
+    from concurrent.futures import ThreadPoolExecutor
+    from carrental.storage.repositories import CarRepository
+
+    db = Database(str(tmp_path / "p.db"), read_pool=2)
+    cars = CarRepository(db)
+    cars.add("Kia", "Rio", 2020, 10, 40.0, True, 1, 5, "CAR")
+    other = sqlite3.connect(db.path, timeout=0.1)
+    other.execute("BEGIN IMMEDIATE")  # Another process is mid-write.
+    other.execute("UPDATE cars SET daily_rate = 99 WHERE id = 1")
+    with ThreadPoolExecutor(4) as pool:
+        rates = list(pool.map(lambda _: cars.get(1)["daily_rate"], range(20)))
+    assert rates == [40.0] * 20  # Committed data, no waiting on the writer.
+    assert db._readers_made <= 2
+    other.rollback()
+    with db.read() as cur:
+        with pytest.raises(sqlite3.OperationalError):
+            cur.execute("DELETE FROM cars")  # Pool connections are read-only.
+    with db.transaction():
+        assert cars.update(1, daily_rate=45.0)
+        assert cars.get(1)["daily_rate"] == 45.0  # Inside a transaction reads see its own writes.
+    with ThreadPoolExecutor(1) as pool:
+        with pytest.raises(RuntimeError):
+            with db.transaction():
+                cars.update(1, daily_rate=50.0)
+                assert pool.submit(lambda: cars.list()[0]["daily_rate"]).result() == 45.0  # Other threads still read through the pool...
+                added = pool.submit(cars.add, "VW", "Up", 2021, 5, 30.0, True, 1, 5, "CAR")  # ...and their writes wait for this batch...
+                raise RuntimeError("batch failed")
+        added.result()
+    assert [c["daily_rate"] for c in cars.list()] == [45.0, 30.0]  # ...so the rollback cannot take them with it.
+    db.close_readers()
+
+
+def test_datagen_is_deterministic_and_non_overlapping(tmp_path):
+    import pytest
+    from carrental.storage.datagen import GeneratorConfig, generate
+
+    cfg = GeneratorConfig(users=50, cars=30, years=1, cars_per_task=7, batch_size=500)
+    a, b = Database(str(tmp_path / "a.db")), Database(str(tmp_path / "b.db"))
+    stats = generate(a, cfg)
+    assert generate(b, cfg, workers=2)["bookings"] == stats["bookings"] > 30 * 50
+    rows = "SELECT * FROM bookings ORDER BY id"
+    assert a.connect().execute(rows).fetchall() == b.connect().execute(rows).fetchall()
+    clashes = a.connect().execute(
+        "SELECT COUNT(*) FROM bookings x JOIN bookings y ON x.car_id = y.car_id AND x.id < y.id"
+        " AND x.end_date >= y.start_date AND x.start_date <= y.end_date").fetchone()[0]
+    assert clashes == 0
+    assert "idx_bookings_user_start" in {r[0] for r in a.connect().execute("SELECT name FROM sqlite_master WHERE type='index'")}
+    with pytest.raises(ValueError):
+        generate(a, cfg)  # Refuses to write into a database that already has data.
+
+
+def test_shard_router_fans_out_and_keeps_branches_apart(tmp_path):
+    from carrental.storage.sharding import ShardRouter
+
+    router = ShardRouter.open(str(tmp_path), ["north", "south"])
+    try:
+        users = router.backend("north").users  # Shared: same central file for every branch.
+        users.create("c@test.local", "pw", "Cara", "customer")
+        uid = router.backend("south").users.get_by_email("c@test.local")["id"]
+        router.cars("north").add("Toyota", "RAV4", 2022, 10, 80.0, True, 1, 14, "SUV")
+        router.cars("south").add("Kia", "Sportage", 2021, 10, 70.0, True, 1, 14, "SUV")
+        router.cars("south").add("Kia", "Rio", 2021, 10, 40.0, True, 1, 14, "Hatchback")
+        ok, _ = RentalService(router.backend("south")).make_booking(user_id=uid, car_id=1, start_date="2030-05-01", end_date="2030-05-03")
+        assert ok
+
+        free = router.find_free_cars("2030-05-02", "2030-05-04", vehicle_type="suv")
+        assert [(c["branch"], c["make"]) for c in free] == [("north", "Toyota")]  # South's SUV is booked.
+        assert len(router.list_cars()) == 3
+        mine = router.bookings_for_user(uid)
+        assert [(b["branch"], b["model"], b["user_name"]) for b in mine] == [("south", "Sportage", "Cara")]
+        assert router.bookings("north").list() == []
+        assert set(router.fan_out(lambda name, be: be.db.path.endswith(f"carrental_{name}.db")).values()) == {True}
+    finally:
+        router.close()
+
+def test_cached_backend_sees_writes_from_another_connection(tmp_path):
+    from carrental.storage.coherence import CachedBackend
+    from carrental.storage.repositories import BookingRepository, CarRepository, UserRepository
+
+    path = str(tmp_path / "shared.db")
+    mine, other = Database(path), Database(path)  # Two connections = two processes as far as SQLite knows.
+    cached = CachedBackend(mine)
+    cached.cars.add("Toyota", "Yaris", 2020, 10, 40.0, True, 1, 14, "Hatchback")
+    assert cached.cars.get(1)["daily_rate"] == 40.0
+    assert cached.bookings.list() == []
+    reads = cached.tracker(mine).counter_reads
+    cached.cars.get(1)
+    cached.bookings.list()
+    assert (cached.cars.hits, cached.bookings.hits) == (1, 1)
+    assert cached.tracker(mine).counter_reads == reads  # Nothing changed: one PRAGMA, no counter query.
+
+    CarRepository(other).update(1, daily_rate=55.0)  # External write.
+    assert cached.cars.get(1)["daily_rate"] == 55.0
+    cached.bookings.list()
+    assert cached.bookings.hits == 2  # Cars changed, bookings cache kept.
+
+    UserRepository(other).create("c@test.local", "pw", "Cara", "customer")
+    BookingRepository(other).create(1, 1, "2030-01-01", "2030-01-02", 80.0)
+    assert len(cached.bookings.list()) == 1
+    cached.cars.get(1)["daily_rate"] = 0  # Callers get copies.
+    assert cached.cars.get(1)["daily_rate"] == 55.0
+
+
+def test_integrity_checker_finds_problems_in_parallel_and_plans_repairs(tmp_path):
+    from datetime import date
+    from carrental.storage.integrity import IntegrityChecker, apply_plan
+
+    for store in (SQLiteBackend(Database(str(tmp_path / "fk.db"))), MemoryBackend()):  # Foreign keys on both engines.
+        store.users.create("f@test.local", "pw", "Fay", "customer")
+        store.cars.add("Kia", "Rio", 2021, 10, 40.0, True, 1, 14, "Hatchback")
+        store.bookings.create(1, 1, "2030-01-07", "2030-01-08", 80.0)
+        assert store.cars.delete(1) is False and store.users.delete_by_id(1) is False
+        assert store.cars.get(1) is not None
+
+    path = str(tmp_path / "i.db")
+    db = Database(path)
+    SQLiteBackend(db).users.create("c@test.local", "pw", "Cy", "customer")
+    inv = InventoryService(db)
+    for _ in range(4):
+        inv.add_car("Kia", "Rio", 2021, 10, 40.0, 1, 14)  # Mon-Tue 2030-01-07..08 costs 80.00.
+    loose = Database(path, foreign_keys=False).connect()  # Damage the file the way old versions could.
+    rows = [(1, 1, "2030-01-07", "2030-01-08", 80.0, "PENDING"),     # 1 fine
+            (9, 1, "2030-02-04", "2030-02-05", 80.0, "PENDING"),     # 2 orphan (user 9): deletable
+            (1, 7, "2030-02-04", "2030-02-05", 80.0, "APPROVED"),    # 3 orphan (car 7), paid: review
+            (1, 2, "2030-01-07", "2030-01-10", 40.0 * 4, "APPROVED"),  # 4 fine
+            (1, 2, "2030-01-09", "2030-01-09", 40.0, "APPROVED"),    # 5 overlaps 4, paid: review
+            (1, 4, "2030-01-07", "2030-01-08", 99.0, "PENDING"),     # 6 differs from today's rate: advisory, quote kept
+            (1, 4, "2030-01-14", "2030-01-15", 70.0, "COMPLETED")]   # 7 likewise
+    loose.executemany("INSERT INTO bookings (user_id, car_id, start_date, end_date, total_price, status) VALUES (?, ?, ?, ?, ?, ?)", rows)
+    loose.execute("UPDATE cars SET available = 0, version = version + 1 WHERE id IN (2, 3, 4)")  # 2 has an active booking, 3 is parked,
+    loose.execute("UPDATE bookings SET car_version = (SELECT version FROM cars WHERE id = 4) WHERE id = 7")  # 4 was taken by finished trip 7.
+    loose.commit()
+
+    report = IntegrityChecker(db, workers=3, chunk_size=2, today=date(2030, 1, 1)).run()
+    assert report.chunks == 2 * 4 + 2 * 2  # Bookings 1..7 in 4 ranges (orphans, prices), cars 1..4 in 2 (overlaps, availability).
+    assert report.counts() == {"orphan_booking": 2, "overlapping_approved": 1, "unavailable_without_booking": 2, "price_drift": 2}
+    assert [(i.check, i.entity_id) for i in report.needs_review()] == [("orphan_booking", 3), ("overlapping_approved", 5)]
+    assert sorted((i.check, i.entity_id) for i in report.advisories()) == [("price_drift", 6), ("price_drift", 7), ("unavailable_without_booking", 3)]
+    plan = report.plan()
+    assert [(p["check"], p["id"]) for p in plan] == [("orphan_booking", 2), ("unavailable_without_booking", 4)]
+    assert apply_plan(db, plan) == 2
+    assert SQLiteBackend(db).bookings.get(6)["total_price"] == 99.0 and SQLiteBackend(db).cars.get(3)["available"] in (0, False)
+    again = IntegrityChecker(db, workers=2, today=date(2030, 1, 1)).run()
+    assert not again.plan() and sorted((i.check, i.entity_id) for i in again.issues) == [
+        ("orphan_booking", 3), ("overlapping_approved", 5), ("price_drift", 6), ("price_drift", 7), ("unavailable_without_booking", 3)]
+    assert IntegrityChecker(db, processes=True, workers=2, today=date(2030, 1, 1)).run(["orphans"]).counts() == {"orphan_booking": 1}
+
+
+def test_versioned_updates_detect_lost_writes_on_both_engines(tmp_path):
+    import pytest
+    from carrental.storage.repositories import ConflictError
+
+    for store in (SQLiteBackend(Database(str(tmp_path / "v.db"))), MemoryBackend()):
+        store.users.create("v@test.local", "pw", "Vi", "customer")
+        store.cars.add("Kia", "Rio", 2021, 10, 40.0, True, 1, 14, "Hatchback")
+        seen = store.cars.get(1)  # Two admins read version 1.
+        assert seen["version"] == 1
+        assert store.cars.update(1, daily_rate=45.0, expected_version=seen["version"]) is True
+        with pytest.raises(ConflictError) as err:
+            store.cars.update(1, daily_rate=50.0, expected_version=seen["version"])
+        assert err.value.current["daily_rate"] == 45.0 and err.value.current["version"] == 2
+        store.cars.set_availability(1, False)  # Every write moves the version on.
+        assert store.cars.get(1)["version"] == 3
+        assert store.cars.update(99, mileage=1, expected_version=1) is False  # Missing is not a conflict.
+
+        store.bookings.create(1, 1, "2030-01-07", "2030-01-08", 80.0)
+        rent = RentalService(store)
+        pending = rent.pending_bookings()[0]
+        rent.set_booking_status(1, "REJECTED", expected_version=pending["version"])
+        with pytest.raises(ConflictError) as err:
+            rent.set_booking_status(1, "APPROVED", expected_version=pending["version"])
+        assert err.value.current["status"] == "REJECTED" and store.cars.get(1)["available"] == 0
@@ -0,0 +1,28 @@
+#!/usr/bin/env python
+"""
+Booking archival job (run by hand or from Task Scheduler / cron).
+- Moves bookings that ended more than N months ago into bookings_archive.
+- Works in bounded batches so the app stays responsive while it runs.
+"""
+from __future__ import annotations
+import argparse
+from carrental.storage.db import Database
+from carrental.storage.archive import BookingArchiver
+
+def main():
+    ap = argparse.ArgumentParser(description="Archive old bookings.")
+    ap.add_argument("--months", type=int, default=12, help="Archive bookings that ended more than this many months ago.")
+    ap.add_argument("--batch-size", type=int, default=500, help="Rows moved per transaction.")
+    ap.add_argument("--max-batches", type=int, default=None, help="Stop after this many batches (default: until done).")
+    ap.add_argument("--dry-run", action="store_true", help="Only report how many rows would move.")
+    args = ap.parse_args()
+
+    archiver = BookingArchiver(Database.instance(), batch_size=args.batch_size)
+    if args.dry_run:
+        print(f"[archive] {archiver.pending_count(args.months)} booking(s) older than {args.months} month(s).")
+        return
+    moved = archiver.run(args.months, max_batches=args.max_batches)
+    print(f"[archive] Done. Moved {moved} booking(s) (cutoff {archiver.cutoff(args.months)}).")
+
+if __name__ == "__main__":
+    main()
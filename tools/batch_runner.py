@@ -0,0 +1,35 @@
+#!/usr/bin/env python
+"""
+Batch runner for nightly jobs (fleet updates, price changes, approvals).
+- Reads a JSONL (or YAML, if PyYAML is installed) command file.
+- Each entry: {"op": "inventory.update_car", "args": {"car_id": 3, "daily_rate": 99.0}, "id": "optional-ref"}
+- Writes one JSON result per op to --log and prints a summary with ops/sec.
+"""
+from __future__ import annotations
+import argparse, json, sys
+from carrental.storage.db import Database
+from carrental.cli.batch import BatchRunner, load_ops
+
+def main():
+    ap = argparse.ArgumentParser(description="Run service operations from a command file.")
+    ap.add_argument("commands", help="Path to a .jsonl or .yaml command file.")
+    ap.add_argument("--log", default="-", help="Result log path (JSONL); '-' for stdout.")
+    ap.add_argument("--db", default=None, help="Database file (default: the app's carrental.db).")
+    ap.add_argument("--group-size", type=int, default=200, help="Max write ops per transaction.")
+    ap.add_argument("--read-workers", type=int, default=4, help="Threads for read phases.")
+    args = ap.parse_args()
+
+    db = Database(args.db) if args.db else Database.instance()
+    runner = BatchRunner(db, group_size=args.group_size, read_workers=args.read_workers)
+    ops = load_ops(args.commands)
+    if args.log == "-":
+        summary = runner.run(ops, log=sys.stdout)
+    else:
+        with open(args.log, "w", encoding="utf-8") as fh:
+            summary = runner.run(ops, log=fh)
+    summary.pop("results")
+    print("[batch] " + json.dumps(summary), file=sys.stderr)
+    sys.exit(0 if summary["failed"] == 0 else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,37 @@
+#!/usr/bin/env python
+"""
+Availability matrix benchmark.
+- Builds a synthetic fleet (default 10k cars x 365 days) with random bookings.
+- Times the slice-painting matrix build (target: under one second).
+"""
+from __future__ import annotations
+import argparse, random, time
+from datetime import date, timedelta
+from carrental.core.availability import build_matrix, PENDING, BOOKED
+
+def main():
+    ap = argparse.ArgumentParser(description="Time the cars x days availability matrix.")
+    ap.add_argument("--cars", type=int, default=10_000)
+    ap.add_argument("--days", type=int, default=365)
+    ap.add_argument("--bookings-per-car", type=int, default=12)
+    ap.add_argument("--seed", type=int, default=1)
+    args = ap.parse_args()
+
+    rnd = random.Random(args.seed)
+    start = date(2030, 1, 1)
+    car_ids = list(range(1, args.cars + 1))
+    bookings = []
+    for cid in car_ids:
+        for _ in range(args.bookings_per_car):
+            s = start + timedelta(days=rnd.randint(-10, args.days))
+            e = s + timedelta(days=rnd.randint(0, 10))
+            bookings.append((cid, s.isoformat(), e.isoformat(), rnd.choice((PENDING, BOOKED))))
+
+    t = time.perf_counter()
+    matrix = build_matrix(car_ids, bookings, start, args.days)
+    secs = time.perf_counter() - t
+    print(f"[bench] {args.cars} cars x {args.days} days, {len(bookings)} bookings: {secs * 1000:.1f} ms "
+          f"(occupancy {matrix.occupancy():.1%})")
+
+if __name__ == "__main__":
+    main()
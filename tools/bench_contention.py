@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+"""
+Write-contention benchmark: many admins editing the same few cars.
+- Each thread does read -> think -> write (mileage + 1) on a random hot car, on its own connection.
+- blind:       plain UPDATE (last writer wins; lost updates are counted).
+- optimistic:  UPDATE ... WHERE version = ? and retry on ConflictError.
+- pessimistic: BEGIN IMMEDIATE around read + think + write (the write lock is held while thinking).
+"""
+from __future__ import annotations
+import argparse, os, random, tempfile, threading, time
+from carrental.storage.db import Database
+from carrental.storage.repositories import CarRepository, ConflictError
+
+def run(mode: str, path: str, threads: int, ops: int, cars: int, think: float) -> dict:
+    stats = {"conflicts": 0}
+    lock = threading.Lock()
+    def worker(seed: int) -> None:
+        db = Database(path)  # One connection per admin, like separate app instances.
+        repo = CarRepository(db)
+        rnd = random.Random(seed)
+        conflicts = 0
+        for _ in range(ops):
+            cid = rnd.randint(1, cars)
+            if mode == "pessimistic":
+                con = db.connect()
+                con.execute("BEGIN IMMEDIATE")  # Take the write lock before reading.
+                mileage = con.execute("SELECT mileage FROM cars WHERE id=?", (cid,)).fetchone()[0]
+                time.sleep(think)
+                con.execute("UPDATE cars SET mileage=?, version=version+1 WHERE id=?", (mileage + 1, cid))
+                con.commit()
+                continue
+            while True:
+                car = repo.get(cid)
+                time.sleep(think)
+                try:
+                    repo.update(cid, mileage=car["mileage"] + 1, expected_version=car["version"] if mode == "optimistic" else None)
+                    break
+                except ConflictError:
+                    conflicts += 1  # Re-read and try again.
+        db.connect().close()
+        with lock:
+            stats["conflicts"] += conflicts
+    pool = [threading.Thread(target=worker, args=(t,)) for t in range(threads)]
+    start = time.perf_counter()
+    for th in pool:
+        th.start()
+    for th in pool:
+        th.join()
+    secs = time.perf_counter() - start
+    total = threads * ops
+    db = Database(path)
+    done = sum(c["mileage"] for c in CarRepository(db).list(only_available=False))
+    db.connect().close()
+    return {"secs": secs, "ops_per_sec": total / secs, "lost": total - done, **stats}
+
+def main():
+    ap = argparse.ArgumentParser(description="Blind vs optimistic vs pessimistic car updates under contention.")
+    ap.add_argument("--threads", type=int, default=8)
+    ap.add_argument("--ops", type=int, default=100, help="Updates per thread.")
+    ap.add_argument("--cars", type=int, default=4, help="Hot cars everybody edits (fewer = more contention).")
+    ap.add_argument("--think-ms", type=float, default=1.0, help="Pause between reading and writing.")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for mode in ("blind", "optimistic", "pessimistic"):
+            path = os.path.join(tmp, f"{mode}.db")
+            repo = CarRepository(Database(path))
+            for _ in range(args.cars):
+                repo.add("Kia", "Rio", 2021, 0, 40.0, True, 1, 14, "Hatchback")  # Mileage 0: the final sum counts applied updates.
+            r = run(mode, path, args.threads, args.ops, args.cars, args.think_ms / 1000.0)
+            print(f"[bench] {mode:<12} {r['ops_per_sec']:9.0f} ops/s  lost updates {r['lost']:6d}  conflicts retried {r['conflicts']:6d}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+"""
+Group-commit throughput benchmark.
+- Many threads create bookings at once (a promotion burst).
+- Compares one commit per booking (BookingRepository.create) with GroupCommitWriter.
+"""
+from __future__ import annotations
+import argparse, os, tempfile, threading, time
+from carrental.storage.db import Database
+from carrental.storage.repositories import BookingRepository, CarRepository, UserRepository
+from carrental.storage.group_commit import GroupCommitWriter
+
+def burst(create, threads: int, per_thread: int) -> float:
+    def worker(t: int) -> None:
+        for i in range(per_thread):
+            create(t + 1, 1, "2030-01-01", "2030-01-03", 100.0)
+    pool = [threading.Thread(target=worker, args=(t,)) for t in range(threads)]
+    start = time.perf_counter()
+    for th in pool:
+        th.start()
+    for th in pool:
+        th.join()
+    return time.perf_counter() - start
+
+def setup(db: Database, threads: int) -> Database:  # One customer per thread and a car (foreign keys are enforced).
+    for t in range(threads):
+        UserRepository(db).create(f"u{t}@bench.local", "pw", f"User {t}", "customer")
+    CarRepository(db).add("Kia", "Rio", 2021, 10, 40.0, True, 1, 14, "Hatchback")
+    return db
+
+def main():
+    ap = argparse.ArgumentParser(description="Per-call commits vs group commit.")
+    ap.add_argument("--threads", type=int, default=16)
+    ap.add_argument("--per-thread", type=int, default=100)
+    ap.add_argument("--max-items", type=int, default=64)
+    ap.add_argument("--max-delay-ms", type=float, default=5.0)
+    ap.add_argument("--durability", choices=["full", "normal", "off"], default="full")
+    args = ap.parse_args()
+    total = args.threads * args.per_thread
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = setup(Database(os.path.join(tmp, "per_call.db")), args.threads)
+        db.connect().execute(f"PRAGMA synchronous={args.durability.upper()}")
+        lock = threading.Lock()  # The shared connection is not safe for concurrent transactions.
+        repo = BookingRepository(db)
+        def per_call(*row):
+            with lock:
+                return repo.create(*row)
+        secs = burst(per_call, args.threads, args.per_thread)
+        print(f"[bench] per-call commits: {total} bookings in {secs * 1000:8.1f} ms  {total / secs:10.0f} ops/s")
+        db.connect().close()
+
+        db2 = setup(Database(os.path.join(tmp, "group.db")), args.threads)
+        with GroupCommitWriter(db2, max_items=args.max_items, max_delay_ms=args.max_delay_ms, durability=args.durability) as writer:
+            secs = burst(writer.create, args.threads, args.per_thread)
+            print(f"[bench] group commit:     {total} bookings in {secs * 1000:8.1f} ms  {total / secs:10.0f} ops/s "
+                  f"({writer.batches} commits, avg {writer.items / max(writer.batches, 1):.1f} rows each)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python
+"""
+Per-call latency of the hot repository methods (SQLite backend).
+- Seeds a temp database, then times get / list / update / set_status one call at a time.
+- Prints mean and p95 in microseconds so before/after runs can be compared line by line.
+"""
+from __future__ import annotations
+import argparse, os, random, tempfile, time
+from carrental.storage.db import Database
+from carrental.storage.repositories import BookingRepository, CarRepository, UserRepository
+
+def _pct(values, pct):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+def main():
+    ap = argparse.ArgumentParser(description="Repository per-call latency benchmark.")
+    ap.add_argument("--calls", type=int, default=5000, help="Calls per method.")
+    ap.add_argument("--cars", type=int, default=500)
+    ap.add_argument("--bookings", type=int, default=5000)
+    ap.add_argument("--seed", type=int, default=7)
+    args = ap.parse_args()
+
+    rnd = random.Random(args.seed)
+    path = os.path.join(tempfile.mkdtemp(), "bench.db")
+    db = Database(path)
+    users, cars, bookings = UserRepository(db), CarRepository(db), BookingRepository(db)
+    with db.transaction():  # Seed in one go.
+        for i in range(50):
+            users.create(f"u{i}@bench.local", "pw", f"User {i}", "customer")
+        for i in range(args.cars):
+            cars.add("Make", f"Model {i}", 2020, 1000, 50.0 + i % 40, True, 1, 30, "CAR")
+        for i in range(args.bookings):
+            day = rnd.randint(1, 20)
+            bookings.create(rnd.randint(1, 50), rnd.randint(1, args.cars), f"2030-03-{day:02d}", f"2030-03-{day + 2:02d}", 100.0)
+
+    cases = {
+        "users.get_by_email": lambda: users.get_by_email(f"u{rnd.randint(0, 49)}@bench.local"),
+        "cars.get": lambda: cars.get(rnd.randint(1, args.cars)),
+        "cars.update(rate)": lambda: cars.update(rnd.randint(1, args.cars), daily_rate=float(rnd.randint(40, 90))),
+        "cars.update(rate,mileage)": lambda: cars.update(rnd.randint(1, args.cars), daily_rate=60.0, mileage=rnd.randint(0, 9999)),
+        "bookings.get": lambda: bookings.get(rnd.randint(1, args.bookings)),
+        "bookings.list(user)": lambda: bookings.list(user_id=rnd.randint(1, 50)),
+        "bookings.list(user,status)": lambda: bookings.list(user_id=rnd.randint(1, 50), status="PENDING"),
+        "bookings.set_status": lambda: bookings.set_status(rnd.randint(1, args.bookings), rnd.choice(["PENDING", "APPROVED"])),
+    }
+    print(f"{'call':<28}{'mean us':>10}{'p95 us':>10}")
+    for name, fn in cases.items():
+        secs = []
+        for _ in range(args.calls):
+            t = time.perf_counter()
+            fn()
+            secs.append(time.perf_counter() - t)
+        print(f"{name:<28}{sum(secs) / len(secs) * 1e6:>10.1f}{_pct(secs, 95) * 1e6:>10.1f}")
+    os.remove(path)
+
+if __name__ == "__main__":
+    main()
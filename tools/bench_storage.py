@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+"""
+Storage engine benchmark (same workload for every backend).
+- Runs register/add-car/book/list/approve operations through the real services.
+- Compares the SQLite backend (temp file) with the in-memory backend.
+"""
+from __future__ import annotations
+import argparse, os, random, tempfile, time
+from carrental.storage.db import Database
+from carrental.storage.backends import SQLiteBackend
+from carrental.storage.memory import MemoryBackend
+from carrental.services.auth_service import AuthService
+from carrental.services.inventory_service import InventoryService
+from carrental.services.rental_service import RentalService
+
+def run_workload(store, users: int, cars: int, bookings: int, seed: int = 7) -> dict:
+    rnd = random.Random(seed)
+    auth, inv, rent = AuthService(store), InventoryService(store), RentalService(store)
+    timings = {}
+
+    t = time.perf_counter()
+    for i in range(users):
+        auth.register(email=f"u{i}@bench.local", password="pw", name=f"User {i}")
+    timings["register"] = (users, time.perf_counter() - t)
+
+    t = time.perf_counter()
+    for i in range(cars):
+        inv.add_car("Make", f"Model {i}", 2020, 1000, 50.0 + i % 40, 1, 30)
+    timings["add_car"] = (cars, time.perf_counter() - t)
+
+    car_ids = [c["id"] for c in inv.list_cars(only_available=False)]
+    user_ids = [auth.users.get_by_email(f"u{i}@bench.local")["id"] for i in range(users)]
+    t = time.perf_counter()
+    for _ in range(bookings):
+        day = rnd.randint(1, 20)
+        rent.make_booking(user_id=rnd.choice(user_ids), car_id=rnd.choice(car_ids),
+                          start_date=f"2030-03-{day:02d}", end_date=f"2030-03-{day + 2:02d}")
+    timings["make_booking"] = (bookings, time.perf_counter() - t)
+
+    t = time.perf_counter()
+    for uid in user_ids:
+        rent.my_bookings_table(uid)
+    timings["my_bookings"] = (len(user_ids), time.perf_counter() - t)
+
+    t = time.perf_counter()
+    pending = rent.pending_bookings()
+    for b in pending[: bookings // 2]:
+        rent.set_booking_status(b["id"], "REJECTED")
+    timings["review"] = (bookings // 2, time.perf_counter() - t)
+    return timings
+
+def main():
+    ap = argparse.ArgumentParser(description="Compare storage engines under one workload.")
+    ap.add_argument("--users", type=int, default=200)
+    ap.add_argument("--cars", type=int, default=200)
+    ap.add_argument("--bookings", type=int, default=2000)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engines = [
+            SQLiteBackend(Database(os.path.join(tmp, "bench.db"))),
+            MemoryBackend(),
+        ]
+        for store in engines:
+            timings = run_workload(store, args.users, args.cars, args.bookings)
+            print(f"[bench] engine={store.name}")
+            for op, (n, secs) in timings.items():
+                rate = n / secs if secs else float("inf")
+                print(f"[bench]   {op:<13} {n:>7} ops  {secs * 1000:9.1f} ms  {rate:12.0f} ops/s")
+            if isinstance(store, SQLiteBackend):
+                store.db.connect().close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+"""
+Database integrity check (read-only unless --apply).
+- Orphaned bookings, overlapping approved bookings, unavailable cars with no active booking, totals that differ from today's price.
+- Drifted prices and parked cars are advisory: listed, never repaired, and they do not fail the run.
+- Each check is split into id ranges run on --workers threads (or processes with --processes), each on its own connection.
+- Prints a summary; --plan writes the repair statements as JSON; --apply runs them in one transaction.
+"""
+from __future__ import annotations
+import argparse, json, sys
+from carrental.storage.db import Database
+from carrental.storage.integrity import CHECKS, IntegrityChecker, apply_plan
+
+def main():
+    ap = argparse.ArgumentParser(description="Check the database for inconsistencies and plan repairs.")
+    ap.add_argument("--db", default=None, help="Database file (default: the app's carrental.db).")
+    ap.add_argument("--checks", default=",".join(CHECKS), help=f"Comma-separated subset of: {', '.join(CHECKS)}.")
+    ap.add_argument("--workers", type=int, default=4, help="Parallel workers.")
+    ap.add_argument("--chunk-size", type=int, default=10_000, help="Ids per work item.")
+    ap.add_argument("--processes", action="store_true", help="Use processes instead of threads (helps the price check).")
+    ap.add_argument("--plan", default=None, help="Write the repair plan (JSON) to this file.")
+    ap.add_argument("--apply", action="store_true", help="Run the repair plan now (take a backup first).")
+    args = ap.parse_args()
+
+    db = Database(args.db) if args.db else Database.instance()
+    checker = IntegrityChecker(db, workers=args.workers, chunk_size=args.chunk_size, processes=args.processes)
+    report = checker.run([c.strip() for c in args.checks.split(",") if c.strip()])
+    for issue in report.issues[:50]:
+        fix = "advisory" if issue.advisory else "fix planned" if issue.repair else "needs review"
+        print(f"[{issue.check}] {issue.entity} {issue.entity_id}: {issue.detail} ({fix})")
+    if len(report.issues) > 50:
+        print(f"... and {len(report.issues) - 50} more")
+    plan = report.plan()
+    if args.plan:
+        with open(args.plan, "w", encoding="utf-8") as fh:
+            json.dump(plan, fh, indent=2)
+    summary = {"issues": report.counts(), "repairs": len(plan), "needs_review": len(report.needs_review()),
+               "advisory": len(report.advisories()),
+               "chunks": report.chunks, "seconds": round(report.seconds, 3)}
+    if args.apply and plan:
+        summary["rows_changed"] = apply_plan(db, plan)
+    print("[integrity] " + json.dumps(summary), file=sys.stderr)
+    actionable = [i for i in report.issues if not i.advisory]
+    sys.exit(0 if not actionable or args.apply and not report.needs_review() else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+#!/usr/bin/env python
+"""
+Replay recorded CLI sessions headless, many at once, and report per-command latency.
+- Record a session with:  python -m carrental --record-session admin.jsonl
+- Replay it 20 times on 8 threads:  PYTHONPATH=src python tools/session_replay.py admin.jsonl --copies 20 --workers 8 --db load.db
+- Each session runs the real main() on its own connection; --think 1 keeps the recorded pauses, 0 replays flat out.
+"""
+from __future__ import annotations
+import argparse, glob, json, sys
+from carrental.main import main as app_main
+from carrental.storage.db import Database
+from carrental.storage.seed import seed_if_empty
+from carrental.utils.session import load_session, replay
+
+def main():
+    ap = argparse.ArgumentParser(description="Replay recorded CLI sessions in parallel.")
+    ap.add_argument("sessions", nargs="+", help="Session files (JSONL) or glob patterns.")
+    ap.add_argument("--db", required=True, help="Database file to replay against (use a copy, sessions change data).")
+    ap.add_argument("--copies", type=int, default=1, help="Replay every session this many times.")
+    ap.add_argument("--workers", type=int, default=8, help="Sessions running at the same time.")
+    ap.add_argument("--think", type=float, default=0.0, help="Scale recorded think time (1 = as recorded, 0 = none).")
+    ap.add_argument("--password", default=None, help="Answer for passwords that were recorded as null.")
+    ap.add_argument("--seed", action="store_true", help="Add the default admin and sample cars first if missing.")
+    ap.add_argument("--report", default=None, help="Also write the latency report to this file.")
+    args = ap.parse_args()
+
+    paths = [p for pattern in args.sessions for p in (sorted(glob.glob(pattern)) or [pattern])]
+    sessions = [load_session(p) for p in paths] * max(1, args.copies)
+    if args.seed:
+        seed_if_empty(Database(args.db))
+    summary = replay(lambda: app_main(["--db", args.db]), sessions, workers=args.workers, think=args.think, password=args.password)
+
+    print(summary["report"])
+    if args.report:
+        with open(args.report, "w", encoding="utf-8") as fh:
+            fh.write(summary["report"])
+    for failure in summary["failed"][:5]:  # A few examples are enough to see what broke.
+        print(f"[replay] failed: {failure['error']} | last output: {' / '.join(failure['tail'][-3:])}", file=sys.stderr)
+    print("[replay] " + json.dumps({"sessions": summary["sessions"], "ok": summary["ok"], "failed": len(summary["failed"]),
+                                   "seconds": round(summary["seconds"], 3), "commands": summary["commands"],
+                                   "commands_per_sec": round(summary["commands_per_sec"], 1)}), file=sys.stderr)
+    sys.exit(0 if not summary["failed"] else 1)
+
+if __name__ == "__main__":
+    main()